@@ -0,0 +1,119 @@
+"""Importable version of Data_Collection.ipynb: Forbes tables of the largest Indian companies.
+
+The page is parsed once with lxml's incremental parser. Every ``wikitable``
+is picked up as soon as its closing tag is seen, its rows are collected into
+per-column lists and the DataFrame is built once per table; parsed tables are
+cleared straight away so memory does not grow with the page.
+
+    python data_collection.py                 # fetch and write both CSVs
+    python data_collection.py --html page.html --archive archive/
+"""
+import gzip
+import io
+import json
+import os
+import time
+
+import pandas as pd
+from lxml import etree
+
+URL = 'https://en.wikipedia.org/wiki/List_of_largest_companies_in_India'
+
+# the notebook's two tables, in page order
+OUTPUT_FILES = [
+    'Largest Companies in India 2024 Forbes.csv',
+    'Largest Companies in India 2023 Forbes.csv',
+]
+
+
+def fetch_page(url=URL):
+    import requests
+
+    page = requests.get(url, headers={'User-Agent': 'Web-Neural-Infotech-Internship data collection'},
+                        timeout=30)
+    page.raise_for_status()
+    return page.content
+
+
+def _cell_text(cell):
+    return ''.join(cell.itertext()).strip()
+
+
+def iter_table_columns(html, table_class='wikitable'):
+    """Yield (headers, columns) for every table with ``table_class``, in one pass."""
+    if isinstance(html, str):
+        html = html.encode('utf-8')
+    for _, table in etree.iterparse(io.BytesIO(html), events=('end',), tag='table', html=True,
+                                    encoding='utf-8'):
+        if table_class not in (table.get('class') or '').split():
+            continue
+        headers = None
+        columns = None
+        for row in table.iter('tr'):
+            if headers is None:
+                headers = [_cell_text(cell) for cell in row.findall('th')]
+                if headers:
+                    columns = [[] for _ in headers]
+                else:
+                    headers = None
+                continue
+            cells = row.findall('td')
+            if not cells:
+                continue
+            # short rows (e.g. merged cells) are padded, extra cells are ignored
+            for index, column in enumerate(columns):
+                column.append(_cell_text(cells[index]) if index < len(cells) else None)
+        if headers:
+            yield headers, columns
+        table.clear()
+
+
+def extract_tables(html, table_class='wikitable'):
+    """Return one DataFrame per ``table_class`` table on the page."""
+    tables = []
+    for headers, columns in iter_table_columns(html, table_class):
+        df = pd.DataFrame(dict(enumerate(columns)))
+        df.columns = headers
+        tables.append(df)
+    return tables
+
+
+def archive_page(html, url, directory):
+    """Store the raw page in the books_scraper archive format for offline re-parsing."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"wikipedia-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-00001.jsonl.gz")
+    body = html.decode('utf-8') if isinstance(html, bytes) else html
+    record = {'url': url, 'status': 200, 'fetched_at': time.time(),
+              'content_type': 'text/html; charset=UTF-8', 'body': body}
+    with gzip.open(path, 'wt', encoding='utf-8') as file:
+        file.write(json.dumps(record) + '\n')
+    return path
+
+
+def parse_record(record):
+    """Archive parser (python -m books_scraper.archive DIR --parser data_collection:parse_record)."""
+    return {
+        f'table_{number}': dict(zip(headers, columns))
+        for number, (headers, columns) in enumerate(iter_table_columns(record['body']), start=1)
+    }
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Scrape the Forbes tables of the largest companies in India')
+    parser.add_argument('--html', help='parse a saved copy of the page instead of fetching it')
+    parser.add_argument('--archive', help='also store the raw page in this archive directory')
+    args = parser.parse_args()
+
+    if args.html:
+        with open(args.html, 'rb') as file:
+            html = file.read()
+    else:
+        html = fetch_page()
+    if args.archive:
+        archive_page(html, URL, args.archive)
+
+    for df, filename in zip(extract_tables(html), OUTPUT_FILES):
+        df.to_csv(filename, index=False)
+        print(f'{filename}: {len(df)} rows')
@@ -0,0 +1,83 @@
+"""Pages per second of the offline re-parse of an archive filled by two crawls.
+
+Run from the Scrapy project directory:
+
+    python -m benchmarks.bench_archive --workers 2
+
+The fixture catalogue is crawled twice (with detail pages) into one archive,
+so every segment of the second crawl repeats pages of the first, and
+``--change`` of the books are repriced before the last crawl. Re-parsing the
+archive with books_scraper.archive must write each listing and detail row
+once, typed the same as a single crawl's export, with the prices of the last
+crawl.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.bench_profiles import measure
+from benchmarks.fixture_server import FixtureServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--crawls", type=int, default=2)
+    parser.add_argument("--change", type=float, default=0.05, help="fraction of books repriced before the last crawl")
+    parser.add_argument("--segment-records", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--format", default="parquet", choices=["csv", "parquet", "arrow"])
+    args = parser.parse_args()
+
+    import pyarrow as pa
+    import pyarrow.csv as pv
+    import pyarrow.parquet as pq
+
+    from books_scraper.archive import reparse
+
+    with tempfile.TemporaryDirectory() as workdir, FixtureServer() as server:
+        archive_dir = os.path.join(workdir, "archive")
+        overrides = {
+            "CRAWL_PROFILE": "fast",
+            "ARCHIVE_ENABLED": True,
+            "ARCHIVE_DIR": archive_dir,
+            "ARCHIVE_SEGMENT_RECORDS": args.segment_records,
+        }
+        catalogue = server.catalogue.books
+        archived = 0
+        for crawl in range(args.crawls):
+            if crawl and crawl == args.crawls - 1:
+                for book in random.Random(0).sample(catalogue, int(len(catalogue) * args.change)):
+                    book["price"] = round(book["price"] * 1.1, 2)
+            archived += measure(server.url, overrides, {"details": "1"})["stats"].get("archive/records", 0)
+        books = len(catalogue)
+
+        output_dir = os.path.join(workdir, "reparsed")
+        start = time.perf_counter()
+        pages, counts = reparse(archive_dir, output_dir=output_dir, export_format=args.format, workers=args.workers)
+        elapsed = time.perf_counter() - start
+        print(f"{args.crawls} crawls, {archived} pages archived; re-parsed {pages} pages in {elapsed:.2f}s "
+              f"({pages / elapsed:.0f} pages/s)")
+        print(f"rows: {counts} (catalogue of {books} books)")
+        assert pages == archived, (pages, archived)
+        assert counts == {"listing": books, "detail": books}, counts
+        listing_path = os.path.join(output_dir, f"listing.{args.format}")
+        if args.format == "parquet":
+            listing = pq.read_table(listing_path)
+            schema = listing.schema
+            assert schema.field("price").type == pa.float64() and schema.field("title").type == pa.string()
+        elif args.format == "arrow":
+            listing = pa.ipc.open_file(listing_path).read_all()
+        else:
+            listing = pv.read_csv(listing_path)
+        # listing URLs end in <slug>/index.html
+        prices = {url.rsplit("/", 2)[-2]: price
+                  for url, price in zip(listing.column("url").to_pylist(), listing.column("price").to_pylist())}
+        stale = [book["slug"] for book in catalogue if abs(prices[book["slug"]] - book["price"]) > 0.001]
+        assert not stale, f"{len(stale)} books re-parsed with an older price, e.g. {stale[:3]}"
+        print("each row written once, with the prices of the last crawl")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Items per second into SQLite: books.csv + data_Cleaning.py + to_sql vs DatabasePipeline.
+
+Run from the Scrapy project directory:
+
+    python -m benchmarks.bench_database --items 1000000
+
+Both paths consume the same synthetic feed of raw spider items (1% of them
+repeated), each in its own process. The round trip exports books.csv with
+BatchExportPipeline, cleans it with data_Cleaning.py and loads the result
+with DataFrame.to_sql; DatabasePipeline upserts the cleaned rows directly.
+For the pipeline, the time spent on the calling (reactor) thread is shown
+next to the time until the writer thread has committed everything. The two
+tables must hold the same books. With --crawl, a real crawl of the fixture
+server is also written through DatabasePipeline and its row count checked.
+"""
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_export import synthetic_items
+
+# data_Cleaning.py imports schemas.py and profiler.py from the repository root; spawned workers
+# inherit the path
+if __name__ == "__main__":
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+
+EXPORT_FIELDS = ["title", "price", "availability", "rating"]
+
+
+def items_with_repeats(count):
+    for i, item in enumerate(synthetic_items(count)):
+        yield item
+        if i % 100 == 0:
+            yield dict(item)
+
+
+def round_trip(count, workdir, batch_size, queue):
+    from books_scraper import data_Cleaning
+    from books_scraper.pipelines import BatchExportPipeline
+
+    csv_path = os.path.join(workdir, "books.csv")
+    db_path = os.path.join(workdir, "round_trip.db")
+    start = time.perf_counter()
+    pipeline = BatchExportPipeline(csv_path, "csv", batch_size, EXPORT_FIELDS)
+    pipeline.open_spider(None)
+    for item in items_with_repeats(count):
+        pipeline.process_item(item, None)
+    pipeline.close_spider(None)
+    df = data_Cleaning.clean_books(data_Cleaning.load_books(csv_path))
+    with sqlite3.connect(db_path) as conn:
+        df.to_sql("books", conn, index=False)
+    conn.close()
+    queue.put({"elapsed": time.perf_counter() - start, "path": db_path})
+
+
+def direct(count, workdir, batch_size, queue):
+    from books_scraper.pipelines import DatabasePipeline
+
+    db_path = os.path.join(workdir, "direct.db")
+    pipeline = DatabasePipeline("sqlite", db_path, {}, "books", batch_size, None)
+    start = time.perf_counter()
+    pipeline.open_spider(None)
+    for item in items_with_repeats(count):
+        pipeline.process_item(item, None)
+    pipeline.stop()
+    handed_over = time.perf_counter() - start
+    pipeline.wait()
+    queue.put({"elapsed": time.perf_counter() - start, "caller": handed_over, "path": db_path})
+
+
+def run(target, *args):
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    worker = context.Process(target=target, args=(*args, queue))
+    worker.start()
+    result = queue.get()
+    worker.join()
+    return result
+
+
+def books(path):
+    with sqlite3.connect(path) as conn:
+        rows = sorted(conn.execute(f"SELECT {', '.join(EXPORT_FIELDS)} FROM books"))
+    conn.close()
+    return rows
+
+
+def crawl(workdir):
+    from benchmarks.bench_profiles import measure
+    from benchmarks.fixture_server import FixtureServer
+
+    db_path = os.path.join(workdir, "crawl.db")
+    with FixtureServer() as server:
+        result = measure(server.url, {
+            "CRAWL_PROFILE": "fast",
+            "ITEM_PIPELINES": {"books_scraper.pipelines.DatabasePipeline": 400},
+            "DATABASE_ENABLED": True,
+            "DATABASE_PATH": db_path,
+        })
+    rows = len(books(db_path))
+    print(f"crawl          {result['items']:>8} items {rows:>8} rows in the table "
+          f"{result['stats'].get('database/rows_written', 0):>8} rows written")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--crawl", action="store_true", help="also crawl the fixture server into SQLite")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        slow = run(round_trip, args.items, workdir, args.batch_size)
+        fast = run(direct, args.items, workdir, args.batch_size)
+        print(f"round trip     {args.items / slow['elapsed']:>12,.0f} items/s")
+        print(f"pipeline       {args.items / fast['elapsed']:>12,.0f} items/s committed, "
+              f"{args.items / fast['caller']:>12,.0f} items/s on the calling thread")
+        print("same books:", books(slow["path"]) == books(fast["path"]))
+        if args.crawl:
+            crawl(workdir)
+
+
+if __name__ == "__main__":
+    main()
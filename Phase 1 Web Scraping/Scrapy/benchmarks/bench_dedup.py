@@ -0,0 +1,124 @@
+"""Items per second and peak RSS of drop_duplicates on the whole crawl vs DedupPipeline.
+
+Run from the Scrapy project directory:
+
+    python -m benchmarks.bench_dedup --items 2000000 --duplicates 0.1
+
+A synthetic feed of raw spider items repeats ``--duplicates`` of its items
+(some with the price written without the pound sign). The baseline collects
+the cleaned rows into a DataFrame and drops duplicates at the end, as
+data_Cleaning.py does; DedupPipeline drops them one item at a time. Each runs
+in its own process, so ru_maxrss is the peak of that method alone. Both must
+keep the same items in the same order. DedupPipeline then runs over the feed
+twice more: with DEDUP_PERSIST the second run must drop every item, and
+without it a third run must keep the same items as the first.
+"""
+import argparse
+import hashlib
+import multiprocessing
+import os
+import random
+import resource
+import tempfile
+import time
+
+RATINGS = ["One", "Two", "Three", "Four", "Five"]
+FIELDS = ["title", "price", "availability", "rating"]
+
+
+def book(i, pound=True):
+    return {
+        "url": f"http://books.toscrape.com/catalogue/book-{i}_{i}/index.html",
+        "title": f"Synthetic Book {i}",
+        "price": f"{'£' if pound else ''}{10 + (i * 37) % 5000 / 100:.2f}",
+        "rating": RATINGS[i % 5],
+        "availability": "In stock" if i % 13 else "Out of stock",
+    }
+
+
+def items_with_duplicates(count, duplicates, seed=0):
+    rng = random.Random(seed)
+    for i in range(count):
+        if i and rng.random() < duplicates:
+            yield book(rng.randrange(i), pound=rng.random() < 0.5)
+        else:
+            yield book(i)
+
+
+def in_memory(count, duplicates, workdir, capacity, queue):
+    import pandas as pd
+
+    from books_scraper.pipelines import clean_book
+
+    start = time.perf_counter()
+    rows = [clean_book(item)[1:] for item in items_with_duplicates(count, duplicates)]
+    df = pd.DataFrame(rows, columns=FIELDS).drop_duplicates()
+    kept = hashlib.blake2b("\n".join(df["title"]).encode("utf-8")).hexdigest()
+    queue.put({"elapsed": time.perf_counter() - start, "kept": len(df), "digest": kept,
+               "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024})
+
+
+def streaming(count, duplicates, workdir, capacity, queue):
+    from scrapy import Spider
+    from scrapy.exceptions import DropItem
+    from scrapy.utils.test import get_crawler
+
+    from books_scraper.pipelines import DedupPipeline
+
+    spider = Spider("bench")
+    results = []
+    for persist in (True, True, False):
+        stats = get_crawler().stats
+        pipeline = DedupPipeline(os.path.join(workdir, "fingerprints.db"), FIELDS, capacity, 0.01, persist, stats)
+        digest = hashlib.blake2b()
+        kept = 0
+        start = time.perf_counter()
+        pipeline.open_spider(spider)
+        for item in items_with_duplicates(count, duplicates):
+            try:
+                pipeline.process_item(item, spider)
+            except DropItem:
+                continue
+            digest.update(("\n" if kept else "").encode("utf-8") + item["title"].encode("utf-8"))
+            kept += 1
+        pipeline.close_spider(spider)
+        results.append({"elapsed": time.perf_counter() - start, "kept": kept, "digest": digest.hexdigest(),
+                        "stats": stats.get_stats()})
+    queue.put({**results[0], "second_run_kept": results[1]["kept"], "fresh_run_digest": results[2]["digest"],
+               "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024})
+
+
+def run(target, *args):
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    worker = context.Process(target=target, args=(*args, queue))
+    worker.start()
+    result = queue.get()
+    worker.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=2_000_000)
+    parser.add_argument("--duplicates", type=float, default=0.1, help="share of items that repeat an earlier one")
+    parser.add_argument("--capacity", type=int, default=10_000_000, help="DEDUP_CAPACITY of the Bloom filter")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        baseline = run(in_memory, args.items, args.duplicates, workdir, args.capacity)
+        pipeline = run(streaming, args.items, args.duplicates, workdir, args.capacity)
+    stats = pipeline["stats"]
+    for label, result in (("drop_duplicates", baseline), ("DedupPipeline", pipeline)):
+        print(f"{label:<16} {args.items / result['elapsed']:>10,.0f} items/s "
+              f"{result['peak_rss_mb']:>8.1f} MB peak RSS {result['kept']:>10,} items kept")
+    print(f"same items kept: {baseline['digest'] == pipeline['digest']}; second run kept "
+          f"{pipeline['second_run_kept']:,} with DEDUP_PERSIST, the same items without it: "
+          f"{pipeline['fresh_run_digest'] == pipeline['digest']}")
+    print(f"filter memory {stats['dedup/memory_bytes'] / 1024 / 1024:.1f} MB, false positives "
+          f"{stats['dedup/false_positives']:,} ({100 * stats['dedup/false_positive_rate']:.4f}% of new items, "
+          f"{100 * stats['dedup/expected_false_positive_rate']:.4f}% expected)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Items per second and peak RSS of CSVPipeline vs BatchExportPipeline.
+
+Run from the Scrapy project directory:
+
+    python -m benchmarks.bench_export --items 1000000
+
+Each pipeline consumes the same synthetic feed of raw spider items in its own
+process, so ru_maxrss is the peak of that pipeline alone.
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+RATINGS = ["One", "Two", "Three", "Four", "Five"]
+
+
+def synthetic_items(count):
+    for i in range(count):
+        yield {
+            "url": f"http://books.toscrape.com/catalogue/book-{i}_{i}/index.html",
+            "title": f"Synthetic Book {i}",
+            "price": f"£{10 + (i * 37) % 5000 / 100:.2f}",
+            "rating": RATINGS[i % 5],
+            "availability": "In stock" if i % 13 else "Out of stock",
+        }
+
+
+def run_pipeline(name, count, workdir, batch_size, queue):
+    from books_scraper.pipelines import BatchExportPipeline, CSVPipeline
+
+    os.chdir(workdir)  # CSVPipeline always writes ./books.csv
+    if name == "CSVPipeline":
+        pipeline = CSVPipeline()
+        path = "books.csv"
+    else:
+        export_format = name.split(":")[1]
+        path = f"books.{export_format}"
+        pipeline = BatchExportPipeline(path, export_format, batch_size,
+                                       ["title", "price", "availability", "rating"])
+
+    start = time.perf_counter()
+    pipeline.open_spider(None)
+    for item in synthetic_items(count):
+        pipeline.process_item(item, None)
+    pipeline.close_spider(None)
+    elapsed = time.perf_counter() - start
+
+    queue.put({
+        "elapsed": elapsed,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "size_mb": os.path.getsize(path) / 1024 / 1024,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--pipelines", nargs="+",
+                        default=["CSVPipeline", "batch:csv", "batch:parquet", "batch:arrow"])
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in args.pipelines:
+            queue = context.Queue()
+            worker = context.Process(target=run_pipeline,
+                                     args=(name, args.items, workdir, args.batch_size, queue))
+            worker.start()
+            result = queue.get()
+            worker.join()
+            print(f"{name:<14} {args.items / result['elapsed']:>12,.0f} items/s "
+                  f"{result['peak_rss_mb']:>8.1f} MB peak RSS {result['size_mb']:>8.1f} MB output")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Micro-benchmark of listing-page extraction on saved fixture pages.
+
+Run from the Scrapy project directory:
+
+    python -m benchmarks.bench_extraction --copies 4 --repeat 5
+
+Saves every listing page of the fixture catalogue to a temporary directory,
+then times the original per-product parsel CSS queries against the compiled
+single-pass extractor in books_scraper/extraction.py, both including and
+excluding HTML parsing. The two must produce identical rows.
+"""
+import argparse
+import os
+import tempfile
+import time
+from urllib.parse import urljoin
+
+from parsel import Selector
+
+from benchmarks.fixture_server import Catalogue, load_books
+from books_scraper.extraction import extract_listing, iter_rows, parse_document
+
+BASE_URL = "http://books.toscrape.com/catalogue/page-1.html"
+
+
+def extract_css(selector):
+    """The original BooksSpider.parse selectors, kept as the baseline."""
+    rows = []
+    for book in selector.css("article.product_pod"):
+        availability = book.css("p.availability::text").getall()
+        rows.append({
+            "url": urljoin(BASE_URL, book.css("h3 a::attr(href)").get()),
+            "title": book.css("h3 a::attr(title)").get(),
+            "price": book.css("p.price_color::text").get(),
+            "rating": book.css("p.star-rating::attr(class)").get().replace('star-rating', '').strip(),
+            "availability": ''.join([text.strip() for text in availability]).strip(),
+        })
+    return rows
+
+
+def save_pages(directory, copies):
+    catalogue = Catalogue(load_books(copies=copies))
+    paths = []
+    page = 1
+    while True:
+        body = catalogue.render(f"catalogue/page-{page}.html")
+        if body is None:
+            return paths
+        path = os.path.join(directory, f"page-{page}.html")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(body)
+        paths.append(path)
+        page += 1
+
+
+def timed(label, pages, repeat, function):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        products = sum(function(page) for page in pages)
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<34} {len(pages) / best:>9.0f} pages/s {products / best:>11.0f} products/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--copies", type=int, default=4, help="repeat the fixture catalogue N times")
+    parser.add_argument("--repeat", type=int, default=5, help="keep the best of N runs")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = save_pages(directory, args.copies)
+        documents = []
+        for path in paths:
+            with open(path, "rb") as file:
+                documents.append(file.read())
+    print(f"{len(documents)} saved listing pages")
+
+    selectors = [Selector(body=body, type="html") for body in documents]
+    trees = [selector.root for selector in selectors]
+
+    # both extractors must agree before their speed means anything
+    for selector in selectors:
+        compiled = list(iter_rows(extract_listing(selector.root, BASE_URL)))
+        assert compiled == extract_css(selector), "extractors disagree"
+
+    timed("parse + parsel CSS per product", documents, args.repeat,
+          lambda body: len(extract_css(Selector(body=body, type="html"))))
+    timed("parse + compiled single pass", documents, args.repeat,
+          lambda body: len(extract_listing(parse_document(body), BASE_URL)["url"]))
+    timed("parsel CSS per product (parsed)", selectors, args.repeat,
+          lambda selector: len(extract_css(selector)))
+    timed("compiled single pass (parsed)", trees, args.repeat,
+          lambda root: len(extract_listing(root, BASE_URL)["url"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Cold, warm and partially changed runs of an incremental (INCREMENTAL=True) crawl.
+
+Run from the Scrapy project directory:
+
+    python -m benchmarks.bench_incremental --change 0.05
+
+The first run fills the HTTP cache and the item fingerprint store, the second
+re-crawls an unchanged site, and the third re-crawls after the price of a
+fraction of the books has changed on the fixture server. Each run exports
+its items with BatchExportPipeline, which must write them to EXPORT_DELTA_PATH
+and leave EXPORT_PATH (the full catalogue) alone.
+"""
+import argparse
+import os
+import random
+import tempfile
+
+from benchmarks.bench_profiles import measure
+from benchmarks.fixture_server import FixtureServer
+
+
+def rows(path):
+    if not os.path.exists(path):
+        return 0
+    with open(path, encoding="utf-8") as file:
+        return sum(1 for _ in file) - 1
+
+
+def report(label, result, server_stats, delta_path):
+    stats = result["stats"]
+    rate = result["pages"] / result["elapsed"] if result["elapsed"] else 0.0
+    fetched = stats.get("httpcache/firsthand", 0) + stats.get("httpcache/invalidate", 0)
+    print(f"{label:<10} {result['elapsed']:>7.2f}s {rate:>8.1f} pages/s | pages fetched={fetched} "
+          f"revalidated={stats.get('httpcache/revalidate', 0)} (server 304s={server_stats.get(304, 0)}) "
+          f"cached={stats.get('httpcache/hit', 0)} | items new={stats.get('incremental/items_new', 0)} "
+          f"changed={stats.get('incremental/items_changed', 0)} "
+          f"skipped={stats.get('incremental/items_skipped', 0)} | delta rows={rows(delta_path)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profile", default="fast")
+    parser.add_argument("--fanout", choices=["pager", "categories"], default="pager")
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated server latency in seconds")
+    parser.add_argument("--change", type=float, default=0.05, help="fraction of books repriced before run 3")
+    parser.add_argument("--max-bytes", type=int, default=0, help="HTTP cache size cap (0 = settings default)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir, FixtureServer(latency=args.latency) as server:
+        overrides = {
+            "CRAWL_PROFILE": args.profile,
+            "INCREMENTAL": True,
+            "ITEM_PIPELINES": {"books_scraper.pipelines.IncrementalPipeline": 200,
+                               "books_scraper.pipelines.BatchExportPipeline": 300},
+            "EXPORT_PATH": os.path.join(workdir, "books.csv"),
+            "EXPORT_DELTA_PATH": os.path.join(workdir, "books_delta.csv"),
+            "HTTPCACHE_DIR": os.path.join(workdir, "httpcache"),
+            "INCREMENTAL_FINGERPRINTS": os.path.join(workdir, "fingerprints"),
+        }
+        if args.max_bytes:
+            overrides["HTTPCACHE_MAX_BYTES"] = args.max_bytes
+        spider_args = {"fanout": args.fanout}
+
+        for label in ("cold", "warm", "changed"):
+            if label == "changed":
+                books = server.catalogue.books
+                for book in random.Random(0).sample(books, int(len(books) * args.change)):
+                    book["price"] = round(book["price"] * 1.1, 2)
+            server.stats.clear()
+            report(label, measure(server.url, overrides, spider_args), server.stats, overrides["EXPORT_DELTA_PATH"])
+        print("full export untouched:", not os.path.exists(overrides["EXPORT_PATH"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Pages per second of the books spider for each crawl profile.
+
+Run from the Scrapy project directory:
+
+    python -m benchmarks.bench_profiles --latency 0.05
+
+Every crawl goes through the local fixture server (see fixture_server.py), used
+as an HTTP proxy, so the spider still requests http://books.toscrape.com/ but
+never leaves the machine. Each profile runs in its own process because the
+Twisted reactor cannot be restarted.
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+
+from benchmarks.fixture_server import FixtureServer
+
+
+def run_crawl(proxy_url, settings_overrides, spider_args, queue):
+    os.environ["SCRAPY_SETTINGS_MODULE"] = "books_scraper.settings"
+    os.environ["http_proxy"] = proxy_url
+
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.utils.project import get_project_settings
+
+    from books_scraper.spiders.books_spider import BooksSpider
+
+    settings = get_project_settings()
+    settings.setdict({
+        "ITEM_PIPELINES": {},  # keep books.csv untouched
+        "LOG_LEVEL": "WARNING",
+        **settings_overrides,
+    }, priority="cmdline")
+
+    process = CrawlerProcess(settings)
+    crawler = process.create_crawler(BooksSpider)
+    process.crawl(crawler, **spider_args)
+    process.start()
+
+    stats = crawler.stats.get_stats()
+    elapsed = (stats["finish_time"] - stats["start_time"]).total_seconds()
+    queue.put({
+        "pages": stats.get("response_received_count", 0),
+        "items": stats.get("item_scraped_count", 0),
+        "elapsed": elapsed,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "stats": {key: value for key, value in stats.items() if isinstance(value, (int, float))},
+    })
+
+
+def measure(proxy_url, settings_overrides, spider_args=None):
+    """Crawl once in a fresh process and return pages, items and elapsed seconds."""
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    worker = context.Process(target=run_crawl,
+                             args=(proxy_url, settings_overrides, spider_args or {}, queue))
+    worker.start()
+    result = queue.get()
+    worker.join()
+    return result
+
+
+def report(label, result):
+    rate = result["pages"] / result["elapsed"] if result["elapsed"] else 0.0
+    print(f"{label:<24} {result['pages']:>6} pages {result['items']:>7} items "
+          f"{result['elapsed']:>8.2f}s {rate:>9.1f} pages/s {result['peak_rss_mb']:>7.1f} MB peak RSS")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", nargs="+", default=["conservative", "fast"])
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated server latency in seconds")
+    parser.add_argument("--copies", type=int, default=1, help="repeat the fixture catalogue N times")
+    parser.add_argument("--fanout", choices=["pager", "categories"],
+                        help="BooksSpider fan-out mode (default: serial next-page chain)")
+    parser.add_argument("--details", action="store_true", help="also crawl every book detail page")
+    parser.add_argument("--max-pages", type=int, default=0, help="stop each crawl after N pages (0 = all)")
+    args = parser.parse_args()
+
+    with FixtureServer(latency=args.latency, copies=args.copies) as server:
+        print(f"Fixture server at {server.url}, latency {args.latency}s")
+        for profile in args.profiles:
+            overrides = {"CRAWL_PROFILE": profile, "CLOSESPIDER_PAGECOUNT": args.max_pages}
+            spider_args = {"fanout": args.fanout} if args.fanout else {}
+            if args.details:
+                spider_args["details"] = "1"
+            label = f"{profile} ({args.fanout or 'serial'}{', details' if args.details else ''})"
+            report(label, measure(server.url, overrides, spider_args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""Local replay of books.toscrape.com for benchmarks.
+
+The catalogue is rebuilt from the recorded crawl in books_scraper/books.csv and
+rendered with the same markup as the live site (listing pages, pager, category
+sidebar and detail pages). Pages carry ETag/Last-Modified validators and
+conditional requests get a 304. The server speaks plain HTTP and also accepts
+proxy-style absolute URLs, so a spider can be pointed at it by setting
+``http_proxy`` without changing its start URLs.
+"""
+import csv
+import hashlib
+import os
+import re
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+BOOKS_CSV = os.path.join(os.path.dirname(__file__), "..", "books_scraper", "books.csv")
+PAGE_SIZE = 20
+
+CATEGORIES = [
+    "Travel", "Mystery", "Historical Fiction", "Sequential Art", "Classics",
+    "Philosophy", "Romance", "Womens Fiction", "Fiction", "Childrens",
+    "Religion", "Nonfiction", "Music", "Default", "Science Fiction",
+    "Sports and Games", "Add a comment", "Fantasy", "New Adult", "Young Adult",
+    "Science", "Poetry", "Paranormal", "Art", "Psychology",
+]
+RATING_WORDS = {1: "One", 2: "Two", 3: "Three", 4: "Four", 5: "Five"}
+
+
+def slugify(text):
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+
+
+def load_books(path=BOOKS_CSV, copies=1):
+    """Build the fixture catalogue; ``copies`` repeats it to simulate a larger site."""
+    with open(path, newline="", encoding="utf-8") as file:
+        rows = list(csv.DictReader(file))
+
+    books = []
+    for copy in range(copies):
+        for row in rows:
+            book_id = len(books) + 1
+            title = row["title"] if copy == 0 else f"{row['title']} (copy {copy})"
+            digest = hashlib.md5(title.encode("utf-8")).hexdigest()
+            category = CATEGORIES[int(digest[:4], 16) % len(CATEGORIES)]
+            books.append({
+                "id": book_id,
+                "title": title,
+                "slug": f"{slugify(title)}_{book_id}",
+                "price": float(row["price"]),
+                "rating": RATING_WORDS.get(int(row["rating"]), "One"),
+                "availability": row["availability"],
+                "category": category,
+                "upc": digest[:16],
+                "stock": int(digest[4:6], 16) % 22 + 1,
+                "reviews": 0,
+                "description": f"{title} is a fixture book in the {category} category. " * 5,
+            })
+    return books
+
+
+class Catalogue:
+    """Renders the pages of the fixture site, keyed by URL path."""
+
+    def __init__(self, books):
+        self.books = books
+        self.by_slug = {book["slug"]: book for book in books}
+        self.categories = {}
+        for number, name in enumerate(CATEGORIES, start=2):
+            self.categories[f"{slugify(name)}_{number}"] = name
+        self.category_books = {slug: [] for slug in self.categories}
+        names = {name: slug for slug, name in self.categories.items()}
+        for book in books:
+            self.category_books[names[book["category"]]].append(book)
+
+    def render(self, path):
+        path = path.split("?", 1)[0].lstrip("/")
+        if path in ("", "index.html"):
+            return self.listing(self.books, 1, prefix="", catalogue="catalogue/")
+        match = re.fullmatch(r"catalogue/page-(\d+)\.html", path)
+        if match:
+            return self.listing(self.books, int(match.group(1)), prefix="../", catalogue="")
+        match = re.fullmatch(r"catalogue/category/books_1/(index|page-(\d+))\.html", path)
+        if match:
+            return self.listing(self.books, int(match.group(2) or 1),
+                                prefix="../../../", catalogue="../../", title="Books")
+        match = re.fullmatch(r"catalogue/category/books/([^/]+)/(index|page-(\d+))\.html", path)
+        if match and match.group(1) in self.categories:
+            page = int(match.group(3) or 1)
+            return self.listing(self.category_books[match.group(1)], page,
+                                prefix="../../../../", catalogue="../../../",
+                                title=self.categories[match.group(1)])
+        match = re.fullmatch(r"catalogue/([^/]+)/index\.html", path)
+        if match and match.group(1) in self.by_slug:
+            return self.detail(self.by_slug[match.group(1)])
+        return None
+
+    def sidebar(self, prefix):
+        links = "".join(
+            f'<li><a href="{prefix}catalogue/category/books/{slug}/index.html">\n'
+            f"                            {name}\n                        </a></li>"
+            for slug, name in self.categories.items()
+        )
+        return (
+            '<div class="side_categories"><ul class="nav nav-list"><li>'
+            f'<a href="{prefix}catalogue/category/books_1/index.html">Books</a>'
+            f"<ul>{links}</ul></li></ul></div>"
+        )
+
+    def listing(self, books, page, prefix, catalogue, title="All products"):
+        pages = max(1, -(-len(books) // PAGE_SIZE))
+        if page < 1 or page > pages:
+            return None
+        pods = []
+        for book in books[(page - 1) * PAGE_SIZE:page * PAGE_SIZE]:
+            href = f"{catalogue}{book['slug']}/index.html"
+            pods.append(
+                '<li class="col-xs-6 col-sm-4 col-md-3 col-lg-3"><article class="product_pod">'
+                f'<div class="image_container"><a href="{href}"><img src="{prefix}media/cache/x.jpg" '
+                f'alt="{_escape(book["title"])}" class="thumbnail"></a></div>'
+                f'<p class="star-rating {book["rating"]}"><i class="icon-star"></i></p>'
+                f'<h3><a href="{href}" title="{_escape(book["title"])}">{_escape(book["title"][:30])}</a></h3>'
+                '<div class="product_price">'
+                f'<p class="price_color">£{book["price"]:.2f}</p>'
+                '<p class="instock availability">\n    <i class="icon-ok"></i>\n    \n        '
+                f'{book["availability"]}\n    \n</p>'
+                "</div></article></li>"
+            )
+        # only the home page links into catalogue/, every other listing links to its siblings
+        pager_prefix = "catalogue/" if prefix == "" else ""
+        pager = f'<li class="current">\n    \n        Page {page} of {pages}\n    \n</li>'
+        if page > 1:
+            pager = f'<li class="previous"><a href="{pager_prefix}page-{page - 1}.html">previous</a></li>' + pager
+        if page < pages:
+            pager += f'<li class="next"><a href="{pager_prefix}page-{page + 1}.html">next</a></li>'
+        return (
+            f"<!DOCTYPE html><html><head><title>{title} | Books to Scrape - Sandbox</title></head><body>"
+            f"<div class=\"page_inner\">{self.sidebar(prefix)}"
+            f"<div class=\"page-header action\"><h1>{title}</h1></div>"
+            f"<form class=\"form-horizontal\"><strong>{len(books)}</strong> results.</form>"
+            f"<section><ol class=\"row\">{''.join(pods)}</ol>"
+            f"<div><ul class=\"pager\">{pager}</ul></div></section></div></body></html>"
+        )
+
+    def detail(self, book):
+        category_slug = next(slug for slug, name in self.categories.items() if name == book["category"])
+        stock = f"In stock ({book['stock']} available)"
+        rows = [
+            ("UPC", book["upc"]),
+            ("Product Type", "Books"),
+            ("Price (excl. tax)", f"£{book['price']:.2f}"),
+            ("Price (incl. tax)", f"£{book['price']:.2f}"),
+            ("Tax", "£0.00"),
+            ("Availability", stock),
+            ("Number of reviews", str(book["reviews"])),
+        ]
+        table = "".join(f"<tr><th>{name}</th><td>{value}</td></tr>" for name, value in rows)
+        return (
+            f"<!DOCTYPE html><html><head><title>{_escape(book['title'])} | Books to Scrape - Sandbox</title></head><body>"
+            '<ul class="breadcrumb"><li><a href="../../index.html">Home</a></li>'
+            '<li><a href="../category/books_1/index.html">Books</a></li>'
+            f'<li><a href="../category/books/{category_slug}/index.html">{book["category"]}</a></li>'
+            f'<li class="active">{_escape(book["title"])}</li></ul>'
+            '<article class="product_page"><div class="row"><div class="col-sm-6 product_main">'
+            f'<h1>{_escape(book["title"])}</h1><p class="price_color">£{book["price"]:.2f}</p>'
+            f'<p class="instock availability"><i class="icon-ok"></i>\n    \n        {stock}\n    \n</p>'
+            f'<p class="star-rating {book["rating"]}"><i class="icon-star"></i></p></div></div>'
+            '<div id="product_description" class="sub-header"><h2>Product Description</h2></div>'
+            f'<p>{_escape(book["description"])}</p>'
+            '<div class="sub-header"><h2>Product Information</h2></div>'
+            f'<table class="table table-striped">{table}</table></article></body></html>'
+        )
+
+
+def _escape(text):
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+
+
+def make_handler(catalogue, latency, stats):
+    # ETag and Last-Modified per path; Last-Modified moves whenever the page body changes
+    versions = {}
+    lock = threading.Lock()
+
+    def validators(path, body):
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        with lock:
+            if path not in versions or versions[path][0] != etag:
+                versions[path] = (etag, time.time())
+            return versions[path]
+
+    class FixtureHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            if latency:
+                time.sleep(latency)
+            path = urlsplit(self.path).path if "://" in self.path else self.path
+            if path == "/robots.txt":
+                return self.send_body(200, b"User-agent: *\nDisallow:\n", "text/plain")
+            html = catalogue.render(path)
+            if html is None:
+                return self.send_body(404, b"Not found", "text/plain")
+            body = html.encode("utf-8")
+            etag, modified = validators(path, body)
+            if self.not_modified(etag, modified):
+                return self.send_body(304, b"", None, etag, modified)
+            self.send_body(200, body, "text/html; charset=utf-8", etag, modified)
+
+        def not_modified(self, etag, modified):
+            if "If-None-Match" in self.headers:
+                return self.headers["If-None-Match"] == etag
+            since = self.headers.get("If-Modified-Since")
+            return since is not None and parsedate_to_datetime(since).timestamp() >= int(modified)
+
+        def send_body(self, status, body, content_type, etag=None, modified=None):
+            stats[status] = stats.get(status, 0) + 1
+            self.send_response(status)
+            if content_type:
+                self.send_header("Content-Type", content_type)
+            if etag:
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", formatdate(modified, usegmt=True))
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FixtureHandler
+
+
+class FixtureServer:
+    """Run the fixture site on a background thread (``with FixtureServer() as server``)."""
+
+    def __init__(self, latency=0.0, copies=1, host="127.0.0.1", port=0):
+        self.catalogue = Catalogue(load_books(copies=copies))
+        self.stats = {}  # responses sent per status code
+        self.httpd = ThreadingHTTPServer((host, port), make_handler(self.catalogue, latency, self.stats))
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve the books.toscrape.com fixture site")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds of delay per response")
+    parser.add_argument("--copies", type=int, default=1, help="repeat the catalogue N times")
+    args = parser.parse_args()
+
+    with FixtureServer(latency=args.latency, copies=args.copies, port=args.port) as server:
+        print(f"Serving fixture catalogue on {server.url} (Ctrl+C to stop)")
+        try:
+            server.thread.join()
+        except KeyboardInterrupt:
+            pass
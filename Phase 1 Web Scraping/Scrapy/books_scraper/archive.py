@@ -0,0 +1,214 @@
+# Raw response archive and offline re-parse engine
+#
+# During a crawl (scrapy crawl books -s ARCHIVE_ENABLED=True) every HTML
+# response is appended to gzip'd JSON-lines segment files under ARCHIVE_DIR,
+# one record per response (url, status, fetch time, content type, body).
+# Segments roll over every ARCHIVE_SEGMENT_RECORDS records, which is also the
+# unit of work when re-parsing:
+#
+#     python -m books_scraper.archive archive/ --output-dir reparsed --workers 8
+#
+# re-runs the extractors over every segment on a ProcessPoolExecutor and writes
+# one merged file per output table, with no network access. Other sources can
+# archive with ArchiveWriter and pass their own parser as --parser module:function.
+
+import glob
+import gzip
+import importlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.http import TextResponse
+
+DEFAULT_PARSER = "books_scraper.archive:parse_books_record"
+
+
+class ArchiveWriter:
+    """Append records to rolling .jsonl.gz segment files in ``directory``."""
+
+    def __init__(self, directory, prefix, segment_records=1000):
+        self.directory = directory
+        self.prefix = f"{prefix}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        self.segment_records = segment_records
+        self.segment = 0
+        self.records = 0
+        self.file = None
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, url, body, status=200, content_type="text/html"):
+        if self.file is None or self.records >= self.segment_records:
+            self.close()
+            self.segment += 1
+            path = os.path.join(self.directory, f"{self.prefix}-{self.segment:05d}.jsonl.gz")
+            self.file = gzip.open(path, "wt", encoding="utf-8")
+            self.records = 0
+        record = {"url": url, "status": status, "fetched_at": time.time(),
+                  "content_type": content_type, "body": body}
+        self.file.write(json.dumps(record) + "\n")
+        self.records += 1
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class ResponseArchive:
+    # Scrapy extension writing every 200 text response to the archive
+
+    def __init__(self, writer):
+        self.writer = writer
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool("ARCHIVE_ENABLED"):
+            raise NotConfigured
+        writer = ArchiveWriter(os.path.join(settings.get("ARCHIVE_DIR"), crawler.spidercls.name),
+                               crawler.spidercls.name, settings.getint("ARCHIVE_SEGMENT_RECORDS"))
+        extension = cls(writer)
+        crawler.signals.connect(extension.response_received, signal=signals.response_received)
+        crawler.signals.connect(extension.spider_closed, signal=signals.spider_closed)
+        return extension
+
+    def response_received(self, response, request, spider):
+        # pages served from the HTTP cache were archived when first downloaded
+        if response.status != 200 or not isinstance(response, TextResponse) or "cached" in response.flags:
+            return
+        content_type = response.headers.get(b"Content-Type", b"").decode("latin-1")
+        self.writer.write(response.url, response.text, response.status, content_type)
+        spider.crawler.stats.inc_value("archive/records")
+
+    def spider_closed(self, spider):
+        self.writer.close()
+
+
+def iter_records(path):
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        for line in file:
+            yield json.loads(line)
+
+
+def segment_started(path):
+    """Fetch time of the first record of a segment (0 if it is empty)."""
+    for record in iter_records(path):
+        return record.get("fetched_at", 0)
+    return 0
+
+
+def parse_books_record(record):
+    """Re-run the books extractors on one archived page: {table name: columns}."""
+    from lxml import html
+
+    from books_scraper.extraction import extract_detail, extract_listing
+
+    if "text/html" not in record.get("content_type", "text/html"):
+        return {}
+    root = html.document_fromstring(record["body"])
+    listing = extract_listing(root, record["url"])
+    if listing["url"]:
+        return {"listing": listing}
+    if root.xpath("//article[contains(@class, 'product_page')]"):
+        detail = {"url": [record["url"]]}
+        detail.update({field: [value] for field, value in extract_detail(root).items()})
+        return {"detail": detail}
+    return {}
+
+
+def load_parser(spec):
+    module, function = spec.split(":")
+    return getattr(importlib.import_module(module), function)
+
+
+def parse_segment(path, parser_spec):
+    """Worker: parse one segment file and return its merged column batches."""
+    parser = load_parser(parser_spec)
+    tables = {}
+    pages = 0
+    for record in iter_records(path):
+        pages += 1
+        for name, columns in parser(record).items():
+            table = tables.setdefault(name, {field: [] for field in columns})
+            for field, values in columns.items():
+                table.setdefault(field, []).extend(values)
+    return pages, tables
+
+
+def reparse(archive_dir, parser_spec=DEFAULT_PARSER, output_dir=".", export_format="csv", workers=None):
+    """Re-parse every archived segment in parallel and write one merged file per table.
+
+    Rows are deduplicated on their "url" column (the same page may have been
+    archived by several crawls), keeping the most recently fetched one: segments
+    are merged newest first. Returns (pages, {table: rows written}).
+    """
+    import pyarrow as pa
+
+    from books_scraper.pipelines import INT_FIELDS, normalise_batch, open_writer
+
+    # by the time of their first record rather than by name, which only has a one-second timestamp
+    segments = sorted(glob.glob(os.path.join(archive_dir, "**", "*.jsonl.gz"), recursive=True),
+                      key=lambda path: (segment_started(path), path), reverse=True)
+    os.makedirs(output_dir, exist_ok=True)
+    writers, schemas, seen, counts = {}, {}, {}, {}
+    pages = 0
+
+    with ProcessPoolExecutor(workers) as pool:
+        # map keeps segment order, so the merged output is deterministic and a page fetched
+        # again later is written from its newest segment
+        for segment_pages, tables in pool.map(parse_segment, segments, repeat(parser_spec)):
+            pages += segment_pages
+            for name, columns in tables.items():
+                if "url" in columns:
+                    urls = seen.setdefault(name, set())
+                    keep = []
+                    # last row first, so that a page archived twice in one segment keeps its later fetch
+                    for index in range(len(columns["url"]) - 1, -1, -1):
+                        url = columns["url"][index]
+                        if url not in urls:
+                            urls.add(url)
+                            keep.append(index)
+                    if not keep:
+                        # every row was written from a newer segment (a later crawl)
+                        continue
+                    keep.reverse()
+                    columns = {field: [values[i] for i in keep] for field, values in columns.items()}
+                # typed as BatchExportPipeline types them, so that a column that happens to be
+                # all null in the first segment does not give the writer a null-typed schema
+                table = normalise_batch(pa.table({
+                    field: pa.array(values, type=pa.int64() if field in INT_FIELDS else pa.string())
+                    for field, values in columns.items()
+                }))
+                if name not in writers:
+                    schemas[name] = table.schema
+                    path = os.path.join(output_dir, f"{name}.{export_format}")
+                    writers[name] = open_writer(path, export_format, schemas[name])
+                writers[name].write_table(table.select(schemas[name].names))
+                counts[name] = counts.get(name, 0) + table.num_rows
+
+    for writer in writers.values():
+        writer.close()
+    return pages, counts
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Re-parse an archive of raw responses offline")
+    parser.add_argument("archive_dir")
+    parser.add_argument("--parser", default=DEFAULT_PARSER, help="record parser as module:function")
+    parser.add_argument("--output-dir", default="reparsed")
+    parser.add_argument("--format", default="csv", choices=["csv", "parquet", "arrow"])
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    pages, counts = reparse(args.archive_dir, args.parser, args.output_dir, args.format, args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"Re-parsed {pages} pages in {elapsed:.1f}s ({pages / elapsed if elapsed else 0:.0f} pages/s)")
+    for name, rows in counts.items():
+        print(f"  {name}: {rows} rows -> {os.path.join(args.output_dir, name + '.' + args.format)}")
@@ -1,30 +1,44 @@
-import pandas as pd
-
-#load data
-df = pd.read_csv('books.csv')
-
-#display basic info
-print(f"df.describe: \n{df.describe()}\n\n")
-print(f"df info: \n{df.info()}\n\n")
-print(f"df head: \n{df.head()}\n\n")
-
-#remove duplicate row
-df.drop_duplicates(inplace=True)
-
-#convert availability column to binary format
-df['availability'] = df['availability'].map({'In stock': 1, 'Out of stock': 0})
-
-df['price'] = pd.to_numeric(df['price'], errors='coerce')
-
-#check for missing values
-missing_values = df.isnull().sum()
-print("Missing values per column:\n", missing_values)
-
-has_missing_values = df.isnull().values.any()
-print("Has missing values:", has_missing_values)
-
-total_missing = df.isnull().sum().sum()
-print("Total missing values:", total_missing)
-
-#export cleaned data
-df.to_csv('cleaned_data.csv', index=False)
\ No newline at end of file
+import os
+import sys
+
+# schemas.py and profiler.py are modules of the repository root. pipeline.py puts the root on the
+# path for its stages; run as a script, this file puts it there itself.
+if __name__ == '__main__':
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+from profiler import format_report, profile_frame, write_report
+from schemas import BOOKS, read_csv
+
+# version stored in cleaned_data.parquet; bump it when a column or type changes
+SCHEMA_VERSION = 1
+
+def load_books(path='books.csv'):
+    #load data, typed by the books schema: price as float, availability as 1 (In stock) / 0 (Out of stock)
+    return read_csv(path, BOOKS)
+
+def clean_books(df):
+    #remove duplicate row
+    return df.drop_duplicates()
+
+def write_books(df, path='cleaned_data.csv'):
+    """Write the cleaned books as CSV and as a typed Parquet copy next to it."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    #export cleaned data
+    df.to_csv(path, index=False)
+
+    #export a typed columnar copy as well: rating as a category, schema version in the metadata
+    table = pa.Table.from_pandas(df.astype({'rating': 'category'}), preserve_index=False)
+    table = table.replace_schema_metadata({'schema_version': str(SCHEMA_VERSION)})
+    pq.write_table(table, os.path.splitext(path)[0] + '.parquet')
+    return path
+
+if __name__ == '__main__':
+    df = clean_books(load_books())
+
+    #profile the cleaned data in one pass: nulls, min/max, mean/variance, distinct and top values
+    report = profile_frame(df, 'cleaned_data')
+    write_report(report, 'cleaned_data_profile.json')
+    print(format_report(report))
+
+    write_books(df)
@@ -0,0 +1,145 @@
+# Streaming duplicate detection for crawled items (DEDUP_ENABLED = True)
+#
+# Every item is reduced to a 16-byte fingerprint of its normalised DEDUP_FIELDS.
+# A Bloom filter of fixed size answers "definitely new" for almost every new
+# item; only when it answers "maybe seen" is the exact index, a table of
+# fingerprints in an SQLite file, consulted. Memory stays at the size of the
+# filter however many items go through, and a false positive of the filter never
+# drops an item. The filter and the index are kept in the same file, so
+# duplicates of items from earlier runs are dropped too.
+
+import hashlib
+import math
+import os
+import sqlite3
+import sys
+
+# fingerprints inserted into the index per transaction
+INDEX_BATCH_SIZE = 10000
+
+
+def normalise(field, value):
+    """The value of an item field as compared for duplicates."""
+    if field == "price" and isinstance(value, str):
+        # "£51.77" and "51.77" are the same price, as data_Cleaning.py reads them
+        value = "".join(c for c in value if c.isdigit() or c == ".")
+        return float(value) if value else None
+    if isinstance(value, str):
+        return " ".join(value.split())
+    return value
+
+
+def fingerprint(item, fields):
+    """16-byte fingerprint of the normalised ``fields`` of an item."""
+    key = "\x1f".join(repr(normalise(field, item.get(field))) for field in fields)
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+
+
+class BloomFilter:
+    """Bloom filter sized for ``capacity`` items at ``error_rate`` false positives.
+
+    The positions of a fingerprint come from its two 64-bit halves
+    (h1 + i * h2), so one hash of the item serves every hash function.
+    """
+
+    def __init__(self, capacity, error_rate, bits=None, count=0):
+        self.size = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8) if bits is None else bytearray(bits)
+        self.count = count
+
+    def add(self, fingerprint):
+        """Set the fingerprint's bits; returns True if they were all set already (maybe seen)."""
+        h1 = int.from_bytes(fingerprint[:8], "little")
+        h2 = int.from_bytes(fingerprint[8:16], "little") | 1
+        bits = self.bits
+        seen = True
+        for i in range(self.hashes):
+            position = (h1 + i * h2) % self.size
+            mask = 1 << (position & 7)
+            if not bits[position >> 3] & mask:
+                bits[position >> 3] |= mask
+                seen = False
+        if not seen:
+            self.count += 1
+        return seen
+
+    def expected_error_rate(self):
+        """False-positive rate at the current fill of the filter."""
+        filled = int.from_bytes(self.bits, "little").bit_count() / self.size
+        return filled ** self.hashes
+
+
+class FingerprintIndex:
+    """Bloom filter in memory in front of an exact fingerprint table on disk."""
+
+    def __init__(self, path, capacity, error_rate):
+        self.path = path
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.new = 0
+        self.duplicates = 0
+        self.false_positives = 0
+
+    def open(self, reset=False):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS fingerprints (fingerprint BLOB PRIMARY KEY) WITHOUT ROWID")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS bloom (size INTEGER, hashes INTEGER, count INTEGER, "
+                          "bits BLOB)")
+        if reset:
+            self.conn.execute("DELETE FROM fingerprints")
+            self.conn.execute("DELETE FROM bloom")
+        self.bloom = BloomFilter(self.capacity, self.error_rate)
+        saved = self.conn.execute("SELECT size, hashes, count, bits FROM bloom").fetchone()
+        if saved and saved[:2] == (self.bloom.size, self.bloom.hashes):
+            self.bloom = BloomFilter(self.capacity, self.error_rate, saved[3], saved[2])
+        else:
+            # no filter yet, or one of another size: rebuild it from the exact index
+            for (stored,) in self.conn.execute("SELECT fingerprint FROM fingerprints"):
+                self.bloom.add(stored)
+        # saved again by close(); a run that never gets there leaves the filter to be rebuilt
+        self.conn.execute("DELETE FROM bloom")
+        self.conn.commit()
+        # fingerprints added since the last insert into the index
+        self.pending = set()
+
+    def seen(self, fingerprint):
+        """Record a fingerprint; returns True if it was recorded before (in this run or an earlier one)."""
+        if self.bloom.add(fingerprint):
+            if fingerprint in self.pending or self.conn.execute(
+                    "SELECT 1 FROM fingerprints WHERE fingerprint = ?", (fingerprint,)).fetchone():
+                self.duplicates += 1
+                return True
+            self.false_positives += 1
+        self.new += 1
+        self.pending.add(fingerprint)
+        if len(self.pending) >= INDEX_BATCH_SIZE:
+            self.flush()
+        return False
+
+    def flush(self):
+        # sorted, so the inserts walk the index in order
+        self.conn.executemany("INSERT OR IGNORE INTO fingerprints VALUES (?)",
+                              ((stored,) for stored in sorted(self.pending)))
+        self.conn.commit()
+        self.pending.clear()
+
+    def close(self):
+        self.flush()
+        self.conn.execute("DELETE FROM bloom")
+        self.conn.execute("INSERT INTO bloom VALUES (?, ?, ?, ?)",
+                          (self.bloom.size, self.bloom.hashes, self.bloom.count, bytes(self.bloom.bits)))
+        self.conn.commit()
+        self.conn.close()
+
+    def false_positive_rate(self):
+        """Share of the new items that the filter took for maybe seen."""
+        return self.false_positives / self.new if self.new else 0.0
+
+    def memory_bytes(self):
+        """Bytes held in memory: the filter and the fingerprints not yet in the index."""
+        return (len(self.bloom.bits) + sys.getsizeof(self.pending)
+                + len(self.pending) * sys.getsizeof(bytes(16)))
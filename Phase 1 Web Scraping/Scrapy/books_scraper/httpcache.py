@@ -0,0 +1,90 @@
+# HTTP cache storage and policy used by incremental crawls (INCREMENTAL = True)
+#
+# See documentation in:
+# https://docs.scrapy.org/en/latest/topics/downloader-middleware.html#httpcache-middleware-settings
+
+import os
+import shutil
+from pathlib import Path
+
+from scrapy.extensions.httpcache import FilesystemCacheStorage, RFC2616Policy
+
+
+class RevalidatingPolicy(RFC2616Policy):
+    """RFC2616 policy that revalidates every page without an explicit lifetime.
+
+    RFC2616Policy falls back to a heuristic lifetime (10% of the Last-Modified
+    age) when the server sends no Cache-Control/Expires, which would hide
+    changes on a scheduled re-crawl. Pages without explicit freshness are
+    instead always revalidated with If-None-Match / If-Modified-Since.
+    """
+
+    def is_cached_response_fresh(self, cachedresponse, request):
+        cachecontrol = cachedresponse.headers.get(b"Cache-Control", b"")
+        if b"max-age" not in cachecontrol and b"Expires" not in cachedresponse.headers:
+            if b"ETag" in cachedresponse.headers:
+                request.headers[b"If-None-Match"] = cachedresponse.headers[b"ETag"]
+            if b"Last-Modified" in cachedresponse.headers:
+                request.headers[b"If-Modified-Since"] = cachedresponse.headers[b"Last-Modified"]
+            return False
+        return super().is_cached_response_fresh(cachedresponse, request)
+
+
+class BoundedFilesystemCacheStorage(FilesystemCacheStorage):
+    """FilesystemCacheStorage capped at HTTPCACHE_MAX_BYTES.
+
+    Each cache entry is a directory; its mtime is bumped whenever the entry is
+    read, and the least recently used entries are evicted once the cache grows
+    past the cap (down to 90% of it, so eviction does not run on every store).
+    """
+
+    def __init__(self, settings):
+        super().__init__(settings)
+        self.max_bytes = settings.getint("HTTPCACHE_MAX_BYTES")
+        self.entries = {}  # entry directory -> [last used, size in bytes]
+        self.total_bytes = 0
+
+    def open_spider(self, spider):
+        super().open_spider(spider)
+        self.stats = spider.crawler.stats
+        for meta in Path(self.cachedir, spider.name).glob("*/*/pickled_meta"):
+            entry = meta.parent
+            self.entries[str(entry)] = [entry.stat().st_mtime, _entry_size(entry)]
+        self.total_bytes = sum(size for _, size in self.entries.values())
+        self.stats.set_value("httpcache/bytes", self.total_bytes)
+
+    def retrieve_response(self, spider, request):
+        response = super().retrieve_response(spider, request)
+        if response is not None:
+            entry = self._get_request_path(spider, request)
+            os.utime(entry)
+            if entry in self.entries:
+                self.entries[entry][0] = os.stat(entry).st_mtime
+        return response
+
+    def store_response(self, spider, request, response):
+        super().store_response(spider, request, response)
+        entry = self._get_request_path(spider, request)
+        size = _entry_size(Path(entry))
+        _, old_size = self.entries.get(entry, (0, 0))
+        self.entries[entry] = [os.stat(entry).st_mtime, size]
+        self.total_bytes += size - old_size
+        if self.max_bytes and self.total_bytes > self.max_bytes:
+            self.evict(keep=entry)
+        self.stats.set_value("httpcache/bytes", self.total_bytes)
+
+    def evict(self, keep):
+        target = self.max_bytes * 0.9
+        for entry, (_, size) in sorted(self.entries.items(), key=lambda kv: kv[1][0]):
+            if self.total_bytes <= target:
+                break
+            if entry == keep:
+                continue
+            shutil.rmtree(entry, ignore_errors=True)
+            del self.entries[entry]
+            self.total_bytes -= size
+            self.stats.inc_value("httpcache/evicted")
+
+
+def _entry_size(entry):
+    return sum(f.stat().st_size for f in entry.iterdir() if f.is_file())
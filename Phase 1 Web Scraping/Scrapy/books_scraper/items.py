@@ -7,6 +7,16 @@ import scrapy
 
 
 class BooksScraperItem(scrapy.Item):
-    # define the fields for your item here like:
-    # name = scrapy.Field()
-    pass
+    # listing page fields (article.product_pod)
+    url = scrapy.Field()
+    title = scrapy.Field()
+    price = scrapy.Field()
+    rating = scrapy.Field()
+    availability = scrapy.Field()
+
+    # detail page fields, only filled in with -a details=1
+    upc = scrapy.Field()
+    stock = scrapy.Field()
+    description = scrapy.Field()
+    category = scrapy.Field()
+    reviews = scrapy.Field()
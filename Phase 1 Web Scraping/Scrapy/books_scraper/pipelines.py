@@ -1,9 +1,131 @@
 import csv
+import dbm
+import hashlib
+import json
+import os
+import queue
+import threading
+
+from scrapy.exceptions import DropItem, NotConfigured
+from scrapy.utils.project import data_path
+
+from books_scraper.dedup import FingerprintIndex, fingerprint
+
+EXPORT_FORMATS = ("csv", "parquet", "arrow")
+RATING_WORDS = ["One", "Two", "Three", "Four", "Five"]
+# raw item fields that are already integers (detail pages); all others are strings
+INT_FIELDS = ("stock", "reviews")
+DATABASE_BACKENDS = ("sqlite", "mysql")
+# availability as data_Cleaning.py stores it; any other text is stored as NULL
+AVAILABILITY = {"In stock": 1, "Out of stock": 0}
+
+
+class IncrementalPipeline:
+    # Skips items that have not changed since the previous run (INCREMENTAL = True).
+    # Fingerprints are stored in a dbm file keyed by INCREMENTAL_KEY_FIELD.
+
+    def __init__(self, path, key_field, stats):
+        self.path = path
+        self.key_field = key_field
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool("INCREMENTAL"):
+            raise NotConfigured
+        return cls(data_path(settings.get("INCREMENTAL_FINGERPRINTS")), settings.get("INCREMENTAL_KEY_FIELD"),
+                   crawler.stats)
+
+    def open_spider(self, spider):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.db = dbm.open(self.path, "c")
+
+    def process_item(self, item, spider):
+        key = str(item[self.key_field]).encode("utf-8")
+        fingerprint = hashlib.sha1(json.dumps(dict(item), sort_keys=True, default=str).encode("utf-8")).digest()
+
+        previous = self.db.get(key)
+        if previous == fingerprint:
+            self.stats.inc_value("incremental/items_skipped")
+            raise DropItem(f"Unchanged since last run: {key.decode('utf-8')}", log_level="DEBUG")
+
+        self.db[key] = fingerprint
+        self.stats.inc_value("incremental/items_changed" if previous else "incremental/items_new")
+        return item
+
+    def close_spider(self, spider):
+        self.db.close()
+        stats = self.stats
+        spider.logger.info(
+            "Incremental crawl: pages fetched=%d revalidated=%d cached=%d evicted=%d; "
+            "items new=%d changed=%d skipped=%d",
+            stats.get_value("httpcache/firsthand", 0) + stats.get_value("httpcache/invalidate", 0),
+            stats.get_value("httpcache/revalidate", 0),
+            stats.get_value("httpcache/hit", 0),
+            stats.get_value("httpcache/evicted", 0),
+            stats.get_value("incremental/items_new", 0),
+            stats.get_value("incremental/items_changed", 0),
+            stats.get_value("incremental/items_skipped", 0),
+        )
+
+
+class DedupPipeline:
+    # Drops items whose normalised DEDUP_FIELDS match an item seen before in this run, or
+    # in an earlier one with DEDUP_PERSIST (DEDUP_ENABLED = True), before any export
+    # pipeline writes them.
+    # Memory is bounded by a Bloom filter sized for DEDUP_CAPACITY items at
+    # DEDUP_ERROR_RATE false positives; the exact fingerprints are kept on disk in
+    # DEDUP_FINGERPRINTS, see books_scraper/dedup.py.
+
+    def __init__(self, path, fields, capacity, error_rate, persist, stats):
+        self.fields = fields
+        self.persist = persist
+        self.stats = stats
+        self.index = FingerprintIndex(path, capacity, error_rate)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool("DEDUP_ENABLED"):
+            raise NotConfigured
+        return cls(data_path(settings.get("DEDUP_FINGERPRINTS")), settings.getlist("DEDUP_FIELDS"),
+                   settings.getint("DEDUP_CAPACITY"), settings.getfloat("DEDUP_ERROR_RATE"),
+                   settings.getbool("DEDUP_PERSIST"), crawler.stats)
+
+    def open_spider(self, spider):
+        self.index.open(reset=not self.persist)
+
+    def process_item(self, item, spider):
+        if self.index.seen(fingerprint(item, self.fields)):
+            self.stats.inc_value("dedup/items_dropped")
+            raise DropItem(f"Duplicate of an earlier item: {item.get('title')}", log_level="DEBUG")
+        return item
+
+    def close_spider(self, spider):
+        index = self.index
+        memory_bytes = index.memory_bytes()
+        index.close()
+        stats = self.stats
+        stats.set_value("dedup/items_new", index.new)
+        stats.set_value("dedup/false_positives", index.false_positives)
+        stats.set_value("dedup/false_positive_rate", index.false_positive_rate())
+        stats.set_value("dedup/expected_false_positive_rate", index.bloom.expected_error_rate())
+        stats.set_value("dedup/memory_bytes", memory_bytes)
+        spider.logger.info(
+            "Dedup: items new=%d dropped=%d; filter %d bits, %d hashes, %.1f MB; "
+            "false positives=%d (%.4f%% of new items, %.4f%% expected at this fill)",
+            index.new, index.duplicates, index.bloom.size, index.bloom.hashes, memory_bytes / 1024 / 1024,
+            index.false_positives, 100 * index.false_positive_rate(), 100 * index.bloom.expected_error_rate(),
+        )
+
 
 class CSVPipeline:
     def open_spider(self, spider):
         self.file = open("books.csv", "w", newline="", encoding="utf-8")
-        self.writer = csv.DictWriter(self.file, fieldnames=["title", "price", "availability", "rating"])
+        # extra item fields (e.g. url) are not part of the export
+        self.writer = csv.DictWriter(self.file, fieldnames=["title", "price", "availability", "rating"],
+                                     extrasaction="ignore")
         self.writer.writeheader()
 
     def process_item(self, item, spider):
@@ -23,3 +145,275 @@ class CSVPipeline:
 
     def close_spider(self, spider):
         self.file.close()
+
+
+class DatabasePipeline:
+    # Writes the books straight into a database table (DATABASE_ENABLED = True), cleaned
+    # the way data_Cleaning.py cleans books.csv: price as a float, rating as 1-5 (0 if
+    # unknown), availability as 1 (In stock) / 0 (Out of stock). Rows are keyed by url,
+    # so a book seen twice is stored once and a re-crawl updates it in place.
+    # Items are buffered and handed to a writer thread DATABASE_BATCH_SIZE at a time;
+    # the thread owns the connection and upserts each batch in one transaction, so the
+    # reactor never waits on the database. If the writer fails, the crawl is closed
+    # with reason "database_error".
+
+    def __init__(self, backend, path, mysql_config, table, batch_size, stats, crawler=None):
+        if backend not in DATABASE_BACKENDS:
+            raise ValueError(f"Unknown DATABASE_BACKEND {backend!r}, expected one of {DATABASE_BACKENDS}")
+        self.backend = backend
+        self.path = path
+        self.mysql_config = mysql_config
+        self.table = table
+        self.batch_size = batch_size
+        self.stats = stats
+        self.crawler = crawler
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool("DATABASE_ENABLED"):
+            raise NotConfigured
+        return cls(settings.get("DATABASE_BACKEND"), settings.get("DATABASE_PATH"),
+                   settings.getdict("DATABASE_MYSQL"), settings.get("DATABASE_TABLE"),
+                   settings.getint("DATABASE_BATCH_SIZE"), crawler.stats, crawler)
+
+    def open_spider(self, spider):
+        self.spider = spider
+        self.rows = {}
+        # unbounded, so handing over a batch never blocks the reactor
+        self.batches = queue.Queue()
+        self.written = 0
+        self.error = None
+        self.stopping = False
+        self.writer = threading.Thread(target=self.write_batches, name="database-writer", daemon=True)
+        self.writer.start()
+
+    def process_item(self, item, spider):
+        if self.error is not None:
+            # the writer has stopped and the crawl is closing; the other pipelines still get the item
+            return item
+        row = clean_book(item)
+        # a book repeated within the batch keeps its last values
+        self.rows[row[0]] = row
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+        return item
+
+    def flush(self):
+        if self.rows:
+            self.batches.put(list(self.rows.values()))
+            if self.stats is not None:
+                self.stats.inc_value("database/batches")
+            self.rows = {}
+
+    async def close_spider(self, spider):
+        from scrapy.utils.defer import maybe_deferred_to_future
+        from twisted.internet.threads import deferToThread
+
+        self.stop()
+        # the last batches are written while the reactor keeps running
+        await maybe_deferred_to_future(deferToThread(self.wait, spider))
+
+    def stop(self):
+        """Hand over the buffered rows and tell the writer to finish."""
+        self.flush()
+        self.batches.put(None)
+        self.stopping = True
+
+    def wait(self, spider=None):
+        """Block until the writer has committed every batch; re-raise its error if it failed.
+
+        In a crawl the error was already logged and the spider closed (see fail()).
+        """
+        self.writer.join()
+        if self.error is not None and self.crawler is None:
+            raise self.error
+        if self.stats is not None:
+            self.stats.set_value("database/rows_written", self.written)
+        if spider is not None:
+            spider.logger.info("Database sink: %d rows written to %s table %s", self.written,
+                               self.path if self.backend == "sqlite" else self.mysql_config.get("database"),
+                               self.table)
+
+    def write_batches(self):
+        # runs in the writer thread: open the connection, then upsert batches until stop()
+        try:
+            conn = self.connect()
+            try:
+                cursor = conn.cursor()
+                cursor.execute(BOOK_TABLES[self.backend].format(table=self.table))
+                upsert = BOOK_UPSERTS[self.backend].format(table=self.table)
+                while True:
+                    batch = self.batches.get()
+                    if batch is None:
+                        break
+                    cursor.executemany(upsert, batch)
+                    conn.commit()
+                    self.written += len(batch)
+            finally:
+                conn.close()
+        except Exception as error:
+            self.error = error
+            if self.crawler is not None:
+                from twisted.internet import reactor
+                reactor.callFromThread(self.fail)
+
+    def fail(self):
+        # in the reactor thread, once: log the writer's error and close the crawl, unless it is closing
+        from scrapy.utils.defer import deferred_from_coro
+
+        self.spider.logger.error("Database sink failed after %d rows: %r", self.written, self.error)
+        if self.stats is not None:
+            self.stats.set_value("database/error", repr(self.error))
+        if not self.stopping:
+            deferred_from_coro(self.crawler.engine.close_spider_async(reason="database_error"))
+
+    def connect(self):
+        if self.backend == "mysql":
+            import mysql.connector
+            return mysql.connector.connect(**self.mysql_config)
+        import sqlite3
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        # readers of the database are not blocked while a batch is written
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        return conn
+
+
+BOOK_COLUMNS = ["url", "title", "price", "availability", "rating"]
+
+BOOK_TABLES = {
+    "sqlite": """
+        CREATE TABLE IF NOT EXISTS {table} (
+            url TEXT PRIMARY KEY,
+            title TEXT,
+            price REAL,
+            availability INTEGER,
+            rating INTEGER
+        )
+    """,
+    "mysql": """
+        CREATE TABLE IF NOT EXISTS {table} (
+            url VARCHAR(255) PRIMARY KEY,
+            title TEXT,
+            price DECIMAL(10,2),
+            availability TINYINT,
+            rating TINYINT
+        )
+    """,
+}
+
+BOOK_UPSERTS = {
+    "sqlite": f"""
+        INSERT INTO {{table}} ({', '.join(BOOK_COLUMNS)}) VALUES ({', '.join('?' * len(BOOK_COLUMNS))})
+        ON CONFLICT(url) DO UPDATE SET {', '.join(f'{column} = excluded.{column}' for column in BOOK_COLUMNS[1:])}
+    """,
+    "mysql": f"""
+        INSERT INTO {{table}} ({', '.join(BOOK_COLUMNS)}) VALUES ({', '.join(['%s'] * len(BOOK_COLUMNS))})
+        ON DUPLICATE KEY UPDATE {', '.join(f'{column} = VALUES({column})' for column in BOOK_COLUMNS[1:])}
+    """,
+}
+
+
+def clean_book(item):
+    """One raw item as a BOOK_COLUMNS row, with the values data_Cleaning.py gives it."""
+    price = "".join(c for c in item.get("price") or "" if c.isdigit() or c == ".")
+    rating = item.get("rating")
+    return (
+        item.get("url"),
+        item.get("title"),
+        float(price) if price else None,
+        AVAILABILITY.get(item.get("availability")),
+        RATING_WORDS.index(rating) + 1 if rating in RATING_WORDS else 0,
+    )
+
+
+class BatchExportPipeline:
+    # Collects items into column buffers and writes EXPORT_BATCH_SIZE rows at a time
+    # to CSV, Parquet or Arrow IPC. Price and rating are normalised once per batch
+    # with pyarrow.compute instead of per item.
+
+    def __init__(self, path, export_format, batch_size, fields):
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown EXPORT_FORMAT {export_format!r}, expected one of {EXPORT_FORMATS}")
+        if not fields:
+            raise ValueError("EXPORT_FIELDS is empty, list the item fields to export")
+        self.path = path
+        self.export_format = export_format
+        self.batch_size = batch_size
+        self.fields = fields
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        return cls(export_path(settings), settings.get("EXPORT_FORMAT"),
+                   settings.getint("EXPORT_BATCH_SIZE"), settings.getlist("EXPORT_FIELDS"))
+
+    def open_spider(self, spider):
+        self.columns = {field: [] for field in self.fields}
+        self.writer = None
+
+    def process_item(self, item, spider):
+        for field, column in self.columns.items():
+            column.append(item.get(field))
+        if len(self.columns[self.fields[0]]) >= self.batch_size:
+            self.flush()
+        return item
+
+    def flush(self, last=False):
+        import pyarrow as pa
+
+        # the last flush of a run without items still writes the file, so no earlier export is left behind
+        if not self.columns[self.fields[0]] and not (last and self.writer is None):
+            return
+        table = normalise_batch(pa.table({
+            field: pa.array(column, type=pa.int64() if field in INT_FIELDS else pa.string())
+            for field, column in self.columns.items()
+        }))
+        if self.writer is None:
+            self.writer = open_writer(self.path, self.export_format, table.schema)
+        self.writer.write_table(table)
+        for column in self.columns.values():
+            column.clear()
+
+    def close_spider(self, spider):
+        self.flush(last=True)
+        self.writer.close()
+
+
+def export_path(settings):
+    """EXPORT_PATH for a crawl of the whole catalogue, EXPORT_DELTA_PATH for a run that only exports changes."""
+    # an incremental run drops the unchanged items, and a persistent dedup index the items
+    # of earlier runs, so their export must not replace the full one
+    if settings.getbool("INCREMENTAL") or (settings.getbool("DEDUP_ENABLED") and settings.getbool("DEDUP_PERSIST")):
+        return settings.get("EXPORT_DELTA_PATH")
+    return settings.get("EXPORT_PATH")
+
+
+def normalise_batch(table):
+    """Turn raw price ("£51.77") into float and rating ("Three") into 1-5, 0 if unknown."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if "price" in table.column_names:
+        price = pc.replace_substring_regex(table["price"], pattern=r"[^0-9.]", replacement="")
+        price = pc.cast(pc.if_else(pc.equal(price, ""), None, price), pa.float64())
+        table = table.set_column(table.column_names.index("price"), "price", price)
+    if "rating" in table.column_names:
+        rating = pc.index_in(table["rating"], value_set=pa.array(RATING_WORDS))
+        rating = pc.cast(pc.fill_null(pc.add(rating, 1), 0), pa.int64())
+        table = table.set_column(table.column_names.index("rating"), "rating", rating)
+    return table
+
+
+def open_writer(path, export_format, schema):
+    import pyarrow as pa
+
+    if export_format == "parquet":
+        import pyarrow.parquet as pq
+        return pq.ParquetWriter(path, schema)
+    if export_format == "arrow":
+        return pa.ipc.new_file(path, schema)
+    import pyarrow.csv as pacsv
+    return pacsv.CSVWriter(path, schema)
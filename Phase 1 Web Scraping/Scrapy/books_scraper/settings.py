@@ -93,8 +93,105 @@ TWISTED_REACTOR = "twisted.internet.asyncioreactor.AsyncioSelectorReactor"
 FEED_EXPORT_ENCODING = "utf-8"
 
 ITEM_PIPELINES = {
-    'books_scraper.pipelines.CSVPipeline': 300,
+    'books_scraper.pipelines.IncrementalPipeline': 200,
+    'books_scraper.pipelines.DedupPipeline': 250,
+    'books_scraper.pipelines.BatchExportPipeline': 300,
+    'books_scraper.pipelines.DatabasePipeline': 400,
 }
 
+# Batched export (BatchExportPipeline): "csv", "parquet" or "arrow" (Arrow IPC file)
+EXPORT_FORMAT = "csv"
+# EXPORT_PATH is the full catalogue, rewritten by every full crawl. Runs that only see
+# part of it (INCREMENTAL, or DEDUP_PERSIST) write their new and changed items to EXPORT_DELTA_PATH
+# instead, rewritten each such run, so books.csv is never replaced by a delta.
+EXPORT_PATH = "books.csv"
+EXPORT_DELTA_PATH = "books_delta.csv"
+EXPORT_BATCH_SIZE = 10000
+EXPORT_FIELDS = ["title", "price", "availability", "rating"]
+
+# Cleaned books written straight into a database (DatabasePipeline), enabled with
+# `scrapy crawl books -s DATABASE_ENABLED=True`. This replaces the books.csv ->
+# data_Cleaning.py -> database round trip; add
+# -s ITEM_PIPELINES='{"books_scraper.pipelines.DatabasePipeline": 400}' to skip the CSV too.
+# DATABASE_BACKEND is "sqlite" (DATABASE_PATH) or "mysql" (DATABASE_MYSQL, needs mysql-connector-python).
+DATABASE_ENABLED = False
+DATABASE_BACKEND = "sqlite"
+DATABASE_PATH = "books.db"
+DATABASE_MYSQL = {"host": "localhost", "user": "root", "password": "", "database": "books_db"}
+DATABASE_TABLE = "books"
+DATABASE_BATCH_SIZE = 1000
+
 # Set download delay
-DOWNLOAD_DELAY = 1
\ No newline at end of file
+DOWNLOAD_DELAY = 1
+
+# Crawl profiles. The settings above are the "conservative" profile; pick another
+# one with `scrapy crawl books -s CRAWL_PROFILE=fast`. BooksSpider.update_settings
+# applies the selected profile on top of this file, and individual -s options
+# still win over the profile.
+CRAWL_PROFILE = "conservative"
+CRAWL_PROFILES = {
+    "conservative": {},
+    "fast": {
+        # no fixed delay, AutoThrottle sets it from the observed latency instead
+        "DOWNLOAD_DELAY": 0,
+        "CONCURRENT_REQUESTS": 32,
+        "CONCURRENT_REQUESTS_PER_DOMAIN": 16,
+        "AUTOTHROTTLE_ENABLED": True,
+        # AutoThrottle never lowers the delay on non-200 responses, so a high start
+        # delay would also pace every 304 of an incremental re-crawl
+        "AUTOTHROTTLE_START_DELAY": 0.05,
+        "AUTOTHROTTLE_MAX_DELAY": 10,
+        # delay = latency / target concurrency, so slower responses mean longer delays
+        "AUTOTHROTTLE_TARGET_CONCURRENCY": 8.0,
+    },
+}
+
+# Incremental re-crawl, enabled with `scrapy crawl books -s INCREMENTAL=True`.
+# Pages are kept in a size-capped on-disk HTTP cache and revalidated with
+# ETag/Last-Modified; items whose fingerprint has not changed since the last
+# run are dropped, and the rest are exported to EXPORT_DELTA_PATH rather than
+# EXPORT_PATH. Both stores live in the project's .scrapy data directory unless
+# given absolute paths.
+INCREMENTAL = False
+INCREMENTAL_FINGERPRINTS = "incremental/fingerprints"
+INCREMENTAL_KEY_FIELD = "url"
+INCREMENTAL_SETTINGS = {
+    "HTTPCACHE_ENABLED": True,
+    "HTTPCACHE_DIR": "httpcache",
+    "HTTPCACHE_POLICY": "books_scraper.httpcache.RevalidatingPolicy",
+    "HTTPCACHE_STORAGE": "books_scraper.httpcache.BoundedFilesystemCacheStorage",
+    "HTTPCACHE_MAX_BYTES": 500 * 1024 * 1024,
+    "HTTPCACHE_GZIP": True,
+}
+
+# Streaming deduplication, enabled with `scrapy crawl books -s DEDUP_ENABLED=True`.
+# Items whose DEDUP_FIELDS (whitespace collapsed, price as a number) match an earlier
+# item are dropped before they are exported, like data_Cleaning.py's drop_duplicates
+# but without holding the crawl in memory. A Bloom filter of DEDUP_CAPACITY items at
+# DEDUP_ERROR_RATE false positives (about 12 MB here) sits in front of an exact
+# fingerprint index on disk, so a false positive costs one index lookup and never
+# drops an item. Both live in the .scrapy data directory and are emptied at the start
+# of each run, so every crawl still exports the whole catalogue. With
+# -s DEDUP_PERSIST=True they are kept across runs instead: items seen by an earlier
+# run are dropped too, the export goes to EXPORT_DELTA_PATH and DatabasePipeline
+# only receives the new items.
+DEDUP_ENABLED = False
+DEDUP_FINGERPRINTS = "dedup/fingerprints.db"
+DEDUP_FIELDS = ["title", "price", "availability", "rating"]
+DEDUP_CAPACITY = 10_000_000
+DEDUP_ERROR_RATE = 0.01
+DEDUP_PERSIST = False
+
+# Detail-page crawl (scrapy crawl books -a details=1). Detail requests go through
+# their own download slot, so at most DETAIL_CONCURRENCY of them are in flight
+# whatever the listing pages are doing.
+DETAIL_CONCURRENCY = 8
+
+# Raw response archive for offline re-parsing (scrapy crawl books -s ARCHIVE_ENABLED=True),
+# see books_scraper/archive.py
+ARCHIVE_ENABLED = False
+ARCHIVE_DIR = "archive"
+ARCHIVE_SEGMENT_RECORDS = 1000
+EXTENSIONS = {
+    "books_scraper.archive.ResponseArchive": 500,
+}
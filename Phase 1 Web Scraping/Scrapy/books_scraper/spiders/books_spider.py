@@ -1,26 +1,103 @@
+import re
+import resource
+import time
+
 import scrapy
-# from books_scraper.items import BookItem  
+from books_scraper.extraction import extract_detail, extract_listing, iter_rows
+from books_scraper.items import BooksScraperItem
+
+FANOUT_MODES = ("pager", "categories")
+DETAIL_SLOT = "books-detail"
+
 
 class BooksSpider(scrapy.Spider):
     name = "books"
     allowed_domains = ["books.toscrape.com"]
     start_urls = ["http://books.toscrape.com/"]
 
+    def __init__(self, fanout=None, details=False, *args, **kwargs):
+        # fanout=pager      read "Page 1 of N" and schedule every listing page at once
+        # fanout=categories walk the category sidebar and fan out each category's pages
+        # (default)         follow the "next" link one page at a time
+        # details=1         also fetch each book's detail page (UPC, stock, description...)
+        super().__init__(*args, **kwargs)
+        if fanout is not None and fanout not in FANOUT_MODES:
+            raise ValueError(f"Unknown fanout mode {fanout!r}, expected one of {FANOUT_MODES}")
+        self.fanout = fanout
+        self.details = str(details).lower() in ("1", "true", "yes")
+        # book detail URLs already yielded, so overlapping listings never repeat an item
+        self.seen_books = set()
+
+    @classmethod
+    def update_settings(cls, settings):
+        super().update_settings(settings)
+        # apply the CRAWL_PROFILE chosen in settings.py or with -s CRAWL_PROFILE=...
+        profile = settings.get("CRAWL_PROFILE", "conservative")
+        profiles = settings.getdict("CRAWL_PROFILES")
+        if profile not in profiles:
+            raise ValueError(f"Unknown CRAWL_PROFILE {profile!r}, expected one of {sorted(profiles)}")
+        settings.setdict(profiles[profile], priority="spider")
+        slots = settings.getdict("DOWNLOAD_SLOTS")
+        slots.setdefault(DETAIL_SLOT, {"concurrency": settings.getint("DETAIL_CONCURRENCY")})
+        settings.set("DOWNLOAD_SLOTS", slots, priority="spider")
+        if settings.getbool("INCREMENTAL"):
+            settings.setdict(settings.getdict("INCREMENTAL_SETTINGS"), priority="spider")
+
     def parse(self, response):
-        for book in response.css("article.product_pod"):
-            title = book.css("h3 a::attr(title)").get()
-            price = book.css("p.price_color::text").get()
-            rating = book.css("p.star-rating::attr(class)").get().replace('star-rating', '').strip()
-            availability = book.css("p.availability::text").getall()
-            availability = ''.join([text.strip() for text in availability]).strip()
-
-            yield {
-                "title": title,
-                "price": price,
-                "rating": rating,
-                "availability": availability,
-            }
+        if self.fanout == "categories" and not response.meta.get("category"):
+            for href in response.css("div.side_categories ul ul a::attr(href)").getall():
+                yield response.follow(href, self.parse, meta={"category": True}, priority=1)
+        elif self.fanout is not None:
+            yield from self.fan_out_pages(response)
+        else:
+            # schedule the next page before extracting items so the download starts right away
+            next_page = response.css("li.next a::attr(href)").get()
+            if next_page:
+                yield response.follow(next_page, self.parse, priority=1)
+
+        # one compiled pass over the page's products, see books_scraper/extraction.py
+        for row in iter_rows(extract_listing(response.selector.root, response.url)):
+            if row["url"] in self.seen_books:
+                continue
+            self.seen_books.add(row["url"])
+
+            item = BooksScraperItem(**row)
+            if self.details:
+                # only the listing fields travel with the request; the item is
+                # completed and yielded as soon as its detail page arrives.
+                # A higher priority than listing pages drains details first and
+                # keeps the scheduler queue short.
+                yield response.follow(row["url"], self.parse_detail, cb_kwargs={"item": item},
+                                      meta={"download_slot": DETAIL_SLOT}, priority=2)
+            else:
+                yield item
+
+    def parse_detail(self, response, item):
+        item.update(extract_detail(response.selector.root))
+        yield item
+
+    def closed(self, reason):
+        if not self.details:
+            return
+        stats = self.crawler.stats
+        elapsed = time.time() - stats.get_value("start_time").timestamp()
+        requests = stats.get_value("downloader/request_count", 0)
+        self.logger.info(
+            "Detail crawl: %d requests in %.1fs (%.1f requests/s), memory high-water mark %.1f MB",
+            requests, elapsed, requests / elapsed if elapsed else 0.0,
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        )
 
+    def fan_out_pages(self, response):
+        """Schedule pages 2..N of a listing from its "Page 1 of N" pager in one go."""
+        if response.meta.get("paged"):
+            return
         next_page = response.css("li.next a::attr(href)").get()
-        if next_page:
-            yield response.follow(next_page, self.parse)
+        pager = re.search(r"Page\s+(\d+)\s+of\s+(\d+)", " ".join(response.css("li.current::text").getall()))
+        if not next_page or not pager:
+            return
+        current, total = int(pager.group(1)), int(pager.group(2))
+        for page in range(current + 1, total + 1):
+            href = re.sub(r"page-\d+\.html$", f"page-{page}.html", next_page)
+            meta = {"category": response.meta.get("category"), "paged": True}
+            yield response.follow(href, self.parse, meta=meta, priority=1)
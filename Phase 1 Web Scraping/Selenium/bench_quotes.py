@@ -0,0 +1,116 @@
+"""Throughput of quotes_scraper.py against a local quotes.toscrape.com fixture.
+
+    python bench_quotes.py --pages 50 --latency 0.05
+
+The fixture serves /page/N/ with static quote blocks and /js/page/N/ with the
+quotes injected by a script, like the real site. The HTTP path is timed with
+one worker (the notebook's serial page-by-page order) and with a thread pool;
+the browser fallback is timed on the /js/ pages when Chrome is available.
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from quotes_scraper import QuotesScraper
+
+QUOTES_PER_PAGE = 10
+
+
+def quote_data(page):
+    return [
+        {'text': f'“Fixture quote {page}.{n}: a thought worth keeping.”',
+         'author': f'Author {(page * QUOTES_PER_PAGE + n) % 50}',
+         'tags': [f'tag{n}', f'page{page}']}
+        for n in range(QUOTES_PER_PAGE)
+    ]
+
+
+def render_page(page, pages, javascript):
+    pager = f'<li class="next"><a href="../{page + 1}/">Next <span>&rarr;</span></a></li>' if page < pages else ''
+    if page > pages:
+        body = 'No quotes found!'
+    elif javascript:
+        body = ('<script>var data = ' + json.dumps(quote_data(page)) + ';\n'
+                'for (var i in data) { var q = data[i]; document.write('
+                '\'<div class="quote"><span class="text">\' + q.text + \'</span>'
+                '<span>by <small class="author">\' + q.author + \'</small></span>'
+                '<div class="tags">Tags: \' + q.tags.map(function (t) {'
+                ' return \'<a class="tag" href="#">\' + t + \'</a>\'; }).join(" ") + \'</div></div>\'); }'
+                '</script>')
+    else:
+        body = ''.join(
+            f'<div class="quote"><span class="text">{q["text"]}</span>'
+            f'<span>by <small class="author">{q["author"]}</small> <a href="#">(about)</a></span>'
+            f'<div class="tags">Tags: ' + ' '.join(f'<a class="tag" href="#">{t}</a>' for t in q['tags']) +
+            '</div></div>'
+            for q in quote_data(page)
+        )
+    return (f'<!DOCTYPE html><html><head><meta charset="UTF-8"><title>Quotes to Scrape</title></head>'
+            f'<body><div class="container">{body}<nav><ul class="pager">{pager}</ul></nav></div></body></html>')
+
+
+def serve(pages, latency):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            time.sleep(latency)
+            match = re.fullmatch(r'(/js)?/page/(\d+)/', self.path)
+            status = 200 if match else 404
+            body = render_page(int(match.group(2)), pages, bool(match.group(1))) if match else 'Not found'
+            data = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run(label, base_url, path, workers, use_browser=True):
+    scraper = QuotesScraper(base_url, workers, use_browser)
+    start = time.perf_counter()
+    try:
+        rows = scraper.scrape(path)
+    except Exception as e:
+        print(f'{label:<28} skipped ({type(e).__name__}: {e})'.splitlines()[0])
+        return
+    finally:
+        scraper.close()
+    elapsed = time.perf_counter() - start
+    pages = len(rows) / QUOTES_PER_PAGE
+    print(f'{label:<28} {len(rows):>6} quotes {elapsed:>7.2f}s {pages / elapsed:>8.1f} pages/s '
+          f'({scraper.rendered_pages} rendered)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.05, help='simulated server latency in seconds')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--no-browser', action='store_true', help='skip the browser fallback run')
+    args = parser.parse_args()
+
+    server = serve(args.pages, args.latency)
+    base_url = f'http://127.0.0.1:{server.server_address[1]}'
+    try:
+        run('http, 1 worker', base_url, '/page/{}/', 1)
+        run(f'http, {args.workers} workers', base_url, '/page/{}/', args.workers)
+        if not args.no_browser:
+            run('browser fallback (/js/)', base_url, '/js/page/{}/', args.workers)
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Check and time the vectorised converters against the per-cell .apply versions.
+
+    python bench_clean.py --rows 10000000
+
+First checks that crore_to_billion_usd_series / clean_percentage_series give
+exactly the same values as Series.apply(crore_to_billion_usd / clean_percentage)
+on tricky inputs (Unicode minus, thousands separators, percent signs, blanks,
+garbage, NaN, plain numbers, values on a rounding boundary), then times both on
+a synthetic column of the requested size.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from converters import (clean_percentage, clean_percentage_series, crore_to_billion_usd,
+                        crore_to_billion_usd_series)
+
+EDGE_CASES = ['1,234', '1.', '.5', ' 7% ', 'inf', '-NaN', '1e-3%', '−5,678', '-42', '  12 ', '', 'n/a', '41.5', '12.5%', '%7%', '3,32,475',
+              np.nan, None, 0, 975.0, -3.25, 'abc%', '1e3']
+
+
+def synthetic_crore(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    amounts = rng.integers(-50_000, 9_00_000, rows) + rng.integers(0, 100, rows) / 100
+    text = pd.Series(amounts).map('{:,.2f}'.format)
+    text = text.str.replace('-', '−', regex=False)  # the Wikipedia tables use U+2212
+    text[rng.random(rows) < 0.01] = np.nan
+    return text.astype(object)
+
+
+def synthetic_percentage(rows, seed=1):
+    rng = np.random.default_rng(seed)
+    text = pd.Series(np.round(rng.normal(10, 20, rows), 1)).astype(str) + '%'
+    text[rng.random(rows) < 0.01] = 'n/a'
+    return text.astype(object)
+
+
+def assert_same(expected, actual, label):
+    pd.testing.assert_series_equal(expected.astype(float), actual.astype(float),
+                                   check_names=False, check_exact=True)
+    print(f'{label}: identical')
+
+
+def timed(label, function, series):
+    start = time.perf_counter()
+    function(series)
+    elapsed = time.perf_counter() - start
+    print(f'{label:<36} {elapsed:>8.2f}s {len(series) / elapsed:>14,.0f} rows/s')
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--usd-inr', type=float, default=83)
+    args = parser.parse_args()
+
+    # mixed numbers and strings take the pandas path, all-string columns the pyarrow one
+    for label, cases in (('mixed', EDGE_CASES), ('text', [case for case in EDGE_CASES if not isinstance(case, (int, float))])):
+        edge = pd.Series(cases, dtype=object)
+        assert_same(edge.apply(crore_to_billion_usd, usd_inr=args.usd_inr),
+                    crore_to_billion_usd_series(edge, args.usd_inr), f'crore {label} edge cases')
+        assert_same(edge.apply(clean_percentage), clean_percentage_series(edge), f'percentage {label} edge cases')
+    sample = synthetic_crore(200_000, seed=2)
+    assert_same(sample.apply(crore_to_billion_usd, usd_inr=args.usd_inr),
+                crore_to_billion_usd_series(sample, args.usd_inr), 'crore 200k random')
+    sample = synthetic_percentage(200_000, seed=3)
+    assert_same(sample.apply(clean_percentage), clean_percentage_series(sample), 'percentage 200k random')
+
+    print(f'\n{args.rows:,} rows')
+    crore = synthetic_crore(args.rows)
+    slow = timed('apply(crore_to_billion_usd)', lambda s: s.apply(crore_to_billion_usd), crore)
+    fast = timed('crore_to_billion_usd_series', crore_to_billion_usd_series, crore)
+    print(f'{"speedup":<36} {slow / fast:>8.1f}x')
+    percentage = synthetic_percentage(args.rows)
+    slow = timed('apply(clean_percentage)', lambda s: s.apply(clean_percentage), percentage)
+    fast = timed('clean_percentage_series', clean_percentage_series, percentage)
+    print(f'{"speedup":<36} {slow / fast:>8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
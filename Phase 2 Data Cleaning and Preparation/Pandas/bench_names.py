@@ -0,0 +1,111 @@
+"""Speed and accuracy of company_names.NameIndex on synthetic name variants.
+
+    python bench_names.py --names 1000000
+
+Companies are made-up two- and three-word names. Each one then appears under
+several spellings: legal suffixes, case, '&' vs 'and', punctuation, a typo
+or a dropped letter. The report gives the resolution time, how many
+companies end up split across several IDs, and how many IDs wrongly merge
+different companies. Exact-name and normalised-name matching are shown for
+comparison, and the same names are also resolved in year-sized batches.
+"""
+import argparse
+import resource
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from company_names import NameIndex, company_ids
+
+SUFFIXES = ['', '', ' Ltd', ' Ltd.', ' Limited', ' Pvt. Ltd.', ' Private Limited', ' Corporation']
+SECTORS = ['Industries', 'Bank', 'Motors', 'Steel', 'Power', 'Finance', 'Pharma', 'Textiles', 'Energy',
+           'Infra', 'Cements', 'Chemicals', 'Foods', 'Logistics', 'Telecom', 'Holdings']
+
+
+def made_up_words(count, rng):
+    letters = np.array(list('bcdfghjklmnprstvyz'))
+    vowels = np.array(list('aeiou'))
+    words = set()
+    while len(words) < count:
+        size = rng.integers(3, 6)
+        words.add(''.join(c + v for c, v in zip(rng.choice(letters, size), rng.choice(vowels, size))).title())
+    return sorted(words)
+
+
+def variant(name, rng):
+    if rng.random() < 0.3:
+        name = name.replace(' and ', ' & ') if ' and ' in name else name
+    words = name.split(' ')
+    if rng.random() < 0.15:
+        # one typo or dropped letter in the longest word
+        index = max(range(len(words)), key=lambda i: len(words[i]))
+        word = words[index]
+        position = int(rng.integers(1, len(word) - 1))
+        if rng.random() < 0.5:
+            word = word[:position] + word[position + 1:]
+        else:
+            word = word[:position] + 'aeiou'[int(rng.integers(5))] + word[position + 1:]
+        words[index] = word
+    name = ' '.join(words) + SUFFIXES[int(rng.integers(len(SUFFIXES)))]
+    roll = rng.random()
+    return name.upper() if roll < 0.1 else name.lower() if roll < 0.2 else name
+
+
+def synthetic(count, seed=0):
+    """(names, true company number) with about 2.5 spellings per company."""
+    rng = np.random.default_rng(seed)
+    words = made_up_words(3000, rng)
+    companies = set()
+    while len(companies) < count // 2.5:
+        first, second = rng.choice(words, 2)
+        shape = rng.random()
+        if shape < 0.4:
+            companies.add(f'{first} {rng.choice(SECTORS)}')
+        elif shape < 0.8:
+            companies.add(f'{first} {second} {rng.choice(SECTORS)}')
+        else:
+            companies.add(f'{first} and {second}')
+    companies = sorted(companies)
+    truth = rng.integers(0, len(companies), count)
+    truth[:len(companies)] = np.arange(len(companies))  # every company appears at least once
+    names = [variant(companies[company], rng) for company in truth]
+    return pd.Series(names), truth
+
+
+def report(label, ids, truth, elapsed=None):
+    pairs = pd.DataFrame({'id': ids, 'truth': truth}).drop_duplicates()
+    split = (pairs.groupby('truth').size() > 1).mean()
+    merged = (pairs.groupby('id').size() > 1).mean()
+    timing = f'{elapsed:>7.2f}s' if elapsed is not None else ' ' * 8
+    print(f'{label:<34} {timing}  {pairs["id"].nunique():>9,} IDs  '
+          f'companies split {split:>6.2%}  IDs merging companies {merged:>6.2%}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--names', type=int, default=1_000_000)
+    parser.add_argument('--batches', type=int, default=10, help='batches for the incremental run')
+    args = parser.parse_args()
+
+    names, truth = synthetic(args.names)
+    print(f'{len(names):,} names, {truth.max() + 1:,} companies')
+    report('exact name', pd.factorize(names)[0], truth)
+    report('normalised name (company_ids)', company_ids(names), truth)
+
+    start = time.perf_counter()
+    ids = NameIndex().resolve(names)
+    report('NameIndex, one batch', ids, truth, time.perf_counter() - start)
+
+    index = NameIndex()
+    start = time.perf_counter()
+    batch_ids = np.concatenate([index.resolve(batch) for batch in np.array_split(names, args.batches)])
+    report(f'NameIndex, {args.batches} batches', batch_ids, truth, time.perf_counter() - start)
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+    print(f'peak RSS {peak:,.0f} MB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+"""Peak memory of clean.py in memory vs in chunks, on synthetic Forbes-shaped inputs.
+
+    python bench_streaming.py --rows 2000000 --chunksize 100000
+
+Both input CSVs are generated with ``--rows`` rows each in a scratch directory.
+Each mode then runs in a fresh process, so its peak RSS (ru_maxrss) covers
+only that mode. The report also checks that both modes wrote the same number
+of rows. Finally the combined output is loaded back from the CSV and from
+the Parquet copy, reading only the columns Phase 3 needs with a memory map,
+again one fresh process each.
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# the phase modules import schemas.py and profiler.py from the repository root; spawned workers
+# inherit the path
+if __name__ == '__main__':
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import clean
+
+CITIES = ['Mumbai', 'New Delhi', 'Bangalore', 'Chennai', 'Hyderabad', 'Kolkata', 'Pune', 'Ahmedabad']
+INDUSTRIES = ['Oil and gas', 'Banking', 'Infotech', 'Automotive', 'Iron and steel', 'Insurance', 'Utilities']
+
+
+def write_inputs(directory, rows, batch=500_000, seed=0):
+    """Write both raw inputs a batch at a time, in the notebook's column layout."""
+    rng = np.random.default_rng(seed)
+    for path in (clean.INPUT_2024, clean.INPUT_2023):
+        with open(os.path.join(directory, path), 'w', newline='', encoding='utf-8') as file:
+            for start in range(0, rows, batch):
+                n = min(batch, rows - start)
+                rank = np.arange(start + 1, start + n + 1)
+                names = pd.Series(rank).map('Company {}'.format)
+                cities = ' ' + pd.Series(rng.choice(CITIES, n)) + ' '
+                industries = pd.Series(rng.choice(INDUSTRIES, n)) + ' '
+                money = pd.Series(np.round(rng.lognormal(1, 1.5, n), 1)).astype(str)
+                if path == clean.INPUT_2024:
+                    profit = pd.Series(np.round(rng.normal(1, 3, n), 1)).astype(str).str.replace('-', '−')
+                    df = pd.DataFrame({
+                        'Rank': rank, 'Forbes 2000 rank': rank + 40, 'Name': names, 'Headquarters': cities,
+                        'Revenue(billions US$)': money, 'Profit(billions US$)': profit,
+                        'Assets(billions US$)': money, 'Value(billions US$)': money, 'Industry': industries,
+                    })
+                else:
+                    crore = pd.Series(rng.integers(-5_000, 9_00_000, n)).map('{:,}'.format).str.replace('-', '−')
+                    growth = pd.Series(np.round(rng.normal(10, 20, n), 1)).astype(str) + '%'
+                    df = pd.DataFrame({
+                        'Rank': rank, 'Name': names, 'Industry': industries, 'Revenue(in  ₹ Crore)': crore,
+                        'Revenue growth': growth, 'Profits(in  ₹ Crore)': crore,
+                        'Headquarters': cities, 'State Controlled': np.where(rng.random(n) < 0.2, 'Yes', ''),
+                    })
+                df.to_csv(file, header=start == 0, index=False)
+
+
+def run_in_memory():
+    # the script's own steps, without the prints
+    clean.write_cleaned(clean.read_and_clean(2024), clean.read_and_clean(2023))
+
+
+# what database.py reads
+LOAD_COLUMNS = ['Name', 'Industry', 'Headquarters', 'Rank', 'Revenue', 'Profit']
+
+
+def load_csv():
+    pd.read_csv(clean.OUTPUT_COMBINED)
+
+
+def load_parquet():
+    import pyarrow.parquet as pq
+
+    pq.read_table(clean.parquet_path(clean.OUTPUT_COMBINED), columns=LOAD_COLUMNS, memory_map=True).to_pandas()
+
+
+def measure(directory, chunksize, queue):
+    os.chdir(directory)
+    start = time.perf_counter()
+    if chunksize:
+        clean.clean_in_chunks(chunksize)
+    else:
+        run_in_memory()
+    elapsed = time.perf_counter() - start
+    queue.put((elapsed, peak_rss_mb(), count_rows()))
+
+
+def measure_load(directory, loader, queue):
+    os.chdir(directory)
+    # baseline after the imports, so only the load itself is compared
+    import pyarrow.parquet  # noqa: F401
+    before = peak_rss_mb()
+    start = time.perf_counter()
+    loader()
+    queue.put((time.perf_counter() - start, peak_rss_mb() - before))
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def count_rows():
+    rows = {}
+    for path in (clean.OUTPUT_2024, clean.OUTPUT_2023, clean.OUTPUT_COMBINED):
+        with open(path, 'rb') as file:
+            rows[path] = sum(1 for _ in file) - 1
+    return rows
+
+
+def run(target, *args):
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=target, args=args + (queue,))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=2_000_000, help='rows per input file')
+    parser.add_argument('--chunksize', type=int, nargs='+', default=[50_000, 200_000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_inputs(directory, args.rows)
+        size = sum(os.path.getsize(os.path.join(directory, path)) for path in (clean.INPUT_2024, clean.INPUT_2023))
+        print(f'{args.rows:,} rows per year, {size / 1e6:,.0f} MB of input')
+        expected = None
+        for chunksize in [None] + args.chunksize:
+            elapsed, peak_mb, rows = run(measure, directory, chunksize)
+            label = f'chunks of {chunksize:,}' if chunksize else 'in memory'
+            print(f'{label:<22} {elapsed:>7.1f}s  peak RSS {peak_mb:>8,.0f} MB  '
+                  f'{rows[clean.OUTPUT_COMBINED]:,} combined rows')
+            expected = expected or rows
+            assert rows == expected, (rows, expected)
+
+        print('\nloading the combined output')
+        for label, loader in (('read_csv, all columns', load_csv),
+                              (f'parquet, {len(LOAD_COLUMNS)} columns, mmap', load_parquet)):
+            elapsed, load_mb = run(measure_load, directory, loader)
+            print(f'{label:<30} {elapsed:>7.2f}s  +{load_mb:>7,.0f} MB')
+
+
+if __name__ == '__main__':
+    main()
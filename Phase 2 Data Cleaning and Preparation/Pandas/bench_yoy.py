@@ -0,0 +1,104 @@
+"""Check yoy.py against the old two-year pivot, then time it on many companies and years.
+
+    python bench_yoy.py --companies 1000000 --years 20
+
+The synthetic frame has about 90% of the companies in each year, so some
+companies skip a year. Timed: the old pivot and year_over_year on two years,
+year_over_year on all years, and add_year for one more year compared with
+recomputing every year.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from company_names import company_ids
+from yoy import add_year, year_over_year
+
+
+def pivot_changes(combined_df):
+    # get_year_over_year_changes before yoy.py, for comparison
+    changes = combined_df.pivot(index='Name', columns='Year', values=['Revenue', 'Profit', 'Rank'])
+    changes['Revenue_Change'] = changes[('Revenue', 2024)] - changes[('Revenue', 2023)]
+    changes['Profit_Change'] = changes[('Profit', 2024)] - changes[('Profit', 2023)]
+    changes['Rank_Change'] = changes[('Rank', 2023)] - changes[('Rank', 2024)]
+    return changes.sort_values('Revenue_Change', ascending=False)
+
+
+def synthetic(companies, years, first_year=2024, seed=0):
+    """Long frame with ~90% of ``companies`` per year, as a list of per-year frames."""
+    rng = np.random.default_rng(seed)
+    names = pd.Categorical.from_codes(np.arange(companies), [f'Company {n}' for n in range(companies)])
+    ids = company_ids(names.categories)
+    frames = []
+    for year in range(first_year - years + 1, first_year + 1):
+        present = np.flatnonzero(rng.random(companies) < 0.9)
+        frames.append(pd.DataFrame({
+            'Company_ID': ids[present],
+            'Name': names[present],
+            'Year': year,
+            'Revenue': np.round(rng.lognormal(1, 1.5, len(present)), 2),
+            'Profit': np.round(rng.normal(1, 3, len(present)), 2),
+            'Rank': rng.permutation(len(present)) + 1,
+        }))
+    return frames
+
+
+def check_against_pivot(companies=20_000):
+    combined_df = pd.concat(synthetic(companies, 2), ignore_index=True)
+    old = pivot_changes(combined_df)
+    old = old.dropna(subset=[('Revenue', 2023), ('Revenue', 2024)])
+    new = year_over_year(combined_df.drop(columns='Company_ID')).set_index('Name')
+    for column in ('Revenue_Change', 'Profit_Change', 'Rank_Change'):
+        expected = old[column].astype(float).sort_index()
+        expected.index = expected.index.astype(str)
+        actual = new[column].sort_index()
+        actual.index = actual.index.astype(str)
+        pd.testing.assert_series_equal(expected, actual, check_names=False, check_index_type=False)
+    print(f'{len(new):,} companies: same changes as the pivot')
+
+    # the pivot raises on a repeated name; year_over_year keeps the best-ranked row
+    repeated = pd.DataFrame({'Name': ['A', 'a ', 'A', 'B'], 'Year': [2023, 2023, 2024, 2024],
+                             'Revenue': [1.0, 5.0, 2.0, 3.0], 'Profit': [0.1, 0.5, 0.2, 0.3], 'Rank': [9, 2, 1, 2]})
+    changes = year_over_year(repeated)
+    assert changes[['Year', 'Revenue_Change', 'Rank_Change']].values.tolist() == [[2024, -3.0, 1.0]], changes
+    print('repeated names: best-ranked row used')
+
+
+def timed(label, function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    elapsed = time.perf_counter() - start
+    print(f'{label:<44} {elapsed:>7.2f}s  {len(result):>12,} rows out')
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--companies', type=int, default=1_000_000)
+    parser.add_argument('--years', type=int, default=20)
+    args = parser.parse_args()
+
+    check_against_pivot()
+
+    frames = synthetic(args.companies, args.years + 1)
+    # names as plain strings, as read from the cleaned CSVs
+    two_years = pd.concat(frames[-2:], ignore_index=True).drop(columns='Company_ID')
+    two_years['Name'] = two_years['Name'].astype(object)
+    print(f'\n{args.companies:,} companies')
+    timed('pivot, 2 years (by name)', pivot_changes, two_years)
+    timed('year_over_year, 2 years (by name)', year_over_year, two_years)
+    del two_years
+
+    history = pd.concat(frames[:-1], ignore_index=True)
+    changes = timed(f'year_over_year, {args.years} years ({len(history):,} rows)', year_over_year, history)
+    del history
+    timed('add_year, 1 more year', add_year, changes, frames[-2], frames[-1])
+    all_years = pd.concat(frames, ignore_index=True)
+    del frames
+    timed(f'year_over_year, recompute {args.years + 1} years', year_over_year, all_years)
+
+
+if __name__ == '__main__':
+    main()
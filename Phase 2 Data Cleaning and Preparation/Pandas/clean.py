@@ -1,39 +1,42 @@
 
+import os
+import sys
+
 import pandas as pd
-import numpy as np
-
-# Function to convert crore to billions USD (assuming 1 USD = 83 INR)
-def crore_to_billion_usd(value):
-    if pd.isna(value):
-        return value
-    # Handle string values
-    if isinstance(value, str):
-        # Replace various forms of minus signs and remove commas
-        value = value.replace('−', '-').replace(',', '')
-        try:
-            value = float(value)
-        except ValueError:
-            return np.nan
-    # Convert crore to billion USD
-    return round((value / 100) / 83, 2)  # 1 crore = 10M INR, then convert to USD
-
-# Function to clean percentage strings
-def clean_percentage(value):
-    if pd.isna(value):
-        return value
-    if isinstance(value, str):
-        value = value.strip('%')
-        try:
-            return float(value)
-        except ValueError:
-            return np.nan
-    return value
-
-# Read the 2024 data
-df_2024 = pd.read_csv('Largest Companies in India 2024 Forbes.csv')
-
-# Read the 2023 data
-df_2023 = pd.read_csv('Largest Companies in India 2023 Forbes.csv')
+
+from converters import USD_INR, crore_to_billion_usd_series
+from company_names import NameIndex
+from yoy import year_over_year
+
+# schemas.py and profiler.py are modules of the repository root. pipeline.py puts the root on the
+# path for its stages; run as a script, this file puts it there itself.
+if __name__ == '__main__':
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from profiler import Profiler, format_report, profile_frame, write_report
+from schemas import (FORBES_2023, FORBES_2024, FORBES_CLEANED_2023, FORBES_CLEANED_2024, arrow_type,
+                     column_types, read_csv, stream_csv)
+
+# Input and output files
+INPUT_2024 = 'Largest Companies in India 2024 Forbes.csv'
+INPUT_2023 = 'Largest Companies in India 2023 Forbes.csv'
+OUTPUT_2024 = 'cleaned_india_companies_2024.csv'
+OUTPUT_2023 = 'cleaned_india_companies_2023.csv'
+OUTPUT_COMBINED = 'combined_india_companies_2023_2024.csv'
+
+# Columns shared by both years in the combined dataset
+COMMON_COLUMNS = ['Company_ID', 'Rank', 'Name', 'Industry', 'Revenue', 'Profit',
+                  'Headquarters', 'Year']
+
+# Typed columnar copies of the three outputs, read by Phase 3 instead of the CSVs; the
+# columns and types are the cleaned schemas of the registry.
+# Stored in the file metadata as schema_version; bump it when a column or type changes.
+SCHEMA_VERSION = 2
+PARQUET_TYPES_2024 = column_types(FORBES_CLEANED_2024)
+PARQUET_TYPES_2023 = column_types(FORBES_CLEANED_2023)
+PARQUET_TYPES_COMBINED = {column: PARQUET_TYPES_2023[column] for column in COMMON_COLUMNS}
+
+# The clean functions take the raw files as read with their schemas (FORBES_2024 / FORBES_2023):
+# numbers are already parsed and Headquarters and Industry stripped
 
 # Clean 2024 data
 def clean_2024_data(df):
@@ -46,39 +49,25 @@ def clean_2024_data(df):
         'Forbes 2000 rank': 'Forbes_Rank'
     })
     
-    #convert numeric columns
-    numeric_columns = ['Revenue', 'Profit', 'Assets', 'Value']
-    for col in numeric_columns:
-        df[col] = pd.to_numeric(df[col], errors='coerce')
-    
-    #clean up Headquarters and Industry
-    df['Headquarters'] = df['Headquarters'].str.strip()
-    df['Industry'] = df['Industry'].str.strip()
-    
     #add year 
     df['Year'] = 2024
     
     return df
 
 # Clean 2023 data
-def clean_2023_data(df):
-    #convert revenue and profits afrom crore to billon USD
-    df['Revenue'] = df['Revenue(in  ₹ Crore)'].apply(crore_to_billion_usd)
-    df['Profit'] = df['Profits(in  ₹ Crore)'].apply(crore_to_billion_usd)
+def clean_2023_data(df, usd_inr=USD_INR):
+    #convert revenue and profits afrom crore to billon USD (usd_inr rupees per dollar)
+    df['Revenue'] = crore_to_billion_usd_series(df['Revenue(in  ₹ Crore)'], usd_inr)
+    df['Profit'] = crore_to_billion_usd_series(df['Profits(in  ₹ Crore)'], usd_inr)
     
-    #clean aRevenue growth percentages
-    df['Revenue_Growth'] = df['Revenue growth'].apply(clean_percentage)
-    
-    #clean up Headquarters and Industry
-    df['Headquarters'] = df['Headquarters'].str.strip()
-    df['Industry'] = df['Industry'].str.strip()
+    #Revenue growth percentages (parsed by the schema)
+    df['Revenue_Growth'] = df['Revenue growth']
     
     #add year identifier
     df['Year'] = 2023
     
-    # add State Controlled indcator
-    df['State_Controlled'] = df['State Controlled'].fillna('No')
-    df['State_Controlled'] = df['State_Controlled'].map({'Yes': True, 'No': False})
+    # add State Controlled indcator (Yes / No, missing is No)
+    df['State_Controlled'] = df['State Controlled']
     
     # Select and reorder columns
     columns = ['Rank', 'Name', 'Industry', 'Revenue', 'Profit', 'Revenue_Growth', 
@@ -86,15 +75,10 @@ def clean_2023_data(df):
     
     return df[columns]
 
-# Clean both datasets
-df_2024_clean = clean_2024_data(df_2024)
-df_2023_clean = clean_2023_data(df_2023)
-
 # Create combined dataset for comparison
 def prepare_for_comparison(df_2024, df_2023):
     #select common columns
-    common_columns = ['Rank', 'Name', 'Industry', 'Revenue', 'Profit', 
-                     'Headquarters', 'Year']
+    common_columns = COMMON_COLUMNS
     
     df_2024_comp = df_2024[common_columns].copy()
     df_2023_comp = df_2023[common_columns].copy()
@@ -104,42 +88,157 @@ def prepare_for_comparison(df_2024, df_2023):
     
     return combined_df
 
-# Create combined dataset
-combined_df = prepare_for_comparison(df_2024_clean, df_2023_clean)
+# Add the canonical company ID, shared by spellings of the same name across years; the rows of one
+# year are different companies, so they never share an ID with each other
+def add_company_ids(df, name_index, year):
+    df.insert(0, 'Company_ID', name_index.resolve(df['Name'], source=year))
+    return df
+
+def read_and_clean(year, input_path=None, usd_inr=USD_INR):
+    """Read one year's raw file with its schema and clean it (no Company_ID yet)."""
+    if year == 2024:
+        return clean_2024_data(read_csv(input_path or INPUT_2024, FORBES_2024))
+    if year == 2023:
+        return clean_2023_data(read_csv(input_path or INPUT_2023, FORBES_2023), usd_inr)
+    raise ValueError(f'no schema for the {year} list')
+
+def write_cleaned(df_2024_clean, df_2023_clean, output_2024=OUTPUT_2024, output_2023=OUTPUT_2023,
+                  output_combined=OUTPUT_COMBINED):
+    """Give both cleaned years their company IDs and write the cleaned and combined files.
+
+    Each file is written as CSV and as its typed Parquet copy. Returns the
+    2024, 2023 and combined frames.
+    """
+    # Give spellings of the same company one ID across both years
+    name_index = NameIndex()
+    df_2024_clean = add_company_ids(df_2024_clean, name_index, 2024)
+    df_2023_clean = add_company_ids(df_2023_clean, name_index, 2023)
+
+    # Create combined dataset
+    combined_df = prepare_for_comparison(df_2024_clean, df_2023_clean)
+
+    # Save cleaned datasets
+    df_2024_clean.to_csv(output_2024, index=False)
+    df_2023_clean.to_csv(output_2023, index=False)
+    combined_df.to_csv(output_combined, index=False)
+    write_parquet(df_2024_clean, PARQUET_TYPES_2024, output_2024)
+    write_parquet(df_2023_clean, PARQUET_TYPES_2023, output_2023)
+    write_parquet(combined_df, PARQUET_TYPES_COMBINED, output_combined)
+    return df_2024_clean, df_2023_clean, combined_df
 
-# Basic analysis
-print("2024 Dataset Info:")
-print(df_2024_clean.info())
-print("\n2023 Dataset Info:")
-print(df_2023_clean.info())
+def parquet_path(csv_path):
+    return csv_path[:-len('.csv')] + '.parquet'
 
-#display sample of cleaned data
-print("\nSample of 2024 cleaned data:")
-print(df_2024_clean.head())
-print("\nSample of 2023 cleaned data:")
-print(df_2023_clean.head())
+def profile_path(csv_path):
+    return csv_path[:-len('.csv')] + '_profile.json'
 
-# Save cleaned datasets
-df_2024_clean.to_csv('cleaned_india_companies_2024.csv', index=False)
-df_2023_clean.to_csv('cleaned_india_companies_2023.csv', index=False)
-combined_df.to_csv('combined_india_companies_2023_2024.csv', index=False)
+def parquet_schema(types):
+    import pyarrow as pa
+
+    # category columns are dictionary-encoded, read back as pandas categoricals
+    return pa.schema([(column, arrow_type(kind)) for column, kind in types.items()],
+                     metadata={'schema_version': str(SCHEMA_VERSION)})
+
+def to_arrow_table(df, schema):
+    """Convert a cleaned frame to ``schema``; unparseable integers become nulls."""
+    import pyarrow as pa
+
+    columns = {}
+    for field in schema:
+        column = df[field.name]
+        if pa.types.is_integer(field.type):
+            column = pd.to_numeric(column, errors='coerce').astype('Int64')
+        elif pa.types.is_boolean(field.type):
+            column = column.astype('boolean')
+        elif pa.types.is_dictionary(field.type):
+            column = column.astype('category')
+        columns[field.name] = column
+    table = pa.Table.from_pandas(pd.DataFrame(columns), schema=schema, preserve_index=False)
+    # only the schema version: without pandas' metadata every writer (whole frame or
+    # chunks) produces the same file, and dictionary columns still load as categoricals
+    return table.replace_schema_metadata(schema.metadata)
+
+def write_parquet(df, types, csv_path):
+    import pyarrow.parquet as pq
+
+    pq.write_table(to_arrow_table(df, parquet_schema(types)), parquet_path(csv_path))
+
+def clean_in_chunks(chunksize=100_000, usd_inr=USD_INR):
+    """Out-of-core version of the steps below, for inputs that do not fit in memory.
+
+    Each input is streamed with its schema at most ``chunksize`` typed rows
+    at a time, cleaned with the same functions and appended to its cleaned
+    file and to the combined file, so only one chunk is alive at a time. Company IDs come from one NameIndex
+    fed chunk by chunk. Writes the same files (each Parquet file gets one row
+    group per chunk) and returns ({year: rows}, {year: profile report of the
+    cleaned rows}), each profile built chunk by chunk as well.
+    """
+    import pyarrow.parquet as pq
+
+    steps = [
+        (2024, INPUT_2024, FORBES_2024, clean_2024_data, OUTPUT_2024, PARQUET_TYPES_2024),
+        (2023, INPUT_2023, FORBES_2023, lambda chunk: clean_2023_data(chunk, usd_inr), OUTPUT_2023, PARQUET_TYPES_2023),
+    ]
+    rows = {}
+    profiles = {}
+    name_index = NameIndex()
+    combined_schema = parquet_schema(PARQUET_TYPES_COMBINED)
+    with open(OUTPUT_COMBINED, 'w', newline='', encoding='utf-8') as combined_file, \
+            pq.ParquetWriter(parquet_path(OUTPUT_COMBINED), combined_schema) as combined_parquet:
+        for year, path, input_schema, clean, output, types in steps:
+            rows[year] = 0
+            profiler = Profiler(output)
+            schema = parquet_schema(types)
+            with open(output, 'w', newline='', encoding='utf-8') as output_file, \
+                    pq.ParquetWriter(parquet_path(output), schema) as output_parquet:
+                for chunk in stream_csv(path, input_schema, batch_size=chunksize):
+                    cleaned = add_company_ids(clean(chunk.to_pandas()), name_index, year)
+                    cleaned.to_csv(output_file, header=rows[year] == 0, index=False)
+                    cleaned[COMMON_COLUMNS].to_csv(combined_file, header=combined_file.tell() == 0, index=False)
+                    output_parquet.write_table(to_arrow_table(cleaned, schema))
+                    combined_parquet.write_table(to_arrow_table(cleaned, combined_schema))
+                    profiler.update(cleaned)
+                    rows[year] += len(cleaned)
+            profiles[year] = profiler.report()
+    return rows, profiles
 
 #more analysis funtions
 def get_year_over_year_changes(combined_df):
     """Calculate year-over-year changes for companies"""
-    # change the data to compare years
-    changes = combined_df.pivot(index='Name', 
-                              columns='Year',
-                              values=['Revenue', 'Profit', 'Rank'])
-    
-    # Calculate changes
-    changes['Revenue_Change'] = changes[('Revenue', 2024)] - changes[('Revenue', 2023)]
-    changes['Profit_Change'] = changes[('Profit', 2024)] - changes[('Profit', 2023)]
-    changes['Rank_Change'] = changes[('Rank', 2023)] - changes[('Rank', 2024)]
-    
+    # one row per company and pair of consecutive years, for any number of years (see yoy.py)
+    changes = year_over_year(combined_df)
+
     return changes.sort_values('Revenue_Change', ascending=False)
 
-# Print summary of year-over-year changes
-print("\nYear-over-year changes summary:")
-yoy_changes = get_year_over_year_changes(combined_df)
-print(yoy_changes.head())
\ No newline at end of file
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Clean the Forbes lists of the largest companies in India')
+    parser.add_argument('--chunksize', type=int,
+                        help='stream the inputs this many rows at a time (keeps memory bounded, '
+                             'skips the year-over-year summary)')
+    args = parser.parse_args()
+
+    if args.chunksize:
+        rows, profiles = clean_in_chunks(args.chunksize)
+        for year, output in ((2024, OUTPUT_2024), (2023, OUTPUT_2023)):
+            write_report(profiles[year], profile_path(output))
+            print(format_report(profiles[year]) + '\n')
+    else:
+        # Read and clean both datasets
+        df_2024_clean = read_and_clean(2024)
+        df_2023_clean = read_and_clean(2023)
+
+        # Company IDs, combined dataset, and all the output files
+        df_2024_clean, df_2023_clean, combined_df = write_cleaned(df_2024_clean, df_2023_clean)
+
+        # Data-quality profile of each cleaned dataset, one pass each, also saved as JSON
+        for df, output in ((df_2024_clean, OUTPUT_2024), (df_2023_clean, OUTPUT_2023)):
+            report = profile_frame(df, output)
+            write_report(report, profile_path(output))
+            print(format_report(report) + '\n')
+
+        # Print summary of year-over-year changes
+        print("Year-over-year changes summary:")
+        yoy_changes = get_year_over_year_changes(combined_df)
+        print(yoy_changes.head())
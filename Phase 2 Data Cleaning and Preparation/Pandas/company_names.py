@@ -0,0 +1,248 @@
+
+import numpy as np
+import pandas as pd
+
+# Words that do not tell two companies apart: legal forms and filler
+STOP_WORDS = ['ltd', 'limited', 'pvt', 'private', 'inc', 'incorporated', 'plc', 'llp',
+              'co', 'company', 'corp', 'corporation', 'the']
+
+THRESHOLD = 0.7   # minimum estimated trigram Jaccard similarity for two names to be merged
+TYPO_CHARS = 4    # shortest word in which a one-letter difference is taken for a typo
+NUM_HASHES = 32   # MinHash signature length
+BANDS = 16        # LSH bands used for blocking, NUM_HASHES // BANDS hashes each
+MAX_CHARS = 40    # names are compared on their first MAX_CHARS normalised characters
+
+# fixed odd multipliers, so signatures (and therefore matches) are the same in every run
+_MULTIPLIERS = np.random.default_rng(2024).integers(1, 2 ** 63, NUM_HASHES, dtype=np.uint64) | np.uint64(1)
+
+def normalise_names(names):
+    """Case-fold, '&' -> 'and', drop punctuation and legal-form words, collapse whitespace."""
+    text = pd.Series(names, dtype=object).fillna('').astype(str).str.casefold()
+    plain = text.str.split().str.join(' ')
+    text = text.str.replace('&', ' and ', regex=False).str.replace(r'[^\w\s]', ' ', regex=True)
+    text = text.str.replace(r'\b(?:' + '|'.join(STOP_WORDS) + r')\b', ' ', regex=True)
+    text = text.str.split().str.join(' ')
+    # a name made only of stop words ('The Company') keeps them
+    return text.where(text != '', plain)
+
+def hash_names(normalised):
+    """Stable int64 IDs for normalised names, the same in every run."""
+    return pd.util.hash_array(np.asarray(normalised, dtype=object)).view(np.int64)
+
+def company_ids(names):
+    """Exact-match company IDs: hash_names of the normalised name."""
+    # each distinct name is normalised and hashed once
+    names = pd.Series(names).fillna('').astype('category')
+    categories = normalise_names(pd.Series(names.cat.categories))
+    return hash_names(categories)[names.cat.codes.to_numpy()]
+
+def minhash(normalised, batch=100_000):
+    """NUM_HASHES MinHash values per name over its character trigrams (vectorised)."""
+    normalised = pd.Series(normalised, dtype=object)
+    signatures = np.empty((len(normalised), NUM_HASHES), dtype=np.uint32)
+    for start in range(0, len(normalised), batch):
+        # fixed-width code points; padding is 0, so trigrams that run into it are masked
+        padded = (' ' + normalised.iloc[start:start + batch].str.slice(0, MAX_CHARS - 2) + ' ')
+        chars = padded.to_numpy(dtype=f'U{MAX_CHARS}').view(np.uint32)
+        chars = chars.reshape(-1, MAX_CHARS).astype(np.uint64)
+        grams = (chars[:, :-2] << np.uint64(42)) | (chars[:, 1:-1] << np.uint64(21)) | chars[:, 2:]
+        padding = chars[:, 2:] == 0
+        for k, multiplier in enumerate(_MULTIPLIERS):
+            # multiply-shift hashing; the product wraps around on purpose
+            hashed = (grams * multiplier) >> np.uint64(32)
+            hashed[padding] = np.iinfo(np.uint32).max
+            signatures[start:start + batch, k] = hashed.min(axis=1)
+    return signatures
+
+def _band_keys(signatures):
+    rows = NUM_HASHES // BANDS
+    bands = signatures.reshape(len(signatures), BANDS, rows).astype(np.uint64)
+    keys = bands[:, :, 0]
+    for row in range(1, rows):
+        keys = keys * np.uint64(0x100000001B3) ^ bands[:, :, row]
+    return keys
+
+def _agreement_keys(normalised):
+    # names are only merged when they have the same numbers ('Fund 1' / 'Fund 2') and
+    # the same number of words ('Gatule Chemicals' / 'Jugubodo Gatule Chemicals')
+    normalised = pd.Series(normalised, dtype=object)
+    words = normalised.str.count(' ').astype(str)
+    return hash_names(normalised.str.replace(r'\D', '', regex=True) + '|' + words)
+
+def _one_edit_apart(a, b):
+    # one letter substituted, dropped or added, or two neighbouring letters swapped
+    if len(a) < len(b):
+        a, b = b, a
+    if len(a) - len(b) > 1:
+        return False
+    i = 0
+    while i < len(b) and a[i] == b[i]:
+        i += 1
+    if len(a) != len(b):
+        return a[i + 1:] == b[i:]
+    return a[i + 1:] == b[i + 1:] or (a[i + 1:i + 2] == b[i:i + 1] and a[i:i + 1] == b[i + 1:i + 2]
+                                      and a[i + 2:] == b[i + 2:])
+
+def _typo_pairs(left, right):
+    """For pairs of normalised names: do they differ by one typo in one word only?
+
+    Whole-name trigram similarity is dominated by the words companies share
+    ('SBI Life Insurance' / 'HDFC Life Insurance'), so the words are compared
+    one by one: all but one must be equal, and that one must be at least
+    TYPO_CHARS letters long on both sides and one edit apart (_one_edit_apart). Short words
+    (acronyms such as SBI, HDFC, NTPC, NHPC) must match exactly.
+    """
+    same = np.zeros(len(left), dtype=bool)
+    for index, (a, b) in enumerate(zip(left, right)):
+        differ = [(x, y) for x, y in zip(a.split(' '), b.split(' ')) if x != y]
+        same[index] = len(differ) == 1 and min(map(len, differ[0])) >= TYPO_CHARS and _one_edit_apart(*differ[0])
+    return same
+
+def _components(size, left, right):
+    """Connected-component label (smallest member) for each of ``size`` nodes."""
+    labels = np.arange(size)
+    while True:
+        smaller = np.minimum(labels[left], labels[right])
+        updated = labels.copy()
+        np.minimum.at(updated, left, smaller)
+        np.minimum.at(updated, right, smaller)
+        updated = updated[updated]  # pointer jumping
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+class NameIndex:
+    """Incremental company-name index that gives name variants one canonical ID.
+
+    Names are normalised (normalise_names), so 'Reliance Industries Ltd.' and
+    'Reliance Industries' are the same name. Remaining variants (typos) are
+    matched on character-trigram MinHash signatures: names sharing an LSH band
+    are candidates, each candidate is compared with the first name in its
+    bucket only, and candidates whose estimated Jaccard similarity is at least
+    ``threshold``, with the same numbers and word count, are merged if they
+    also differ by a single typo in one word (_typo_pairs). The candidate
+    search is numpy over all names at once, so cost grows about linearly with
+    the number of names.
+
+    A new group of names gets the ID of the closest group already in the
+    index, or else hash_names of its alphabetically first normalised name.
+    IDs already handed out never change, so the index can be fed year by
+    year or chunk by chunk.
+
+    Names resolved with a ``source`` (the year of a ranking list, say) are rows
+    of one list, so they are different companies: two names of the same source
+    never get the same ID, even when they are near misses of each other.
+    """
+
+    def __init__(self, threshold=THRESHOLD):
+        self.threshold = threshold
+        self.names = pd.Index([], dtype=object)          # normalised names seen so far
+        self.ids = np.empty(0, dtype=np.int64)           # canonical ID per name
+        self.signatures = np.empty((0, NUM_HASHES), dtype=np.uint32)
+        self.band_keys = np.empty((0, BANDS), dtype=np.uint64)
+        self.agreement_keys = np.empty(0, dtype=np.int64)
+        self.source_ids = {}                             # source -> IDs given to its names
+
+    def __len__(self):
+        return len(self.names)
+
+    def resolve(self, names, source=None):
+        """Return the canonical int64 company ID for each name, adding new names to the index.
+
+        ``source`` labels the list the names come from; see the class docstring.
+        A list fed in chunks uses the same source for every chunk.
+        """
+        normalised = normalise_names(names)
+        unique = pd.Index(normalised.unique())
+        positions = self.names.get_indexer(unique)
+        if source is not None:
+            # names already known are taken first, so that no new name of the list joins their groups
+            taken = self.source_ids.setdefault(source, set())
+            taken.update(self.ids[positions[positions >= 0]].tolist())
+        new = unique[positions < 0]
+        if len(new):
+            self._add(new, source)
+        ids = self.ids[self.names.get_indexer(normalised)]
+        if source is not None:
+            taken.update(ids.tolist())
+        return ids
+
+    def _add(self, new, source=None):
+        # sorted, so a group's label (its smallest position) is its alphabetically first name
+        new = new.sort_values()
+        old = len(self.names)
+        signatures = minhash(new)
+        band_keys = _band_keys(signatures)
+        agreement_keys = _agreement_keys(new)
+        all_signatures = np.concatenate([self.signatures, signatures])
+        all_agreement_keys = np.concatenate([self.agreement_keys, agreement_keys])
+        all_band_keys = np.concatenate([self.band_keys, band_keys])
+        total = len(all_signatures)
+        is_new = np.arange(total) >= old
+
+        # blocking: in every band, link each name to the first name of its bucket;
+        # the stable sort keeps names already in the index first, so new names link to them
+        left, right = [], []
+        for band in range(BANDS):
+            keys = all_band_keys[:, band]
+            order = np.argsort(keys, kind='stable')
+            starts = np.ones(total, dtype=bool)
+            starts[1:] = keys[order[1:]] != keys[order[:-1]]
+            heads = order[np.flatnonzero(starts)][np.cumsum(starts) - 1]
+            members = (heads != order) & is_new[order]
+            left.append(heads[members])
+            right.append(order[members])
+        left = np.concatenate(left)
+        right = np.concatenate(right)
+        pairs = np.sort(left.astype(np.int64) * total + right)
+        unique = np.ones(len(pairs), dtype=bool)
+        unique[1:] = pairs[1:] != pairs[:-1]
+        pairs = pairs[unique]
+        left, right = pairs // total, pairs % total
+
+        # verification: estimated Jaccard similarity of the two signatures, then word by word
+        similarity = (all_signatures[left] == all_signatures[right]).mean(axis=1)
+        match = (similarity >= self.threshold) & (all_agreement_keys[left] == all_agreement_keys[right])
+        left, right, similarity = left[match], right[match], similarity[match]
+        all_names = self.names.append(new)
+        match = _typo_pairs(all_names[left], all_names[right])
+        left, right, similarity = left[match], right[match], similarity[match]
+
+        if source is None:
+            # groups among the new names
+            both_new = left >= old
+            groups = _components(len(new), left[both_new] - old, right[both_new] - old)
+
+            # a group that matches names already in the index takes their (best) ID
+            with_old = ~both_new
+            existing = pd.DataFrame({
+                'group': groups[right[with_old] - old],
+                'id': self.ids[left[with_old]],
+                'similarity': similarity[with_old],
+            }).sort_values('similarity', kind='stable').drop_duplicates('group', keep='last')
+            ids = pd.Series(existing['id'].to_numpy(), index=existing['group'].to_numpy())
+        else:
+            # the new names are all of one list: each is its own group, and it takes the ID of its
+            # closest match among the groups with no name of that list yet, each group going once
+            groups = np.arange(len(new))
+            with_old = left < old
+            left, right, similarity = left[with_old], right[with_old], similarity[with_old]
+            taken = self.source_ids.get(source, set())
+            assigned = {}
+            for index in np.argsort(-similarity, kind='stable'):
+                group_id, name = int(self.ids[left[index]]), int(right[index]) - old
+                if name not in assigned and group_id not in taken:
+                    assigned[name] = group_id
+                    taken.add(group_id)
+            ids = pd.Series(assigned, dtype=np.int64)
+
+        # otherwise the group is named after its alphabetically first member
+        fresh = pd.Index(np.flatnonzero(groups == np.arange(len(new)))).difference(ids.index)
+        ids = pd.concat([ids, pd.Series(hash_names(new[fresh]), index=fresh)])
+
+        self.names = all_names
+        self.ids = np.concatenate([self.ids, ids.loc[groups].to_numpy()])
+        self.signatures = all_signatures
+        self.band_keys = all_band_keys
+        self.agreement_keys = all_agreement_keys
+        assert len(self.ids) == len(self.names) == total
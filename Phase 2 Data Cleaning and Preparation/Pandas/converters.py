@@ -0,0 +1,99 @@
+
+import pandas as pd
+import numpy as np
+
+# Default exchange rate used for the crore -> USD conversion (1 USD = 83 INR)
+USD_INR = 83
+
+# Function to convert crore to billions USD
+def crore_to_billion_usd(value, usd_inr=USD_INR):
+    if pd.isna(value):
+        return value
+    # Handle string values
+    if isinstance(value, str):
+        # Replace various forms of minus signs and remove commas
+        value = value.replace('−', '-').replace(',', '')
+        try:
+            value = float(value)
+        except ValueError:
+            return np.nan
+    # Convert crore to billion USD
+    return round((value / 100) / usd_inr, 2)  # 1 crore = 10M INR, then convert to USD
+
+# Function to clean percentage strings
+def clean_percentage(value):
+    if pd.isna(value):
+        return value
+    if isinstance(value, str):
+        value = value.strip('%')
+        try:
+            return float(value)
+        except ValueError:
+            return np.nan
+    return value
+
+# Vectorised versions of the two functions above, for whole columns.
+# Same results (including NaN for unparseable strings) without a Python call per cell.
+# String columns go through pyarrow's string kernels when it is installed.
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+
+# what float() accepts once commas are gone and whitespace is trimmed
+_FLOAT_TEXT = r'^[+-]?((\d+\.?\d*|\.\d+)([eE][+-]?\d+)?|(?i:inf|infinity|nan))$'
+
+def _as_arrow(series):
+    # only all-string (or missing) columns; numbers mixed into text keep the pandas path
+    if pa is None or pd.api.types.is_numeric_dtype(series):
+        return None
+    try:
+        return pa.array(series, type=pa.string(), from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return None
+
+def _arrow_to_float(text):
+    text = pc.utf8_trim_whitespace(text)
+    text = pc.if_else(pc.match_substring_regex(text, _FLOAT_TEXT), text, None)
+    return pc.cast(text, pa.float64()).to_numpy(zero_copy_only=False)
+
+def _to_float(series, clean):
+    """Apply ``clean`` to the strings of a column and parse it as floats like float() would."""
+    if pd.api.types.is_numeric_dtype(series):
+        return series.to_numpy(dtype=float, na_value=np.nan)
+    text = _as_arrow(series)
+    if text is not None:
+        return _arrow_to_float(clean(text, arrow=True))
+    text = series.astype(object)
+    # .str gives NaN for non-strings, which then keep their original value
+    cleaned = clean(text, arrow=False).fillna(text)
+    return pd.to_numeric(cleaned, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+
+def _clean_crore_text(text, arrow):
+    if arrow:
+        return pc.replace_substring(pc.replace_substring(text, '−', '-'), ',', '')
+    return text.str.replace('−', '-', regex=False).str.replace(',', '', regex=False)
+
+def _clean_percentage_text(text, arrow):
+    if arrow:
+        return pc.utf8_trim(text, '%')
+    return text.str.strip('%')
+
+def crore_to_billion_usd_series(series, usd_inr=USD_INR):
+    """Convert a column of crore amounts (numbers or strings like '−1,234') to billions USD."""
+    values = _to_float(series, _clean_crore_text)
+    scaled = (values / 100) / usd_inr
+    rounded = np.round(scaled, 2)
+    # np.round scales by 100 before rounding, which can land on the other side of
+    # a .xx5 boundary than Python's correctly rounded round(); redo those few
+    with np.errstate(invalid='ignore'):  # inf
+        near_tie = np.abs(scaled * 100 % 1 - 0.5) < 1e-6
+    rounded[near_tie] = [round(float(value), 2) for value in scaled[near_tie]]
+    return pd.Series(rounded, index=series.index, name=series.name)
+
+def clean_percentage_series(series):
+    """Convert a column of percentages (numbers or strings like '12.5%') to floats."""
+    values = _to_float(series, _clean_percentage_text)
+    return pd.Series(values, index=series.index, name=series.name)
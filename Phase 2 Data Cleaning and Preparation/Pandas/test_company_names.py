@@ -0,0 +1,59 @@
+"""NameIndex must link spellings of one company and keep different companies apart.
+
+    python -m pytest test_company_names.py
+"""
+import pytest
+
+from company_names import NameIndex
+
+# different companies whose names are close enough to be blocked together
+NEAR_MISSES = [('SBI Life Insurance', 'HDFC Life Insurance'), ('NTPC', 'NHPC'),
+               ('Bajaj Finance', 'Bajaj Finserv'), ('Adani Ports', 'Adani Power'),
+               ('Oil India', 'Coal India'), ('HDFC Bank', 'ICICI Bank'), ('Indian Bank', 'Indian Oil'),
+               ('Union Bank of India', 'Bank of India'), ('Tata Motors', 'Tata Motors Finance'),
+               ('Aditya Birla Capital', 'Aditya Birla Fashion')]
+
+# one company spelled differently in two years
+SPELLINGS = [('Reliance Industries Ltd.', 'Reliance Industries'),
+             ('Larsen & Toubro', 'Larsen and Toubro Limited'),
+             ('Hindustan Unilever', 'Hindustan Unilevr')]
+
+
+@pytest.mark.parametrize('pair', NEAR_MISSES, ids=' / '.join)
+def test_near_misses_stay_apart(pair):
+    ids = NameIndex().resolve(list(pair))
+    assert ids[0] != ids[1]
+
+
+@pytest.mark.parametrize('pair', NEAR_MISSES, ids=' / '.join)
+def test_near_misses_stay_apart_across_years(pair):
+    index = NameIndex()
+    assert index.resolve([pair[0]], source=2024)[0] != index.resolve([pair[1]], source=2023)[0]
+
+
+@pytest.mark.parametrize('pair', SPELLINGS, ids=' / '.join)
+def test_spellings_link_across_years(pair):
+    index = NameIndex()
+    assert index.resolve([pair[0]], source=2024)[0] == index.resolve([pair[1]], source=2023)[0]
+
+
+# a typo within one year is a second company; names equal after normalising
+# (legal suffixes, '&') are one name and are left to the loader's check
+def test_names_of_one_year_never_share_an_id():
+    ids = NameIndex().resolve(['Hindustan Unilever', 'Hindustan Unilevr'], source=2024)
+    assert ids[0] != ids[1]
+
+
+def test_one_name_per_year_joins_an_id():
+    index = NameIndex()
+    first = index.resolve(['Hindustan Unilever'], source=2024)[0]
+    later = index.resolve(['Hindustan Unilevr', 'Hindustan Unilever Ltd'], source=2023)
+    assert later.tolist().count(first) == 1
+    assert later[1] == first
+
+
+def test_ids_are_stable():
+    index = NameIndex()
+    ids = index.resolve(['SBI Life Insurance', 'HDFC Life Insurance', 'NTPC'], source=2024)
+    again = index.resolve(['NTPC', 'SBI Life Insurance', 'HDFC Life Insurance'], source=2024)
+    assert again.tolist() == [ids[2], ids[0], ids[1]]
@@ -0,0 +1,61 @@
+"""The vectorised converters must give exactly what the per-cell versions give.
+
+    python -m pytest test_converters.py
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import converters
+from converters import (clean_percentage, clean_percentage_series, crore_to_billion_usd,
+                        crore_to_billion_usd_series)
+
+# Unicode minus, thousands separators (Indian grouping too), percent signs, blanks,
+# whitespace, garbage, NaN/None, plain numbers and values on a rounding boundary
+TEXT_CASES = ['1,234', '−5,678', '3,32,475', '-42', '  12 ', '41.5', '1.', '.5', '1e3', 'inf', '-NaN',
+              '12.5%', ' 7% ', '1e-3%', '%7%', 'abc%', '', ' ', 'n/a', '−', '0.415', '2,075', np.nan, None]
+MIXED_CASES = TEXT_CASES + [0, 975.0, -3.25, 207.5, np.nan]
+
+
+def same(expected, actual):
+    pd.testing.assert_series_equal(expected.astype(float), actual.astype(float), check_names=False,
+                                   check_exact=True)
+
+
+# all-string columns go through the pyarrow kernels, mixed ones through pandas .str
+@pytest.fixture(params=['text', 'mixed', 'numeric'])
+def column(request):
+    if request.param == 'text':
+        return pd.Series(TEXT_CASES, dtype=object)
+    if request.param == 'mixed':
+        return pd.Series(MIXED_CASES, dtype=object)
+    return pd.Series([0, 975.0, -3.25, 207.5, np.nan, 1e9])
+
+
+@pytest.fixture(params=[True, False], ids=['pyarrow', 'pandas'])
+def backend(request, monkeypatch):
+    if not request.param:
+        monkeypatch.setattr(converters, 'pa', None)
+    elif converters.pa is None:
+        pytest.skip('pyarrow is not installed')
+
+
+@pytest.mark.parametrize('usd_inr', [converters.USD_INR, 75.5, 1])
+def test_crore_to_billion_usd_series(column, backend, usd_inr):
+    same(column.apply(crore_to_billion_usd, usd_inr=usd_inr), crore_to_billion_usd_series(column, usd_inr))
+
+
+def test_clean_percentage_series(column, backend):
+    same(column.apply(clean_percentage), clean_percentage_series(column))
+
+
+def test_keeps_index_and_name():
+    column = pd.Series(['1,000', '−200'], index=[10, 20], name='Revenue')
+    result = crore_to_billion_usd_series(column)
+    assert result.index.tolist() == [10, 20] and result.name == 'Revenue'
+    assert result.tolist() == [0.12, -0.02]
+
+
+def test_blank_and_missing_are_nan():
+    result = clean_percentage_series(pd.Series(['', 'n/a', None, np.nan, '5%'], dtype=object))
+    assert result.isna().tolist() == [True, True, True, True, False]
@@ -0,0 +1,82 @@
+
+import numpy as np
+import pandas as pd
+
+from company_names import company_ids
+
+# Columns compared between consecutive years
+VALUE_COLUMNS = ['Revenue', 'Profit', 'Rank']
+
+# Columns where a smaller number is better; their change is previous minus current,
+# so a company that climbs the list gets a positive Rank_Change
+LOWER_IS_BETTER = {'Rank'}
+
+def year_over_year(df, values=VALUE_COLUMNS):
+    """Changes between every pair of consecutive years a company appears in.
+
+    ``df`` is the long combined frame (Name, Year and ``values``, any number of
+    years). Companies are keyed on a ``Company_ID`` column when there is one
+    (clean.py adds it with company_names.NameIndex), otherwise on the exact
+    normalised name, company_ids(Name). Rows are sorted once on a single
+    (company, year) key and each row is compared with the row before it when
+    that row is the same company one year earlier, i.e. a groupby/shift without
+    the groupby. If a company appears twice in a year, its best-ranked row is
+    used.
+
+    Returns one row per company per year that has a previous year: Company_ID,
+    Name, Year, the current ``values`` and a <column>_Change for each.
+    """
+    df = df.dropna(subset=['Name'])
+    if 'Company_ID' in df:
+        ids = df['Company_ID'].to_numpy()
+    else:
+        ids = company_ids(df['Name'])
+    years = df['Year'].to_numpy()
+    columns = {column: pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+               for column in values}
+
+    # one int64 sort key per row: dense company number, then year
+    codes = pd.factorize(ids)[0].astype(np.int64)
+    offsets = years - (years.min() if len(years) else 0)
+    keys = codes * (int(offsets.max(initial=0)) + 1) + offsets
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    duplicated = sorted_keys[1:] == sorted_keys[:-1]
+    if duplicated.any():
+        # a company twice in one year: sort by rank first so the stable sort keeps the best one first
+        if 'Rank' in columns:
+            by_rank = np.argsort(columns['Rank'], kind='stable')
+            order = by_rank[np.argsort(keys[by_rank], kind='stable')]
+            sorted_keys = keys[order]
+            duplicated = sorted_keys[1:] == sorted_keys[:-1]
+        keep = np.concatenate(([True], ~duplicated))
+        order, sorted_keys = order[keep], sorted_keys[keep]
+    codes, years = codes[order], years[order]
+
+    # the previous sorted row is the same company one year earlier
+    pair = np.zeros(len(order), dtype=bool)
+    pair[1:] = (codes[1:] == codes[:-1]) & (sorted_keys[1:] == sorted_keys[:-1] + 1)
+    current = order[pair]
+    previous = order[np.flatnonzero(pair) - 1]
+
+    changes = pd.DataFrame({
+        'Company_ID': ids[current],
+        'Name': df['Name'].iloc[current].reset_index(drop=True),
+        'Year': years[pair],
+    })
+    for column, column_values in columns.items():
+        changes[column] = column_values[current]
+        if column in LOWER_IS_BETTER:
+            changes[f'{column}_Change'] = column_values[previous] - column_values[current]
+        else:
+            changes[f'{column}_Change'] = column_values[current] - column_values[previous]
+    return changes
+
+def add_year(changes, previous_year, new_year, values=VALUE_COLUMNS):
+    """Extend ``changes`` with a newly arrived year without recomputing the older ones.
+
+    ``previous_year`` only needs the rows of the latest year already in
+    ``changes``; only the pairs between it and ``new_year`` are computed.
+    """
+    new_changes = year_over_year(pd.concat([previous_year, new_year], ignore_index=True), values)
+    return pd.concat([changes, new_changes], ignore_index=True)
@@ -0,0 +1,130 @@
+"""Rows per second of create_diabetes_database: row by row vs bulk INSERT vs LOAD DATA.
+
+    python bench_create_database.py --rows 100000 10000000 --user root --password ...
+
+Needs a local MySQL or MariaDB server; the bench drops and refills
+diabetes_db.diabetes_data. For each size a synthetic diabetes CSV is written
+(--bad rows per million are malformed or out of range) and loaded with each
+mode; the row-by-row loader stops at the first bad row, so it only gets
+clean files and is skipped above --row-limit rows. LOAD DATA needs
+local_infile=ON on the server. After each bulk load the table is summarised,
+and the summaries of the modes must match, and diabetes_cube is checked
+against the table. Finally the report queries are timed reading one scan of
+diabetes_data vs reading diabetes_cube.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# the phase modules import schemas.py and profiler.py from the repository root; spawned workers
+# inherit the path
+if __name__ == '__main__':
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import create_database
+import sql_queries
+from create_database import COLUMNS, DB_CONFIG
+from diabetes_cube import CUBE_QUERY, check_cube
+
+GENDERS = ['Female', 'Male', 'Other']
+SMOKING = ['never', 'No Info', 'current', 'former', 'ever', 'not current']
+BAD_VALUES = {'age': 'unknown', 'bmi': '1000.5', 'diabetes': '2.5', 'gender': 'Not recorded at all'}
+
+SUMMARY = '''
+    SELECT COUNT(*), SUM(age), SUM(hypertension), SUM(heart_disease), SUM(bmi), SUM(HbA1c_level),
+           SUM(blood_glucose_level), SUM(diabetes), COUNT(DISTINCT gender, smoking_history)
+    FROM diabetes_data
+'''
+
+
+def write_csv(path, rows, bad_per_million, seed=0):
+    """Synthetic diabetes CSV; returns the number of bad rows in it."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'gender': rng.choice(GENDERS, rows, p=[0.58, 0.41, 0.01]),
+        'age': np.round(rng.uniform(0.1, 80, rows), 1),
+        'hypertension': (rng.random(rows) < 0.07).astype(int),
+        'heart_disease': (rng.random(rows) < 0.04).astype(int),
+        'smoking_history': rng.choice(SMOKING, rows),
+        'bmi': np.round(rng.normal(27.3, 6.6, rows).clip(10, 95), 2),
+        'HbA1c_level': rng.choice([3.5, 4.0, 4.8, 5.7, 6.1, 6.6, 9.0], rows),
+        'blood_glucose_level': rng.choice([80, 100, 126, 140, 155, 200, 280], rows),
+        'diabetes': (rng.random(rows) < 0.085).astype(int),
+    }, columns=COLUMNS).astype(str)
+    bad = rng.choice(rows, rows * bad_per_million // 1_000_000, replace=False)
+    for number, row in enumerate(bad):
+        column = list(BAD_VALUES)[number % len(BAD_VALUES)]
+        df.iloc[row, df.columns.get_loc(column)] = BAD_VALUES[column]
+    df.to_csv(path, index=False)
+    return len(bad)
+
+
+def table_summary():
+    import mysql.connector
+
+    conn = mysql.connector.connect(**DB_CONFIG)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(SUMMARY)
+        summary = tuple(float(value) for value in cursor.fetchone())
+        if check_cube(cursor):
+            raise SystemExit('diabetes_cube does not match diabetes_data')
+        return summary
+    finally:
+        conn.close()
+
+
+def run(label, path, rows, **options):
+    start = time.perf_counter()
+    if not create_database.create_diabetes_database(path, **options):
+        raise SystemExit(f'{label}: load failed')
+    elapsed = time.perf_counter() - start
+    print(f'{label:<28} {elapsed:>9.1f}s {rows / elapsed:>12,.0f} rows/s')
+    return table_summary()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 10_000_000])
+    parser.add_argument('--bad', type=int, default=100, help='bad rows per million in the bulk files')
+    parser.add_argument('--batch-size', type=int, default=create_database.BATCH_SIZE)
+    parser.add_argument('--row-limit', type=int, default=1_000_000, help='largest file loaded row by row')
+    parser.add_argument('--host', default=DB_CONFIG['host'])
+    parser.add_argument('--user', default=DB_CONFIG['user'])
+    parser.add_argument('--password', default=DB_CONFIG['password'])
+    args = parser.parse_args()
+    DB_CONFIG.update(host=args.host, user=args.user, password=args.password)
+
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in args.rows:
+            print(f'\n{rows:,} rows')
+            clean = os.path.join(directory, f'clean_{rows}.csv')
+            with_bad = os.path.join(directory, f'bad_{rows}.csv')
+            write_csv(clean, rows, 0)
+            bad = write_csv(with_bad, rows, args.bad)
+
+            if rows <= args.row_limit:
+                run('row by row (clean file)', clean, rows)
+            summaries = {}
+            for label, method in (('bulk INSERT', 'executemany'), ('LOAD DATA LOCAL INFILE', 'load_data')):
+                summaries[label] = run(label, with_bad, rows, bulk=True, method=method, batch_size=args.batch_size)
+            loaded = int(next(iter(summaries.values()))[0])
+            print(f'{bad:,} bad rows in the file, {rows - loaded:,} rejected; '
+                  f'same table contents: {len(set(summaries.values())) == 1}, cube consistent')
+
+            for label, fused_query in (('reports from a scan', sql_queries.FUSED_QUERY),
+                                       ('reports from the cube', CUBE_QUERY)):
+                reports = sql_queries.REPORTS + create_database.REPORTS
+                best = min(next(iter(sql_queries.run_reports(reports, config=DB_CONFIG,
+                                                             fused_query=fused_query).values()))[2]
+                           for _ in range(3))
+                print(f'{label:<28} {best * 1000:>9.1f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,18 @@
 import mysql.connector
 import csv
 import os
-from mysql.connector import Error
+import sys
+import tempfile
+from decimal import Decimal
+from mysql.connector import DataError, Error
+from diabetes_cube import CUBE_QUERY, add_to_cube, create_cube, create_triggers, drop_triggers
+from sql_queries import FUSED_QUERY, mysql_avg, mysql_round, prepare_cube, rollup, run_reports
+
+# schemas.py is a module of the repository root. pipeline.py puts the root on the path for its
+# stages; run as a script, this file puts it there itself.
+if __name__ == '__main__':
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from schemas import DIABETES, column_names, missing_columns, stream_csv
 
 # Database configuration
 DB_CONFIG = {
@@ -11,7 +22,125 @@ DB_CONFIG = {
     'database': 'diabetes_db'
 }
 
-def create_diabetes_database(csv_filename):
+# CSV columns, in the order they are inserted into diabetes_data; the diabetes schema of the
+# registry types them and rejects the values diabetes_data would not accept
+COLUMNS = column_names(DIABETES)
+
+# Rows per INSERT / LOAD DATA in bulk mode
+BATCH_SIZE = 50_000
+
+def _secondary_indexes(cursor):
+    # {index name: (unique, [column definitions])} for every index of diabetes_data except the primary key
+    cursor.execute('SHOW INDEX FROM diabetes_data')
+    names = [description[0] for description in cursor.description]
+    indexes = {}
+    for row in cursor.fetchall():
+        index = dict(zip(names, row))
+        if index['Key_name'] == 'PRIMARY':
+            continue
+        column = f"`{index['Column_name']}`" + (f"({index['Sub_part']})" if index['Sub_part'] else '')
+        indexes.setdefault(index['Key_name'], (not int(index['Non_unique']), []))[1].append(column)
+    return indexes
+
+def _has_columns(csv_filename):
+    missing = missing_columns(csv_filename, DIABETES)
+    if missing:
+        with open(csv_filename, 'r', encoding='utf-8') as file:
+            header = next(csv.reader(file), [])
+        print(f"\nError: Missing column in CSV file: {', '.join(missing)}")
+        print("Expected columns: " + ', '.join(COLUMNS))
+        print("Found columns:", header)
+    return not missing
+
+def bulk_load_diabetes_data(conn, cursor, csv_filename, method='executemany', batch_size=BATCH_SIZE,
+                            reject_filename=None):
+    """Load the CSV into diabetes_data in batches of ``batch_size`` rows.
+
+    The file is streamed with the diabetes schema (schemas.stream_csv), typed
+    a batch at a time. Valid rows are sent with one multi-row INSERT per batch
+    (``method='executemany'``) or with LOAD DATA LOCAL INFILE
+    (``method='load_data'``, needs local_infile on the server), and each
+    batch is committed. Rows that cannot be converted or parsed are written to
+    ``reject_filename`` (default: <csv name>_rejects.csv) with the reason
+    instead of stopping the load. Secondary indexes of diabetes_data are
+    dropped for the load and rebuilt at the end in one ALTER TABLE. The cube
+    triggers are dropped as well; each batch updates diabetes_cube with
+    add_to_cube in the same transaction instead. LOAD DATA skips or
+    truncates values with a warning rather than failing, which would leave
+    the cube counting rows diabetes_data does not hold, so a batch that
+    LOAD DATA does not store whole and unchanged stops the load (DataError).
+    """
+    if method not in ('executemany', 'load_data'):
+        raise ValueError(f"method must be 'executemany' or 'load_data', not {method!r}")
+    if reject_filename is None:
+        reject_filename = os.path.splitext(csv_filename)[0] + '_rejects.csv'
+
+    if not _has_columns(csv_filename):
+        return False
+
+    columns = ', '.join(COLUMNS)
+    insert = f"INSERT INTO diabetes_data ({columns}) VALUES ({', '.join(['%s'] * len(COLUMNS))})"
+    load_data = f"""
+        LOAD DATA LOCAL INFILE %s INTO TABLE diabetes_data
+        FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"' ESCAPED BY ''
+        LINES TERMINATED BY '\\n'
+        ({columns})
+    """
+
+    indexes = _secondary_indexes(cursor)
+    if indexes:
+        cursor.execute('ALTER TABLE diabetes_data ' + ', '.join(f'DROP INDEX `{name}`' for name in indexes))
+    drop_triggers(cursor)
+    cursor.execute('SET unique_checks = 0, foreign_key_checks = 0')
+
+    records_inserted = records_rejected = 0
+    try:
+        with open(reject_filename, 'w', newline='', encoding='utf-8') as reject_file:
+            rejects_writer = csv.writer(reject_file)
+            rejects_writer.writerow(['error', 'row'])
+
+            def reject(rejects):
+                nonlocal records_rejected
+                records_rejected += len(rejects)
+                rejects_writer.writerows(rejects)
+
+            for table in stream_csv(csv_filename, DIABETES, batch_size=batch_size, on_reject=reject):
+                rows = table.to_pandas()
+                if len(rows) and method == 'executemany':
+                    cursor.executemany(insert, list(zip(*(rows[column].tolist() for column in COLUMNS))))
+                elif len(rows):
+                    with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8') as batch_file:
+                        rows.to_csv(batch_file, header=False, index=False, lineterminator='\n', float_format='%.2f')
+                    try:
+                        cursor.execute(load_data, (batch_file.name,))
+                    finally:
+                        os.remove(batch_file.name)
+                    stored, warnings = cursor.rowcount, cursor.warning_count
+                    if stored != len(rows) or warnings:
+                        cursor.execute('SHOW WARNINGS LIMIT 3')
+                        details = '; '.join(str(warning[2]) for warning in cursor.fetchall())
+                        raise DataError(f"LOAD DATA stored {stored} of {len(rows)} rows with {warnings} "
+                                        f"warnings ({details}); the batch is rolled back")
+                add_to_cube(cursor, rows)
+                conn.commit()
+                records_inserted += len(rows)
+    finally:
+        # the DDL below commits implicitly, so drop a batch that did not finish first
+        conn.rollback()
+        cursor.execute('SET unique_checks = 1, foreign_key_checks = 1')
+        create_triggers(cursor)
+        if indexes:
+            cursor.execute('ALTER TABLE diabetes_data ' + ', '.join(
+                f"ADD {'UNIQUE ' if unique else ''}INDEX `{name}` ({', '.join(index_columns)})"
+                for name, (unique, index_columns) in indexes.items()))
+
+    print(f"\nSuccessfully inserted {records_inserted} records into the database.")
+    if records_rejected:
+        print(f"{records_rejected} rows could not be loaded; see {reject_filename}")
+    return True
+
+def create_diabetes_database(csv_filename, bulk=False, method='executemany', batch_size=BATCH_SIZE,
+                             reject_filename=None):
     if not os.path.exists(csv_filename):
         print(f"\nError: File '{csv_filename}' not found in the current directory.")
         print(f"Current directory: {os.getcwd()}")
@@ -25,7 +154,8 @@ def create_diabetes_database(csv_filename):
         conn = mysql.connector.connect(
             host=DB_CONFIG['host'],
             user=DB_CONFIG['user'],
-            password=DB_CONFIG['password']
+            password=DB_CONFIG['password'],
+            allow_local_infile=bulk and method == 'load_data'
         )
         
         cursor = conn.cursor()
@@ -50,21 +180,29 @@ def create_diabetes_database(csv_filename):
             )
         ''')
         
+        # Summary cube, kept up to date by triggers on diabetes_data
+        create_cube(cursor)
+        
         # Clear existing data
         cursor.execute('TRUNCATE TABLE diabetes_data')
+        cursor.execute('TRUNCATE TABLE diabetes_cube')
+        
+        if bulk:
+            return bulk_load_diabetes_data(conn, cursor, csv_filename, method, batch_size, reject_filename)
         
         # Read CSV file and insert data
         with open(csv_filename, 'r', encoding='utf-8') as file:
             print("\nFirst few lines of CSV file:")
             print(file.readline())  # Header line
             print(file.readline())  # First data line
-            file.seek(0)  # Reset file pointer to beginning
-            
-            csv_reader = csv.DictReader(file)
-            records_inserted = 0
+        if not _has_columns(csv_filename):
+            return False
             
-            for row in csv_reader:
-                try:
+        # typed by the diabetes schema; the first row it rejects stops the load
+        records_inserted = 0
+        try:
+            for table in stream_csv(csv_filename, DIABETES):
+                for row in zip(*(table.column(column).to_pylist() for column in COLUMNS)):
                     cursor.execute('''
                         INSERT INTO diabetes_data (
                             gender, age, hypertension, heart_disease, 
@@ -72,27 +210,11 @@ def create_diabetes_database(csv_filename):
                             blood_glucose_level, diabetes
                         )
                         VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    ''', (
-                        row['gender'],
-                        int(float(row['age'])),
-                        int(row['hypertension']),
-                        int(row['heart_disease']),
-                        row['smoking_history'],
-                        float(row['bmi']),
-                        float(row['HbA1c_level']),
-                        int(float(row['blood_glucose_level'])),
-                        int(row['diabetes'])
-                    ))
+                    ''', row)
                     records_inserted += 1
-                except KeyError as e:
-                    print(f"\nError: Missing column in CSV file: {e}")
-                    print("Expected columns: gender, age, hypertension, heart_disease, smoking_history, bmi, HbA1c_level, blood_glucose_level, diabetes")
-                    print("Found columns:", list(row.keys()))
-                    return False
-                except ValueError as e:
-                    print(f"\nError converting value in row {records_inserted + 1}: {e}")
-                    print("Row data:", row)
-                    return False
+        except ValueError as e:
+            print(f"\nError converting value after {records_inserted} rows: {e}")
+            return False
                 
         # Commit changes
         conn.commit()
@@ -111,54 +233,78 @@ def create_diabetes_database(csv_filename):
         if 'conn' in locals():
             conn.close()
 
-def query_database():
+def _age_groups(groups):
+    totals = rollup(groups, lambda group: ['0-19', '20-39', '40-59', '60+'][group['age_band']])
+    return (['age_group', 'total_count', 'diabetes_count', 'diabetes_percentage'],
+            [(age_group, total['patients'], total['diabetic'],
+              mysql_round(mysql_round(Decimal(total['diabetic']) / total['patients'], 4) * 100, 2))
+             for age_group, total in sorted(totals.items())])
+
+def _health_metrics(groups):
+    totals = rollup(groups, lambda group: group['diabetes'])
+    return (['diabetes', 'count', 'avg_bmi', 'avg_HbA1c', 'avg_glucose'],
+            [(diabetes, total['patients'],
+              *(mysql_round(mysql_avg(total[column], total['patients'], column), 2)
+                for column in ('bmi', 'HbA1c_level', 'blood_glucose_level')))
+             for diabetes, total in sorted(totals.items())])
+
+# Reports of query_database, in the form of sql_queries.REPORTS; both are rolled up from diabetes_cube
+# (or from one scan of diabetes_data)
+REPORTS = [
+    ("1. Diabetes prevalence by age group", "Diabetes prevalence by age group",
+     '''
+     SELECT 
+         CASE 
+             WHEN age < 20 THEN '0-19'
+             WHEN age < 40 THEN '20-39'
+             WHEN age < 60 THEN '40-59'
+             ELSE '60+'
+         END as age_group,
+         COUNT(*) as total_count,
+         SUM(diabetes) as diabetes_count,
+         ROUND(SUM(diabetes) / COUNT(*) * 100, 2) as diabetes_percentage
+     FROM diabetes_data
+     GROUP BY age_group
+     ORDER BY age_group
+     ''',
+     _age_groups),
+
+    ("2. Health metrics by diabetes status", "Health metrics by diabetes status",
+     '''
+     SELECT 
+         diabetes,
+         COUNT(*) as count,
+         ROUND(AVG(bmi), 2) as avg_bmi,
+         ROUND(AVG(HbA1c_level), 2) as avg_HbA1c,
+         ROUND(AVG(blood_glucose_level), 2) as avg_glucose
+     FROM diabetes_data
+     GROUP BY diabetes
+     ''',
+     _health_metrics),
+]
+
+def query_database(cube=True):
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        cursor = conn.cursor()
+        if cube:
+            prepare_cube(DB_CONFIG)
+        results = run_reports(REPORTS, config=DB_CONFIG, fused_query=CUBE_QUERY if cube else FUSED_QUERY)
         
         print("\nDiabetes Dataset Analysis:")
         
         # Check if we have any data
-        cursor.execute('SELECT COUNT(*) FROM diabetes_data')
-        count = cursor.fetchone()[0]
-        
-        if count == 0:
+        age_groups = results["Diabetes prevalence by age group"][1]
+        if not age_groups:
             print("No data found in the database.")
             return
             
         # Diabetes prevalence by age group
         print("\n1. Diabetes prevalence by age group:")
-        cursor.execute('''
-            SELECT 
-                CASE 
-                    WHEN age < 20 THEN '0-19'
-                    WHEN age < 40 THEN '20-39'
-                    WHEN age < 60 THEN '40-59'
-                    ELSE '60+'
-                END as age_group,
-                COUNT(*) as total_count,
-                SUM(diabetes) as diabetes_count,
-                ROUND(SUM(diabetes) / COUNT(*) * 100, 2) as diabetes_percentage
-            FROM diabetes_data
-            GROUP BY age_group
-            ORDER BY age_group
-        ''')
-        for row in cursor.fetchall():
+        for row in age_groups:
             print(f"Age group {row[0]}: {row[1]} people, {row[2]} with diabetes ({row[3]}%)")
         
         # Average BMI and HbA1c statistics by diabetes status
         print("\n2. Health metrics by diabetes status:")
-        cursor.execute('''
-            SELECT 
-                diabetes,
-                COUNT(*) as count,
-                ROUND(AVG(bmi), 2) as avg_bmi,
-                ROUND(AVG(HbA1c_level), 2) as avg_HbA1c,
-                ROUND(AVG(blood_glucose_level), 2) as avg_glucose
-            FROM diabetes_data
-            GROUP BY diabetes
-        ''')
-        for row in cursor.fetchall():
+        for row in results["Health metrics by diabetes status"][1]:
             status = "With diabetes" if row[0] == 1 else "Without diabetes"
             print(f"\n{status}:")
             print(f"Count: {row[1]}")
@@ -168,15 +314,23 @@ def query_database():
         
     except Error as e:
         print(f"Database error: {e}")
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals():
-            conn.close()
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Load the diabetes CSV into MySQL and run the analysis')
+    parser.add_argument('csv_file', nargs='?', help='CSV file (asked for when not given)')
+    parser.add_argument('--bulk', action='store_true',
+                        help='load in batches, writing bad rows to a reject file instead of stopping')
+    parser.add_argument('--load-data', action='store_true',
+                        help='with --bulk, send batches with LOAD DATA LOCAL INFILE instead of INSERT')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--rejects', help='reject file (default: <csv name>_rejects.csv)')
+    args = parser.parse_args()
+
     print("Current directory:", os.getcwd())
-    csv_file = input("Enter the CSV file name (e.g., diabetes.csv): ")
+    csv_file = args.csv_file or input("Enter the CSV file name (e.g., diabetes.csv): ")
     
-    if create_diabetes_database(csv_file):
+    if create_diabetes_database(csv_file, bulk=args.bulk, method='load_data' if args.load_data else 'executemany',
+                                batch_size=args.batch_size, reject_filename=args.rejects):
         query_database()
\ No newline at end of file
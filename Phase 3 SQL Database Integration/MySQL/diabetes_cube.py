@@ -0,0 +1,217 @@
+from decimal import Decimal
+import numpy as np
+import pandas as pd
+
+# Summary cube of diabetes_data: one row per gender, smoking history, age band (0-19, 20-39, 40-59, 60+)
+# and diabetes status, with the patient count and exact sums and sums of squares of the measures
+CUBE_TABLE = '''
+    CREATE TABLE IF NOT EXISTS diabetes_cube (
+        gender VARCHAR(10) NOT NULL,
+        smoking_history VARCHAR(20) NOT NULL,
+        age_band TINYINT NOT NULL,
+        diabetes TINYINT NOT NULL,
+        patients BIGINT NOT NULL,
+        age_sum BIGINT NOT NULL,
+        bmi_sum DECIMAL(20,2) NOT NULL,
+        bmi_sumsq DECIMAL(30,4) NOT NULL,
+        HbA1c_sum DECIMAL(20,2) NOT NULL,
+        HbA1c_sumsq DECIMAL(30,4) NOT NULL,
+        glucose_sum BIGINT NOT NULL,
+        glucose_sumsq DECIMAL(30,0) NOT NULL,
+        PRIMARY KEY (gender, smoking_history, age_band, diabetes)
+    )
+'''
+
+KEYS = ['gender', 'smoking_history', 'age_band', 'diabetes']
+MEASURES = ['patients', 'age_sum', 'bmi_sum', 'bmi_sumsq', 'HbA1c_sum', 'HbA1c_sumsq', 'glucose_sum',
+            'glucose_sumsq']
+
+AGE_BAND = 'CASE WHEN {age} < 20 THEN 0 WHEN {age} < 40 THEN 1 WHEN {age} < 60 THEN 2 ELSE 3 END'
+
+def _measures(row, sign=1):
+    # the measures contributed by one diabetes_data row (NEW or OLD inside a trigger)
+    values = [f'{row}.age', f'{row}.bmi', f'{row}.bmi * {row}.bmi', f'{row}.HbA1c_level',
+              f'{row}.HbA1c_level * {row}.HbA1c_level', f'{row}.blood_glucose_level',
+              f'{row}.blood_glucose_level * {row}.blood_glucose_level']
+    return [str(sign)] + [value if sign > 0 else f'-({value})' for value in values]
+
+def _upsert(row, sign):
+    keys = [f'{row}.gender', f'{row}.smoking_history', AGE_BAND.format(age=f'{row}.age'), f'{row}.diabetes']
+    upsert = f'''
+        INSERT INTO diabetes_cube ({', '.join(KEYS + MEASURES)})
+        VALUES ({', '.join(keys + _measures(row, sign))})
+        ON DUPLICATE KEY UPDATE {', '.join(f'{measure} = {measure} + VALUES({measure})' for measure in MEASURES)};
+    '''
+    # a removed row can leave its cell empty
+    return upsert if sign > 0 else upsert + 'DELETE FROM diabetes_cube WHERE patients = 0;'
+
+# Triggers that keep the cube in step with single-row changes to diabetes_data
+TRIGGERS = {
+    'diabetes_cube_insert': f'AFTER INSERT ON diabetes_data FOR EACH ROW BEGIN {_upsert("NEW", 1)} END',
+    'diabetes_cube_delete': f'AFTER DELETE ON diabetes_data FOR EACH ROW BEGIN {_upsert("OLD", -1)} END',
+    'diabetes_cube_update': f'AFTER UPDATE ON diabetes_data FOR EACH ROW BEGIN {_upsert("OLD", -1)} {_upsert("NEW", 1)} END',
+}
+
+# The cube recomputed from diabetes_data with one scan
+CUBE_FROM_BASE = f'''
+    SELECT
+        gender,
+        smoking_history,
+        {AGE_BAND.format(age='age')} as age_band,
+        diabetes,
+        COUNT(*),
+        SUM(age),
+        SUM(bmi),
+        SUM(bmi * bmi),
+        SUM(HbA1c_level),
+        SUM(HbA1c_level * HbA1c_level),
+        SUM(blood_glucose_level),
+        SUM(blood_glucose_level * blood_glucose_level)
+    FROM diabetes_data
+    GROUP BY gender, smoking_history, age_band, diabetes
+'''
+
+# The cube in the shape of sql_queries.FUSED_QUERY, so the same report rollups read it
+CUBE_QUERY = '''
+SELECT
+    gender,
+    smoking_history,
+    diabetes,
+    age_band,
+    patients,
+    diabetes * patients as diabetic,
+    age_sum as age,
+    bmi_sum as bmi,
+    HbA1c_sum as HbA1c_level,
+    glucose_sum as blood_glucose_level
+FROM diabetes_cube
+'''
+
+def create_cube(cursor):
+    cursor.execute(CUBE_TABLE)
+    create_triggers(cursor)
+
+def create_triggers(cursor):
+    cursor.execute("SHOW TRIGGERS LIKE 'diabetes_data'")
+    existing = {row[0] for row in cursor.fetchall()}
+    for name, body in TRIGGERS.items():
+        if name not in existing:
+            cursor.execute(f'CREATE TRIGGER {name} {body}')
+
+def drop_triggers(cursor):
+    # for bulk loads, which update the cube once per batch with add_to_cube instead
+    for name in TRIGGERS:
+        cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+
+def rebuild_cube(cursor):
+    """Recompute the whole cube from diabetes_data."""
+    cursor.execute('DELETE FROM diabetes_cube')
+    cursor.execute(f"INSERT INTO diabetes_cube ({', '.join(KEYS + MEASURES)}) {CUBE_FROM_BASE}")
+
+def ensure_cube(cursor):
+    """Create the cube if it is missing and fill it if it is empty while diabetes_data is not.
+
+    That is the state of a database loaded before the cube existed, or of a cube
+    created over a loaded table without --rebuild; read as it is, every report
+    would come back empty. Returns True if the cube was rebuilt (the caller commits).
+    A stale but non-empty cube is found by check_cube.
+    """
+    create_cube(cursor)
+    cursor.execute('SELECT EXISTS(SELECT 1 FROM diabetes_cube), EXISTS(SELECT 1 FROM diabetes_data)')
+    cube_rows, base_rows = cursor.fetchone()
+    if cube_rows or not base_rows:
+        return False
+    rebuild_cube(cursor)
+    return True
+
+def batch_cube(rows):
+    """Cube cells of a batch of diabetes_data rows, typed by the diabetes schema (schemas.DIABETES).
+
+    The DECIMAL(p,2) columns are summed as whole hundredths, so the sums are
+    exact like the ones MySQL computes.
+    """
+    bmi = np.round(rows['bmi'].to_numpy() * 100).astype(np.int64)
+    hba1c = np.round(rows['HbA1c_level'].to_numpy() * 100).astype(np.int64)
+    glucose = rows['blood_glucose_level'].to_numpy(dtype=np.int64)
+    age = rows['age'].to_numpy(dtype=np.int64)
+    cells = pd.DataFrame({
+        'gender': rows['gender'].to_numpy(),
+        'smoking_history': rows['smoking_history'].to_numpy(),
+        'age_band': np.select([age < 20, age < 40, age < 60], [0, 1, 2], 3),
+        'diabetes': rows['diabetes'].to_numpy(),
+        'patients': 1,
+        'age_sum': age,
+        'bmi_sum': bmi,
+        'bmi_sumsq': bmi * bmi,
+        'HbA1c_sum': hba1c,
+        'HbA1c_sumsq': hba1c * hba1c,
+        'glucose_sum': glucose,
+        'glucose_sumsq': glucose * glucose,
+    })
+    return cells.groupby(KEYS, as_index=False, sort=False).sum()
+
+def add_to_cube(cursor, rows):
+    """Add a batch of rows just inserted into diabetes_data to the cube, one upsert per cell."""
+    if not len(rows):
+        return
+    cells = batch_cube(rows)
+    values = []
+    for cell in cells.itertuples(index=False):
+        cell = cell._asdict()
+        values.append((cell['gender'], cell['smoking_history'], int(cell['age_band']), int(cell['diabetes']),
+                       int(cell['patients']), int(cell['age_sum']),
+                       *(Decimal(int(cell[measure])).scaleb(-2 if measure.endswith('_sum') else -4)
+                         for measure in ('bmi_sum', 'bmi_sumsq', 'HbA1c_sum', 'HbA1c_sumsq')),
+                       int(cell['glucose_sum']), int(cell['glucose_sumsq'])))
+    cursor.executemany(f'''
+        INSERT INTO diabetes_cube ({', '.join(KEYS + MEASURES)})
+        VALUES ({', '.join(['%s'] * len(KEYS + MEASURES))})
+        ON DUPLICATE KEY UPDATE {', '.join(f'{measure} = {measure} + VALUES({measure})' for measure in MEASURES)}
+    ''', values)
+
+def check_cube(cursor):
+    """Compare the cube with diabetes_data; returns the cells that differ as (key, cube row, base row)."""
+    cursor.execute(f"SELECT {', '.join(KEYS + MEASURES)} FROM diabetes_cube")
+    cube = {_cell_key(row): tuple(row[len(KEYS):]) for row in cursor.fetchall()}
+    cursor.execute(CUBE_FROM_BASE)
+    base = {_cell_key(row): tuple(row[len(KEYS):]) for row in cursor.fetchall()}
+    return [(key, cube.get(key), base.get(key)) for key in sorted(cube.keys() | base.keys(), key=str)
+            if cube.get(key) != base.get(key)]
+
+def _cell_key(row):
+    # VARCHAR keys compare case-insensitively in MySQL, so cells are matched the same way
+    return (row[0].casefold(), row[1].casefold(), int(row[2]), int(row[3]))
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    import mysql.connector
+    from mysql.connector import Error
+    from sql_queries import DB_CONFIG
+
+    parser = argparse.ArgumentParser(description='Check or rebuild the diabetes_data summary cube')
+    parser.add_argument('--rebuild', action='store_true', help='recompute the cube from diabetes_data first')
+    args = parser.parse_args()
+
+    try:
+        conn = mysql.connector.connect(**DB_CONFIG)
+        cursor = conn.cursor()
+        if ensure_cube(cursor):
+            print("The cube was empty; rebuilt it from diabetes_data.")
+            conn.commit()
+        elif args.rebuild:
+            rebuild_cube(cursor)
+            conn.commit()
+        start = time.perf_counter()
+        differences = check_cube(cursor)
+        print(f"Checked the cube against diabetes_data in {time.perf_counter() - start:.2f}s")
+        for key, cube_row, base_row in differences:
+            print(f"{key}: cube {cube_row}, diabetes_data {base_row}")
+        print("Cube is consistent." if not differences else f"{len(differences)} cells differ.")
+    except Error as e:
+        print(f"Database error: {e}")
+    finally:
+        if 'cursor' in locals():
+            cursor.close()
+        if 'conn' in locals():
+            conn.close()
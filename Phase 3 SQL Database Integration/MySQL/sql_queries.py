@@ -1,5 +1,10 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from decimal import Decimal, ROUND_HALF_UP
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, pooling
+from diabetes_cube import CUBE_QUERY, ensure_cube
 
 # Database configuration
 DB_CONFIG = {
@@ -9,95 +14,251 @@ DB_CONFIG = {
     'database': 'diabetes_db'
 }
 
+# Connections in the pool used to run report queries concurrently
+POOL_SIZE = 4
+
+def print_result(description, columns, rows):
+    print(f"\n{description}")
+    print("-" * 50)
+    print(" | ".join(columns))
+    print("-" * 50)
+    for row in rows:
+        print(" | ".join(str(value) for value in row))
+
 def execute_query(cursor, query, description):
     try:
         cursor.execute(query)
         results = cursor.fetchall()
-        
-        print(f"\n{description}")
-        print("-" * 50)
-        
         columns = [desc[0] for desc in cursor.description]
-        print(" | ".join(columns))
-        print("-" * 50)
-        
-        for row in results:
-            print(" | ".join(str(value) for value in row))
+        print_result(description, columns, results)
         
     except Error as e:
         print(f"Error executing query: {e}")
 
-def analyze_diabetes_data():
+# One scan of diabetes_data that every report below can be rolled up from: counts and sums per
+# gender, smoking history, diabetes status and age band (0-19, 20-39, 40-59, 60+), a few hundred rows
+FUSED_QUERY = """
+SELECT 
+    gender,
+    smoking_history,
+    diabetes,
+    CASE 
+        WHEN age < 20 THEN 0
+        WHEN age < 40 THEN 1
+        WHEN age < 60 THEN 2
+        ELSE 3
+    END as age_band,
+    COUNT(*) as patients,
+    SUM(diabetes) as diabetic,
+    SUM(age) as age,
+    SUM(bmi) as bmi,
+    SUM(HbA1c_level) as HbA1c_level,
+    SUM(blood_glucose_level) as blood_glucose_level
+FROM diabetes_data
+GROUP BY gender, smoking_history, diabetes, age_band
+"""
+
+MEASURES = ['patients', 'diabetic', 'age', 'bmi', 'HbA1c_level', 'blood_glucose_level']
+
+# Decimal places of each summed column, for averages computed the way MySQL's AVG does
+SCALES = {'age': 0, 'bmi': 2, 'HbA1c_level': 2, 'blood_glucose_level': 0}
+
+def mysql_round(value, places):
+    """ROUND(value, places) for exact values: halves round away from zero."""
+    return Decimal(value).quantize(Decimal(1).scaleb(-places), rounding=ROUND_HALF_UP)
+
+def mysql_avg(total, count, column):
+    # AVG of a DECIMAL(p, s) column is exact to s + 4 places (div_precision_increment)
+    return mysql_round(Decimal(total) / count, SCALES[column] + 4)
+
+def rollup(groups, key):
+    """Sum the MEASURES of the fused groups per key(group); returns {key: {measure: total}}."""
+    totals = {}
+    for group in groups:
+        total = totals.setdefault(key(group), dict.fromkeys(MEASURES, 0))
+        for measure in MEASURES:
+            total[measure] += group[measure]
+    return totals
+
+def under_40(group):
+    return 'Under 40' if group['age_band'] < 2 else '40-59' if group['age_band'] == 2 else '60 and above'
+
+# Reports of analyze_diabetes_data: (heading, description, query, rollup of the fused groups or None).
+# Each rollup returns the same columns and rows as its query.
+REPORTS = [
+    ("1. Total number of patients", "Total number of patients",
+     "SELECT COUNT(*) as total_patients FROM diabetes_data",
+     lambda groups: (['total_patients'], [(sum(group['patients'] for group in groups),)])),
+
+    ("2. Number of diabetic and non-diabetic patients", "Count of diabetic (1) vs non-diabetic (0) patients",
+     """
+     SELECT 
+         diabetes as is_diabetic,
+         COUNT(*) as patient_count
+     FROM diabetes_data
+     GROUP BY diabetes
+     """,
+     lambda groups: (['is_diabetic', 'patient_count'],
+                     [(key, total['patients'])
+                      for key, total in sorted(rollup(groups, lambda group: group['diabetes']).items())])),
+
+    (" 3. Gender distribution", "Number of patients by gender",
+     """
+     SELECT 
+         gender,
+         COUNT(*) as count
+     FROM diabetes_data
+     GROUP BY gender
+     """,
+     lambda groups: (['gender', 'count'],
+                     [(key, total['patients'])
+                      for key, total in sorted(rollup(groups, lambda group: group['gender']).items())])),
+
+    ("# 4. Average age and BMI", "Average age and BMI of all patients",
+     """
+     SELECT 
+         ROUND(AVG(age), 0) as avg_age,
+         ROUND(AVG(bmi), 1) as avg_bmi
+     FROM diabetes_data
+     """,
+     lambda groups: (['avg_age', 'avg_bmi'],
+                     [(mysql_round(mysql_avg(total['age'], total['patients'], 'age'), 0),
+                       mysql_round(mysql_avg(total['bmi'], total['patients'], 'bmi'), 1))
+                      for total in rollup(groups, lambda group: None).values()] or [(None, None)])),
+
+    ("5. Smoking history counts", "Smoking history distribution",
+     """
+     SELECT 
+         smoking_history,
+         COUNT(*) as count
+     FROM diabetes_data
+     GROUP BY smoking_history
+     ORDER BY count DESC
+     """,
+     lambda groups: (['smoking_history', 'count'],
+                     sorted(((key, total['patients'])
+                             for key, total in rollup(groups, lambda group: group['smoking_history']).items()),
+                            key=lambda row: -row[1]))),
+
+    ("6. Patients by age group", "Patients by age group",
+     """
+     SELECT 
+         CASE 
+             WHEN age < 40 THEN 'Under 40'
+             WHEN age < 60 THEN '40-59'
+             ELSE '60 and above'
+         END as age_group,
+         COUNT(*) as count
+     FROM diabetes_data
+     GROUP BY age_group
+     ORDER BY age_group
+     """,
+     lambda groups: (['age_group', 'count'],
+                     [(key, total['patients']) for key, total in sorted(rollup(groups, under_40).items())])),
+]
+
+@contextmanager
+def connection_pool(pool_size, config):
+    """A pool of ``pool_size`` connections (at least one), opened up front and closed on exit."""
+    pool = pooling.MySQLConnectionPool(pool_name='diabetes_reports', pool_size=max(1, pool_size), **config)
+    try:
+        yield pool
+    finally:
+        # the pool has no public close; this closes every connection that is back in the pool
+        pool._remove_connections()
+
+def _run_query(pool, query):
+    # one query on a pooled connection; returns (columns, rows, seconds)
+    conn = pool.get_connection()
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
         cursor = conn.cursor()
+        start = time.perf_counter()
+        cursor.execute(query)
+        rows = cursor.fetchall()
+        elapsed = time.perf_counter() - start
+        columns = [desc[0] for desc in cursor.description]
+        cursor.close()
+        return columns, rows, elapsed
+    finally:
+        conn.close()
+
+def run_reports(reports=REPORTS, fuse=True, pool_size=POOL_SIZE, config=DB_CONFIG, fused_query=FUSED_QUERY):
+    """Run ``reports`` and return {description: (columns, rows, seconds)} in report order.
+
+    With ``fuse``, every report that has a rollup is answered from one
+    ``fused_query``: the FUSED_QUERY scan, or CUBE_QUERY to read the
+    precomputed diabetes_cube. ``seconds`` is the time of that shared query. The
+    shared query and the queries of the other reports (all of them without
+    ``fuse``) run concurrently on a connection pool of up to ``pool_size``
+    connections, each timed on its own; when every report has a rollup, as in
+    REPORTS, that is a single query on a single connection. The pool is closed
+    before returning. ``config`` holds the connection settings.
+    """
+    queries = {}
+    for _, description, query, report_rollup in reports:
+        queries[fused_query if fuse and report_rollup else query] = None
+    if not queries:
+        return {}
+
+    pool_size = max(1, min(pool_size, len(queries)))
+    with connection_pool(pool_size, config) as pool, ThreadPoolExecutor(max_workers=pool_size) as executor:
+        futures = {query: executor.submit(_run_query, pool, query) for query in queries}
+        for query, future in futures.items():
+            queries[query] = future.result()
+
+    results = {}
+    for _, description, query, report_rollup in reports:
+        if fuse and report_rollup:
+            columns, rows, elapsed = queries[fused_query]
+            groups = [dict(zip(columns, row)) for row in rows]
+            results[description] = (*report_rollup(groups), elapsed)
+        else:
+            results[description] = queries[query]
+    return results
+
+def prepare_cube(config=DB_CONFIG):
+    """Make diabetes_cube ready for CUBE_QUERY: created if missing, rebuilt if empty over a loaded table."""
+    conn = mysql.connector.connect(**config)
+    try:
+        cursor = conn.cursor()
+        if ensure_cube(cursor):
+            print("diabetes_cube was empty; rebuilt it from diabetes_data")
+            conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+
+def analyze_diabetes_data(fuse=True, pool_size=POOL_SIZE, cube=True):
+    try:
+        if cube:
+            prepare_cube()
+        start = time.perf_counter()
+        results = run_reports(REPORTS, fuse, pool_size, fused_query=CUBE_QUERY if cube else FUSED_QUERY)
+        elapsed = time.perf_counter() - start
         
-        print("1. Total number of patients")
-        count_query = "SELECT COUNT(*) as total_patients FROM diabetes_data"
-        execute_query(cursor, count_query, "Total number of patients")
-        
-        print("2. Number of diabetic and non-diabetic patients")
-        diabetes_query = """
-        SELECT 
-            diabetes as is_diabetic,
-            COUNT(*) as patient_count
-        FROM diabetes_data
-        GROUP BY diabetes
-        """
-        execute_query(cursor, diabetes_query, "Count of diabetic (1) vs non-diabetic (0) patients")
-        
-        print(" 3. Gender distribution")
-        gender_query = """
-        SELECT 
-            gender,
-            COUNT(*) as count
-        FROM diabetes_data
-        GROUP BY gender
-        """
-        execute_query(cursor, gender_query, "Number of patients by gender")
-        
-        print("# 4. Average age and BMI")
-        avg_query = """
-        SELECT 
-            ROUND(AVG(age), 0) as avg_age,
-            ROUND(AVG(bmi), 1) as avg_bmi
-        FROM diabetes_data
-        """
-        execute_query(cursor, avg_query, "Average age and BMI of all patients")
-        
-        print("5. Smoking history counts")
-        smoking_query = """
-        SELECT 
-            smoking_history,
-            COUNT(*) as count
-        FROM diabetes_data
-        GROUP BY smoking_history
-        ORDER BY count DESC
-        """
-        execute_query(cursor, smoking_query, "Smoking history distribution")
+        for heading, description, _, _ in REPORTS:
+            print(heading)
+            columns, rows, _ = results[description]
+            print_result(description, columns, rows)
         
-        print("6. Patients by age group")
-        age_query = """
-        SELECT 
-            CASE 
-                WHEN age < 40 THEN 'Under 40'
-                WHEN age < 60 THEN '40-59'
-                ELSE '60 and above'
-            END as age_group,
-            COUNT(*) as count
-        FROM diabetes_data
-        GROUP BY age_group
-        ORDER BY age_group
-        """
-        execute_query(cursor, age_query, "Patients by age group")
+        print("\nQuery times" + (f" (fused reports share one {'cube read' if cube else 'scan'})" if fuse else ""))
+        print("-" * 50)
+        for description, (_, _, seconds) in results.items():
+            print(f"{description}: {seconds:.3f}s")
+        print(f"Total: {elapsed:.3f}s")
 
     except Error as e:
         print(f"Database error: {e}")
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals():
-            conn.close()
 
 if __name__ == "__main__":
-    analyze_diabetes_data()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Analyse diabetes_data')
+    parser.add_argument('--no-fuse', action='store_true',
+                        help='run every report as its own query (concurrently) instead of one shared scan')
+    parser.add_argument('--pool-size', type=int, default=POOL_SIZE)
+    parser.add_argument('--scan', action='store_true',
+                        help='roll the reports up from a scan of diabetes_data instead of diabetes_cube')
+    args = parser.parse_args()
+
+    analyze_diabetes_data(fuse=not args.no_fuse, pool_size=args.pool_size, cube=not args.scan)
\ No newline at end of file
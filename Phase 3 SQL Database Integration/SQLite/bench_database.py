@@ -0,0 +1,106 @@
+"""Load time of database.py, row by row (populate_database) vs bulk (bulk_populate_database).
+
+    python bench_database.py --rows 1000000
+
+Synthetic cleaned 2024 and 2023 files with ``--rows`` company-year rows in
+total are written to a scratch directory, and each mode builds its own
+database there from the same frames. At the end the two databases are
+compared table by table, and the bulk database must be back in its
+original journal mode (no WAL files left behind).
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# the phase modules import schemas.py and profiler.py from the repository root
+if __name__ == '__main__':
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import database
+
+CITIES = ['Mumbai', 'New Delhi', 'Bangalore', 'Chennai', 'Hyderabad', 'Kolkata', 'Pune', 'Ahmedabad']
+INDUSTRIES = ['Oil and gas', 'Banking', 'Infotech', 'Automotive', 'Iron and steel', 'Insurance', 'Utilities']
+
+
+def write_cleaned(directory, rows, seed=0):
+    """Cleaned files as clean.py writes them, half of the rows for each year."""
+    rng = np.random.default_rng(seed)
+    companies = rows // 2
+    names = pd.Series(np.arange(companies)).map('Company {}'.format)
+    for year in (2024, 2023):
+        df = pd.DataFrame({
+            'Rank': np.arange(1, companies + 1),
+            'Name': names,
+            'Industry': rng.choice(INDUSTRIES, companies),
+            'Revenue': np.round(rng.lognormal(1, 1.5, companies), 2),
+            'Profit': np.round(rng.normal(1, 3, companies), 2),
+            'Headquarters': rng.choice(CITIES, companies),
+            'Year': year,
+        })
+        if year == 2024:
+            df['Forbes_Rank'] = df['Rank'] + 40
+            df['Assets'] = np.round(rng.lognormal(2, 1.5, companies), 1)
+            df['Value'] = np.round(rng.lognormal(2, 1.5, companies), 1)
+        else:
+            df['Revenue_Growth'] = np.round(rng.normal(10, 20, companies), 1)
+            df['State_Controlled'] = rng.random(companies) < 0.2
+        df.to_csv(os.path.join(directory, f'cleaned_india_companies_{year}.csv'), index=False)
+
+
+def load(db_path, frames, bulk):
+    conn = sqlite3.connect(db_path)
+    start = time.perf_counter()
+    database.create_tables(conn)
+    if bulk:
+        database.bulk_populate_database(conn, *frames)
+    else:
+        database.populate_database(conn, *frames)
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed
+
+
+def same_tables(first, second):
+    with sqlite3.connect(first) as a, sqlite3.connect(second) as b:
+        for table in ('industry_categories', 'cities', 'companies', 'financial_data'):
+            query = f'SELECT * FROM {table} ORDER BY 1'
+            for row_a, row_b in zip(a.execute(query), b.execute(query)):
+                if row_a != row_b:
+                    return False
+            if a.execute(f'SELECT COUNT(*) FROM {table}').fetchone() != b.execute(
+                    f'SELECT COUNT(*) FROM {table}').fetchone():
+                return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000, help='company-year rows across both files')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_cleaned(directory, args.rows)
+        frames = database.load_inputs(*(os.path.join(directory, f'cleaned_india_companies_{year}.csv')
+                                        for year in (2024, 2023)))
+        databases = {}
+        print(f'{args.rows:,} company-year rows')
+        for label, bulk in (('row by row', False), ('bulk', True)):
+            databases[label] = os.path.join(directory, label.replace(' ', '_') + '.db')
+            elapsed = load(databases[label], frames, bulk)
+            print(f'{label:<12} {elapsed:>8.1f}s {args.rows / elapsed:>12,.0f} rows/s')
+        print('same tables:', same_tables(*databases.values()))
+        with sqlite3.connect(databases['bulk']) as db:
+            journal_mode = db.execute('PRAGMA journal_mode').fetchone()[0]
+        db.close()
+        print(f'bulk journal mode afterwards: {journal_mode}, WAL file left: '
+              f'{os.path.exists(databases["bulk"] + "-wal")}')
+
+
+if __name__ == '__main__':
+    main()
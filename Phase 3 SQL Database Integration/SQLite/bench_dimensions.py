@@ -0,0 +1,107 @@
+"""Storage and GROUP BY time of companies with integer industry/city keys vs free-text columns.
+
+    python bench_dimensions.py --companies 1000000
+
+Synthetic cleaned files (bench_database.write_cleaned) are bulk loaded and
+indexed with database.py. For comparison, companies is also copied into
+companies_text with the industry and headquarters strings stored on every
+row, indexed the same way. The report gives the pages each layout takes
+(from dbstat) and the time of the industry_summary aggregation grouped on
+industry_id vs on the industry text.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+# the phase modules import schemas.py and profiler.py from the repository root
+if __name__ == '__main__':
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import database
+from bench_database import write_cleaned
+
+TEXT_GROUP_BY = '''
+    SELECT
+        c.industry,
+        f.year,
+        COUNT(*) as company_count,
+        SUM(f.revenue) as total_revenue,
+        SUM(f.profit) as total_profit,
+        AVG(f.revenue) as avg_revenue,
+        AVG(f.profit) as avg_profit
+    FROM companies_text c
+    JOIN financial_data f ON c.company_id = f.company_id
+    GROUP BY c.industry, f.year
+'''
+
+
+def best_of(conn, query, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = conn.execute(query).fetchall()
+        times.append(time.perf_counter() - start)
+    return min(times), rows
+
+
+def table_bytes(conn, tables):
+    placeholders = ', '.join('?' * len(tables))
+    return conn.execute(f'''
+        SELECT SUM(d.pgsize) FROM dbstat d
+        JOIN sqlite_master m ON m.name = d.name
+        WHERE m.tbl_name IN ({placeholders})
+    ''', tables).fetchone()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--companies', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_cleaned(directory, 2 * args.companies)
+        frames = database.load_inputs(*(os.path.join(directory, f'cleaned_india_companies_{year}.csv')
+                                        for year in (2024, 2023)))
+        conn = sqlite3.connect(os.path.join(directory, 'india_companies.db'))
+        database.create_tables(conn)
+        database.bulk_populate_database(conn, *frames)
+        database.create_indexes(conn)
+        database.create_views(conn)
+        with conn:
+            conn.execute('''
+            CREATE TABLE companies_text (
+                company_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                industry TEXT,
+                headquarters TEXT,
+                UNIQUE(name)
+            )''')
+            conn.execute('''
+            INSERT INTO companies_text
+            SELECT c.company_id, c.name, i.industry_name, ct.city_name
+            FROM companies c
+            LEFT JOIN industry_categories i ON i.industry_id = c.industry_id
+            LEFT JOIN cities ct ON ct.city_id = c.city_id
+            ''')
+            conn.execute('CREATE INDEX idx_companies_text_industry ON companies_text(industry)')
+        conn.execute('ANALYZE')
+
+        keyed = table_bytes(conn, ['companies', 'industry_categories', 'cities'])
+        text = table_bytes(conn, ['companies_text'])
+        keyed_time, keyed_rows = best_of(conn, 'SELECT * FROM industry_summary')
+        text_time, text_rows = best_of(conn, TEXT_GROUP_BY)
+        conn.close()
+
+    print(f'{args.companies:,} companies, 2 years')
+    print(f'{"":<34}{"text columns":>14}{"integer keys":>14}')
+    print(f'{"companies (+ dimensions), MB":<34}{text / 1e6:>14.1f}{keyed / 1e6:>14.1f}')
+    print(f'{"industry_summary, s":<34}{text_time:>14.2f}{keyed_time:>14.2f}')
+    same = sorted(text_rows) == sorted(row[1:] for row in keyed_rows)
+    print(f'storage {1 - keyed / text:.0%} smaller, group by {text_time / keyed_time:.1f}x faster, same groups: {same}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""Latency of the example queries on views vs indexed views vs summary tables.
+
+    python bench_summaries.py --companies 100000 1000000
+
+For each size, synthetic cleaned files (bench_database.write_cleaned, both
+years for every company) are bulk loaded into a fresh india_companies.db.
+The view-based example queries are then timed without the indexes, with
+create_indexes(), and against the tables of create_summary_tables(). Then
+--changes financial rows are updated and refresh_summaries() is timed against
+a full rebuild; the refreshed tables are checked against the views.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# the phase modules import schemas.py and profiler.py from the repository root
+if __name__ == '__main__':
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import database
+from bench_database import write_cleaned
+
+
+def best_of(function, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def time_queries(conn, materialized):
+    queries = database.create_example_queries(materialized)
+    return {name: best_of(lambda: conn.execute(query).fetchall()) for name, query in queries.items()}
+
+
+def matches_views(conn):
+    for table, view, key in database.SUMMARY_TABLES:
+        order = ', '.join(key)
+        expected = pd.read_sql_query(f'SELECT * FROM {view} ORDER BY {order}', conn)
+        actual = pd.read_sql_query(f'SELECT * FROM {table} ORDER BY {order}', conn)
+        # sums may be added up in a different order, so compare with a tolerance
+        try:
+            pd.testing.assert_frame_equal(expected, actual, check_exact=False)
+        except AssertionError:
+            return False
+    return True
+
+
+def run(directory, changes):
+    frames = database.load_inputs(*(os.path.join(directory, f'cleaned_india_companies_{year}.csv')
+                                    for year in (2024, 2023)))
+    conn = sqlite3.connect(os.path.join(directory, 'india_companies.db'))
+    database.create_tables(conn)
+    database.bulk_populate_database(conn, *frames)
+    database.create_views(conn)
+    results = {'views': time_queries(conn, False)}
+    database.create_indexes(conn)
+    results['indexed views'] = time_queries(conn, False)
+
+    start = time.perf_counter()
+    database.create_summary_tables(conn)
+    build = time.perf_counter() - start
+    results['summary tables'] = time_queries(conn, True)
+
+    # change some financial rows and one company's industry, then refresh
+    rng = np.random.default_rng(1)
+    rows = conn.execute('SELECT MAX(financial_id) FROM financial_data').fetchone()[0]
+    updates = [(float(factor), int(row)) for factor, row in
+               zip(rng.uniform(0.5, 1.5, changes), rng.choice(rows, changes, replace=False) + 1)]
+    with conn:
+        conn.executemany('UPDATE financial_data SET revenue = revenue * ? WHERE financial_id = ?', updates)
+        new_industry = database.dimension_id(conn, 'Industry', 'Another industry')
+        conn.execute('UPDATE companies SET industry_id = ? WHERE company_id = 1', (new_industry,))
+    start = time.perf_counter()
+    database.refresh_summaries(conn)
+    incremental = time.perf_counter() - start
+    same = matches_views(conn)
+    start = time.perf_counter()
+    database.refresh_summaries(conn, full=True)
+    full = time.perf_counter() - start
+
+    conn.close()
+    return results, build, incremental, full, same
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--companies', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--changes', type=int, default=1000, help='financial rows changed before the refresh')
+    args = parser.parse_args()
+
+    for companies in args.companies:
+        with tempfile.TemporaryDirectory() as directory:
+            write_cleaned(directory, 2 * companies)
+            results, build, incremental, full, same = run(directory, args.changes)
+
+        print(f'\n{companies:,} companies, 2 years')
+        labels = list(results)
+        print(f'{"query":<40}' + ''.join(f'{label:>16}' for label in labels))
+        for name in results['views']:
+            print(f'{name:<40}' + ''.join(f'{results[label][name] * 1000:>14.2f}ms' for label in labels))
+        print(f'create_summary_tables {build:.2f}s; after {args.changes:,} changed rows: '
+              f'refresh_summaries {incremental * 1000:.0f}ms, full refresh {full:.2f}s, matches views: {same}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,29 +1,84 @@
+import os
 import sqlite3
+import sys
 import pandas as pd
 from datetime import datetime
+from itertools import repeat
 
-# Read the cleaned CSV files
-df_2024 = pd.read_csv('cleaned_india_companies_2024.csv')
-df_2023 = pd.read_csv('cleaned_india_companies_2023.csv')
+# schemas.py is a module of the repository root. pipeline.py puts the root on the path for its
+# stages; run as a script, this file puts it there itself.
+if __name__ == '__main__':
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from schemas import FORBES_CLEANED_2023, FORBES_CLEANED_2024, missing_columns, read_csv
 
-# Create SQLite connection
-conn = sqlite3.connect('india_companies.db')
-cursor = conn.cursor()
+# Schema version of the Parquet files written by Phase 2 (clean.py) that this loader understands
+SCHEMA_VERSION = 2
 
-# Create tables
-def create_tables():
-    # Companies table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS companies (
+# Columns used below; anything else in the cleaned files is not read
+COLUMNS = ['Company_ID', 'Name', 'Industry', 'Headquarters', 'Rank', 'Revenue', 'Profit', 'Assets', 'Value',
+           'Revenue_Growth', 'State_Controlled', 'Forbes_Rank']
+
+def load_cleaned(csv_path, schema):
+    """Read a cleaned dataset, preferring the typed Parquet copy next to the CSV.
+
+    The Parquet file is memory-mapped and only COLUMNS are read; Industry and
+    Headquarters come back as categoricals. Falls back to the CSV when there is
+    no Parquet file, read with ``schema`` (the same COLUMNS and types). Either
+    way, COLUMNS the file does not have (such as Company_ID) are left out.
+    """
+    path = os.path.splitext(csv_path)[0] + '.parquet'
+    if not os.path.exists(path):
+        missing = missing_columns(csv_path, schema, COLUMNS)
+        return read_csv(csv_path, schema, columns=[column for column in COLUMNS if column not in missing])
+
+    import pyarrow.parquet as pq
+
+    schema = pq.read_schema(path, memory_map=True)
+    version = (schema.metadata or {}).get(b'schema_version', b'').decode()
+    if version != str(SCHEMA_VERSION):
+        raise ValueError(f"{path} has schema version {version or 'none'}, expected {SCHEMA_VERSION}; "
+                         "re-run clean.py")
+    columns = [column for column in COLUMNS if column in schema.names]
+    return pq.read_table(path, columns=columns, memory_map=True).to_pandas()
+
+# financial_data columns filled from the cleaned files: (column, cleaned column, value when it is missing)
+FINANCIAL_COLUMNS = [
+    ('rank', 'Rank', None),
+    ('revenue', 'Revenue', None),
+    ('profit', 'Profit', None),
+    ('assets', 'Assets', None),
+    ('market_value', 'Value', None),
+    ('revenue_growth', 'Revenue_Growth', None),
+    ('state_controlled', 'State_Controlled', False),
+    ('forbes_rank', 'Forbes_Rank', None),
+]
+
+# Pragmas used while bulk loading: no fsync per write, temporary tables in memory, 256 MB cache
+BULK_PRAGMAS = {'synchronous': 'OFF', 'temp_store': 'MEMORY', 'cache_size': -256000}
+
+def load_inputs(cleaned_2024='cleaned_india_companies_2024.csv', cleaned_2023='cleaned_india_companies_2023.csv'):
+    """The cleaned 2024 and 2023 frames the populate functions take."""
+    return load_cleaned(cleaned_2024, FORBES_CLEANED_2024), load_cleaned(cleaned_2023, FORBES_CLEANED_2023)
+
+# Companies table, also used to rebuild an old one in migrate_companies()
+COMPANIES_TABLE = '''
+    CREATE TABLE IF NOT EXISTS {table} (
         company_id INTEGER PRIMARY KEY AUTOINCREMENT,
         name TEXT NOT NULL,
-        industry TEXT,
-        headquarters TEXT,
+        industry_id INTEGER,
+        city_id INTEGER,
+        FOREIGN KEY (industry_id) REFERENCES industry_categories(industry_id),
+        FOREIGN KEY (city_id) REFERENCES cities(city_id),
         UNIQUE(name)
-    )''')
+    )'''
+
+# Create tables
+def create_tables(conn):
+    # Companies table
+    conn.execute(COMPANIES_TABLE.format(table='companies'))
 
     # Financial data table
-    cursor.execute('''
+    conn.execute('''
     CREATE TABLE IF NOT EXISTS financial_data (
         financial_id INTEGER PRIMARY KEY AUTOINCREMENT,
         company_id INTEGER,
@@ -41,14 +96,14 @@ def create_tables():
     )''')
 
     # Industry categories table
-    cursor.execute('''
+    conn.execute('''
     CREATE TABLE IF NOT EXISTS industry_categories (
         industry_id INTEGER PRIMARY KEY AUTOINCREMENT,
         industry_name TEXT UNIQUE
     )''')
 
     # Cities table
-    cursor.execute('''
+    conn.execute('''
     CREATE TABLE IF NOT EXISTS cities (
         city_id INTEGER PRIMARY KEY AUTOINCREMENT,
         city_name TEXT UNIQUE,
@@ -56,57 +111,235 @@ def create_tables():
     )''')
 
     conn.commit()
+    migrate_companies(conn)
 
-def insert_company(name, industry, headquarters):
-    cursor.execute('''
-    INSERT OR IGNORE INTO companies (name, industry, headquarters)
+def migrate_companies(conn):
+    """Move a companies table with industry and headquarters text columns to integer keys.
+
+    Databases built before companies stored industry_id and city_id keep
+    their rows and company_ids; the names go into the dimension tables. The
+    summary tables and triggers built on the old columns are dropped, and
+    create_views() / create_summary_tables() create them again. Returns
+    whether anything was migrated.
+    """
+    columns = {column for _, column, *_ in conn.execute('PRAGMA table_info(companies)')}
+    if 'industry' not in columns:
+        return False
+    with conn:
+        triggers = conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' "
+                                "AND tbl_name IN ('companies', 'financial_data')").fetchall()
+        for (trigger,) in triggers:
+            conn.execute(f'DROP TRIGGER {trigger}')
+        for _, view, _ in SUMMARY_TABLES:
+            conn.execute(f'DROP VIEW IF EXISTS {view}')
+        for table in [table for table, _, _ in SUMMARY_TABLES] + ['summary_changes']:
+            conn.execute(f'DROP TABLE IF EXISTS {table}')
+        for column, (table, id_column, name_column) in zip(('industry', 'headquarters'), DIMENSIONS.values()):
+            # each name once (an ignored duplicate would still use up a key), in company order,
+            # so the keys come out as a fresh load would give them
+            conn.execute(f'INSERT OR IGNORE INTO {table} ({name_column}) SELECT {column} FROM companies '
+                         f'WHERE {column} IS NOT NULL GROUP BY {column} ORDER BY MIN(company_id)')
+        conn.execute(COMPANIES_TABLE.format(table='companies_migrated'))
+        conn.execute('''
+        INSERT INTO companies_migrated (company_id, name, industry_id, city_id)
+        SELECT c.company_id, c.name, i.industry_id, ct.city_id
+        FROM companies c
+        LEFT JOIN industry_categories i ON i.industry_name = c.industry
+        LEFT JOIN cities ct ON ct.city_name = c.headquarters
+        ORDER BY c.company_id
+        ''')
+        conn.execute('DROP TABLE companies')
+        conn.execute('ALTER TABLE companies_migrated RENAME TO companies')
+    return True
+
+# Dimension tables behind companies.industry_id and companies.city_id: (table, id column, name column)
+DIMENSIONS = {
+    'Industry': ('industry_categories', 'industry_id', 'industry_name'),
+    'Headquarters': ('cities', 'city_id', 'city_name'),
+}
+
+def dimension_id(conn, column, name, cache=None):
+    """Integer key of one industry or city name, adding it to its dimension table when new.
+
+    ``column`` is the cleaned column ('Industry' or 'Headquarters'); a missing
+    name gets None. A ``cache`` dict (table -> {name: id}) shared by the calls
+    of one load looks each industry or city up in SQLite once.
+    """
+    if pd.isna(name):
+        return None
+    table, id_column, name_column = DIMENSIONS[column]
+    cache = {} if cache is None else cache
+    if table not in cache:
+        cache[table] = dict(conn.execute(f'SELECT {name_column}, {id_column} FROM {table}'))
+    cache = cache[table]
+    if name not in cache:
+        conn.execute(f'INSERT OR IGNORE INTO {table} ({name_column}) VALUES (?)', (name,))
+        cache[name] = conn.execute(f'SELECT {id_column} FROM {table} WHERE {name_column} = ?',
+                                   (name,)).fetchone()[0]
+    return cache[name]
+
+def dimension_ids(conn, column, names, cache=None):
+    """dimension_id for a whole column; each distinct name is looked up once, in order of first appearance."""
+    names = pd.Series(names, dtype=object)
+    cache = {} if cache is None else cache
+    ids = {name: dimension_id(conn, column, name, cache) for name in names.dropna().unique()}
+    return _sql_values(names.map(ids).astype('Int64'))
+
+def insert_company(conn, name, industry, headquarters, cache=None):
+    industry_id = dimension_id(conn, 'Industry', industry, cache)
+    city_id = dimension_id(conn, 'Headquarters', headquarters, cache)
+    conn.execute('''
+    INSERT OR IGNORE INTO companies (name, industry_id, city_id)
     VALUES (?, ?, ?)
-    ''', (name, industry, headquarters))
+    ''', (name, industry_id, city_id))
     
-    cursor.execute('SELECT company_id FROM companies WHERE name = ?', (name,))
-    return cursor.fetchone()[0]
+    return conn.execute('SELECT company_id FROM companies WHERE name = ?', (name,)).fetchone()[0]
 
-def insert_financial_data(company_id, data, year):
-    cursor.execute('''
+def insert_financial_data(conn, company_id, data, year):
+    conn.execute('''
     INSERT OR REPLACE INTO financial_data 
     (company_id, year, rank, revenue, profit, assets, market_value, 
      revenue_growth, state_controlled, forbes_rank)
     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (
-        company_id,
-        year,
-        data.get('Rank'),
-        data.get('Revenue'),
-        data.get('Profit'),
-        data.get('Assets'),
-        data.get('Value'),
-        data.get('Revenue_Growth'),
-        data.get('State_Controlled', False),
-        data.get('Forbes_Rank')
-    ))
-
-def populate_database():
+    ''', (company_id, year, *(data.get(cleaned, default) for _, cleaned, default in FINANCIAL_COLUMNS)))
+
+def canonical_names(*frames):
+    """Company name to store for each row of each frame.
+
+    clean.py gives all spellings of a company ('Reliance Industries',
+    'Reliance Industries Ltd.') one Company_ID; every row is stored under the
+    first name seen for its ID, so the spellings share one companies row.
+    Files without Company_ID keep their names as they are.
+
+    Each frame holds one year, so a company appearing twice in it means two
+    companies were given one ID (or one name); that raises ValueError rather
+    than letting one row overwrite the other's financial_data.
+    """
+    if all('Company_ID' in df for df in frames):
+        ids = pd.concat([df[['Company_ID', 'Name']] for df in frames])
+        first_names = ids.drop_duplicates('Company_ID').set_index('Company_ID')['Name']
+        names = [df['Company_ID'].map(first_names) for df in frames]
+    else:
+        names = [df['Name'] for df in frames]
+    for df, frame_names in zip(frames, names):
+        repeated = frame_names.duplicated(keep=False)
+        if repeated.any():
+            examples = sorted(df.loc[repeated, 'Name'].astype(str).unique())[:6]
+            raise ValueError(f'{repeated.sum()} rows of one year share a company: {", ".join(examples)}')
+    return names
+
+def populate_database(conn, df_2024, df_2023):
+    names_2024, names_2023 = canonical_names(df_2024, df_2023)
+    cache = {}
+
     # Process 2024 data
-    for _, row in df_2024.iterrows():
-        company_id = insert_company(row['Name'], row['Industry'], row['Headquarters'])
-        insert_financial_data(company_id, row, 2024)
+    for (_, row), name in zip(df_2024.iterrows(), names_2024):
+        company_id = insert_company(conn, name, row['Industry'], row['Headquarters'], cache)
+        insert_financial_data(conn, company_id, row, 2024)
 
     # Process 2023 data
-    for _, row in df_2023.iterrows():
-        company_id = insert_company(row['Name'], row['Industry'], row['Headquarters'])
-        insert_financial_data(company_id, row, 2023)
+    for (_, row), name in zip(df_2023.iterrows(), names_2023):
+        company_id = insert_company(conn, name, row['Industry'], row['Headquarters'], cache)
+        insert_financial_data(conn, company_id, row, 2023)
 
     conn.commit()
 
-# Create useful views
-def create_views():
+def _sql_values(values):
+    # plain Python values for sqlite3; missing values become NULL
+    values = values.astype(object)
+    return values.where(values.notna(), None).tolist()
+
+def _column_values(df, column, default=None):
+    return _sql_values(df[column]) if column in df else repeat(default, len(df))
+
+def bulk_populate_database(conn, df_2024, df_2023):
+    """Set-based version of populate_database for large inputs.
+
+    All rows go into a temporary staging table with one executemany, companies
+    are inserted from it with one INSERT ... SELECT, and financial rows get
+    their company_id from a single join against companies. Everything runs in
+    one transaction, in WAL mode and with BULK_PRAGMAS for the load; the
+    connection's journal mode and pragmas are restored afterwards. The rows
+    are applied in file order, so the result is the same as populate_database:
+    the first row of a name sets its industry and headquarters.
+    """
+    names_2024, names_2023 = canonical_names(df_2024, df_2023)
+    cache = {}
+    financial_columns = ', '.join(column for column, _, _ in FINANCIAL_COLUMNS)
+
+    # journal_mode is stored in the database file, so it is put back as well: later users of the
+    # database should not inherit WAL and its -wal/-shm files from one bulk load
+    previous = {pragma: conn.execute(f'PRAGMA {pragma}').fetchone()[0] for pragma in ('journal_mode', *BULK_PRAGMAS)}
+    conn.execute('PRAGMA journal_mode = WAL')
+    for pragma, value in BULK_PRAGMAS.items():
+        conn.execute(f'PRAGMA {pragma} = {value}')
+    try:
+        with conn:
+            conn.execute(f'''
+            CREATE TEMP TABLE staging (
+                seq INTEGER PRIMARY KEY,
+                name TEXT,
+                industry_id INTEGER,
+                city_id INTEGER,
+                year INTEGER,
+                {financial_columns}
+            )''')
+            for df, names, year in ((df_2024, names_2024, 2024), (df_2023, names_2023, 2023)):
+                rows = zip(
+                    _sql_values(names),
+                    *(dimension_ids(conn, column, df[column], cache) if column in df else repeat(None, len(df))
+                      for column in DIMENSIONS),
+                    repeat(year),
+                    *(_column_values(df, cleaned, default) for _, cleaned, default in FINANCIAL_COLUMNS)
+                )
+                conn.executemany(f'''
+                INSERT INTO staging (name, industry_id, city_id, year, {financial_columns})
+                VALUES ({', '.join('?' * (4 + len(FINANCIAL_COLUMNS)))})
+                ''', rows)
+
+            conn.execute('''
+            INSERT OR IGNORE INTO companies (name, industry_id, city_id)
+            SELECT name, industry_id, city_id FROM staging ORDER BY seq
+            ''')
+            conn.execute(f'''
+            INSERT OR REPLACE INTO financial_data (company_id, year, {financial_columns})
+            SELECT c.company_id, s.year, {', '.join('s.' + column for column, _, _ in FINANCIAL_COLUMNS)}
+            FROM staging s
+            JOIN companies c ON c.name = s.name
+            ORDER BY s.seq
+            ''')
+            conn.execute('DROP TABLE staging')
+    finally:
+        for pragma, value in previous.items():
+            conn.execute(f'PRAGMA {pragma} = {value}')
+
+# Indexes for the views and example queries: (year, revenue) reads "top N by revenue in a year" off
+# the end of the index, (company_id, year, ...) covers both sides of the yoy_comparison self-join.
+# (year, revenue) is deliberately not covering: SQLite would then drive the self-join from it, in
+# revenue order, instead of scanning companies in order
+INDEXES = {
+    'idx_financial_year_revenue': 'financial_data(year, revenue)',
+    'idx_financial_company_year': 'financial_data(company_id, year, revenue, profit)',
+    'idx_companies_industry': 'companies(industry_id)',
+}
+
+def create_indexes(conn):
+    # created after loading, so the bulk load does not maintain them row by row
+    for name, columns in INDEXES.items():
+        conn.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {columns}')
+    conn.execute('ANALYZE')
+    conn.commit()
+
+# Create useful views; they are replaced every time, so an existing database gets the current definitions
+def create_views(conn):
     # Year-over-year comparison view
-    cursor.execute('''
-    CREATE VIEW IF NOT EXISTS yoy_comparison AS
+    conn.execute('DROP VIEW IF EXISTS yoy_comparison')
+    conn.execute('''
+    CREATE VIEW yoy_comparison AS
     SELECT 
         c.name,
-        c.industry,
-        c.headquarters,
+        i.industry_name as industry,
+        ct.city_name as headquarters,
         f1.year as year_2024,
         f1.revenue as revenue_2024,
         f1.profit as profit_2024,
@@ -118,80 +351,240 @@ def create_views():
     FROM companies c
     JOIN financial_data f1 ON c.company_id = f1.company_id AND f1.year = 2024
     JOIN financial_data f2 ON c.company_id = f2.company_id AND f2.year = 2023
+    LEFT JOIN industry_categories i ON i.industry_id = c.industry_id
+    LEFT JOIN cities ct ON ct.city_id = c.city_id
     ''')
 
-    # Industry summary view
-    cursor.execute('''
-    CREATE VIEW IF NOT EXISTS industry_summary AS
+    # Industry summary view, grouped on the integer industry_id; names are joined to the groups
+    conn.execute('DROP VIEW IF EXISTS industry_summary')
+    conn.execute('''
+    CREATE VIEW industry_summary AS
     SELECT 
-        c.industry,
-        f.year,
-        COUNT(*) as company_count,
-        SUM(f.revenue) as total_revenue,
-        SUM(f.profit) as total_profit,
-        AVG(f.revenue) as avg_revenue,
-        AVG(f.profit) as avg_profit
-    FROM companies c
-    JOIN financial_data f ON c.company_id = f.company_id
-    GROUP BY c.industry, f.year
+        s.industry_id,
+        i.industry_name as industry,
+        s.year,
+        s.company_count,
+        s.total_revenue,
+        s.total_profit,
+        s.avg_revenue,
+        s.avg_profit
+    FROM (
+        SELECT 
+            c.industry_id,
+            f.year,
+            COUNT(*) as company_count,
+            SUM(f.revenue) as total_revenue,
+            SUM(f.profit) as total_profit,
+            AVG(f.revenue) as avg_revenue,
+            AVG(f.profit) as avg_profit
+        FROM companies c
+        JOIN financial_data f ON c.company_id = f.company_id
+        GROUP BY c.industry_id, f.year
+    ) s
+    LEFT JOIN industry_categories i ON i.industry_id = s.industry_id
     ''')
 
     conn.commit()
 
+# Materialised copies of the views: (table, view, columns that identify a row)
+SUMMARY_TABLES = [
+    ('yoy_comparison_table', 'yoy_comparison', ['name']),
+    ('industry_summary_table', 'industry_summary', ['industry_id', 'year']),
+]
+
+def create_summary_tables(conn):
+    """Materialise yoy_comparison and industry_summary into plain tables.
+
+    Each table holds the rows of its view. Triggers on financial_data and
+    companies record which (name, industry_id, year) a change touches in
+    summary_changes; refresh_summaries() then recomputes only those rows.
+    """
+    for table, view, key in SUMMARY_TABLES:
+        conn.execute(f'CREATE TABLE IF NOT EXISTS {table} AS SELECT * FROM {view} WHERE 0')
+        conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS idx_{table}_key ON {table}({", ".join(key)})')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_yoy_comparison_table_growth ON yoy_comparison_table(revenue_growth)')
+
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS summary_changes (
+        name TEXT,
+        industry_id INTEGER,
+        year INTEGER,
+        UNIQUE(name, industry_id, year)
+    )''')
+    for event, row in (('INSERT', 'NEW'), ('UPDATE', 'NEW'), ('UPDATE', 'OLD'), ('DELETE', 'OLD')):
+        conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS financial_data_{event.lower()}_{row.lower()} AFTER {event} ON financial_data
+        BEGIN
+            INSERT OR IGNORE INTO summary_changes (name, industry_id, year)
+            SELECT name, industry_id, {row}.year FROM companies WHERE company_id = {row}.company_id;
+        END''')
+    for row in ('NEW', 'OLD'):
+        conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS companies_update_{row.lower()} AFTER UPDATE OF name, industry_id, city_id ON companies
+        BEGIN
+            INSERT OR IGNORE INTO summary_changes (name, industry_id, year)
+            SELECT {row}.name, {row}.industry_id, year FROM financial_data WHERE company_id = {row}.company_id;
+        END''')
+    conn.commit()
+    refresh_summaries(conn, full=True)
+
+def refresh_summaries(conn, full=False):
+    """Bring the summary tables up to date with financial_data and companies.
+
+    Only the companies and (industry, year) groups listed in summary_changes
+    are recomputed, unless ``full`` is set. A changed group is recomputed
+    whole, so with few industries the industry part costs about as much as
+    one query of the view. Returns the number of changes
+    applied (None for a full refresh).
+    """
+    with conn:
+        if full:
+            for table, view, _ in SUMMARY_TABLES:
+                conn.execute(f'DELETE FROM {table}')
+                conn.execute(f'INSERT INTO {table} SELECT * FROM {view}')
+            conn.execute('DELETE FROM summary_changes')
+            return None
+
+        changes = conn.execute('SELECT COUNT(*) FROM summary_changes').fetchone()[0]
+        if changes:
+            changed_names = 'name IN (SELECT name FROM summary_changes)'
+            conn.execute(f'DELETE FROM yoy_comparison_table WHERE {changed_names}')
+            conn.execute(f'INSERT INTO yoy_comparison_table SELECT * FROM yoy_comparison WHERE {changed_names}')
+
+            conn.execute('''
+            DELETE FROM industry_summary_table
+            WHERE EXISTS (SELECT 1 FROM summary_changes s
+                          WHERE s.industry_id IS industry_summary_table.industry_id
+                          AND s.year = industry_summary_table.year)
+            ''')
+            # the groups are recomputed from the base tables, one (industry, year) at a time
+            conn.execute('''
+            INSERT INTO industry_summary_table
+            SELECT
+                g.industry_id,
+                i.industry_name,
+                g.year,
+                COUNT(*),
+                SUM(f.revenue),
+                SUM(f.profit),
+                AVG(f.revenue),
+                AVG(f.profit)
+            FROM (SELECT DISTINCT industry_id, year FROM summary_changes) g
+            JOIN companies c ON c.industry_id IS g.industry_id
+            JOIN financial_data f ON f.company_id = c.company_id AND f.year = g.year
+            LEFT JOIN industry_categories i ON i.industry_id = g.industry_id
+            GROUP BY g.industry_id, g.year
+            ''')
+            conn.execute('DELETE FROM summary_changes')
+        return changes
+
 # Example queries function
-def create_example_queries():
+def create_example_queries(materialized=False):
+    # with materialized=True the queries read the summary tables instead of the views
+    suffix = '_table' if materialized else ''
     return {
         "Top 10 companies by revenue 2024": '''
-            SELECT c.name, f.revenue, f.profit, c.industry
+            SELECT c.name, f.revenue, f.profit, i.industry_name as industry
             FROM companies c
             JOIN financial_data f ON c.company_id = f.company_id
+            LEFT JOIN industry_categories i ON i.industry_id = c.industry_id
             WHERE f.year = 2024
             ORDER BY f.revenue DESC
             LIMIT 10
         ''',
         
-        "Most profitable industries": '''
+        "Most profitable industries": f'''
             SELECT 
                 industry,
                 year,
                 total_profit,
                 avg_profit
-            FROM industry_summary
+            FROM industry_summary{suffix}
             ORDER BY total_profit DESC
         ''',
         
-        "Companies with highest revenue growth": '''
+        "Companies with highest revenue growth": f'''
             SELECT 
                 name,
                 industry,
                 revenue_growth,
                 revenue_2024,
                 revenue_2023
-            FROM yoy_comparison
+            FROM yoy_comparison{suffix}
             ORDER BY revenue_growth DESC
             LIMIT 10
         '''
     }
 
 # Initialize database
-def initialize_database():
-    create_tables()
-    populate_database()
-    create_views()
-    
-    # Run example queries
-    queries = create_example_queries()
+def initialize_database(conn, df_2024, df_2023, bulk=False, materialized=False):
+    create_tables(conn)
+    if bulk:
+        bulk_populate_database(conn, df_2024, df_2023)
+    else:
+        populate_database(conn, df_2024, df_2023)
+    create_indexes(conn)
+    create_views(conn)
+    if materialized:
+        create_summary_tables(conn)
+
+def print_example_queries(conn, materialized=False):
+    queries = create_example_queries(materialized)
     print("\nExample query results:")
     for query_name, query in queries.items():
         print(f"\n{query_name}:")
         result = pd.read_sql_query(query, conn)
         print(result)
 
+def build_database(db_path, cleaned_2024, cleaned_2023, bulk=True, materialized=True):
+    """Build the database at ``db_path`` from scratch from the two cleaned files.
+
+    The database is written next to ``db_path`` and moved into place when it
+    is complete, so an interrupted build never leaves a half-loaded file.
+    """
+    building = db_path + '.building'
+    for path in (building, building + '-wal', building + '-shm'):
+        if os.path.exists(path):
+            os.remove(path)
+    df_2024, df_2023 = load_inputs(cleaned_2024, cleaned_2023)
+    conn = sqlite3.connect(building)
+    try:
+        initialize_database(conn, df_2024, df_2023, bulk=bulk, materialized=materialized)
+    finally:
+        conn.close()
+    os.replace(building, db_path)
+    return db_path
+
+def export_summaries(db_path, industry_path, yoy_path):
+    """Write the industry summary and the year-over-year comparison of a built database to CSV."""
+    db = sqlite3.connect(db_path)
+    try:
+        tables = {name for (name,) in db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        for view, path in (('industry_summary', industry_path), ('yoy_comparison', yoy_path)):
+            # the materialised copy when there is one
+            source = view + '_table' if view + '_table' in tables else view
+            pd.read_sql_query(f'SELECT * FROM {source}', db).to_csv(path, index=False)
+    finally:
+        db.close()
+    return industry_path, yoy_path
+
 # Run the initialization
 if __name__ == "__main__":
-    initialize_database()
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Build india_companies.db from the cleaned Phase 2 files')
+    parser.add_argument('--bulk', action='store_true',
+                        help='load with set-based SQL in one transaction (much faster on large files)')
+    parser.add_argument('--materialized', action='store_true',
+                        help='keep yoy_comparison and industry_summary in tables (see refresh_summaries)')
+    args = parser.parse_args()
+
+    df_2024, df_2023 = load_inputs()
+    conn = sqlite3.connect('india_companies.db')
+    initialize_database(conn, df_2024, df_2023, bulk=args.bulk, materialized=args.materialized)
+    print_example_queries(conn, args.materialized)
     
     # Close connection
     conn.close()
 
-print("Database created successfully with example queries executed.")
\ No newline at end of file
+    print("Database created successfully with example queries executed.")
\ No newline at end of file
@@ -0,0 +1,104 @@
+"""Time and peak memory of the ad hoc pandas prints vs one streaming pass of profiler.py.
+
+    python bench_profiler.py --rows 1000000
+
+A synthetic diabetes CSV of ``--rows`` rows is written to a scratch directory.
+The ad hoc way loads it with pandas.read_csv and runs what data_Cleaning.py
+printed: describe(), info(), head() and three isnull() scans. The profiler
+streams it with profiler.profile_file in batches of its schema. Each runs in
+its own process (and the file is written in another one), so ru_maxrss is
+the peak of that method alone. The report
+is then checked against pandas: null counts, min and max exactly, mean and
+variance to 1e-9, distinct counts to 3%, and top values exactly where the
+report says they are exact (top_values_error 0), otherwise within the error.
+"""
+import argparse
+import io
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import profiler
+import schemas
+from bench_schemas import write_diabetes
+
+
+def write(path, rows, queue):
+    # in a child as well, so that the parent never grows before the measured processes start
+    write_diabetes(path, rows, np.random.default_rng(0))
+    queue.put(os.path.getsize(path))
+
+
+def ad_hoc(path, queue):
+    start = time.perf_counter()
+    df = pd.read_csv(path)
+    output = io.StringIO()
+    print(df.describe(), file=output)
+    df.info(buf=output)
+    print(df.head(), file=output)
+    print(df.isnull().sum(), df.isnull().values.any(), df.isnull().sum().sum(), file=output)
+    queue.put({"elapsed": time.perf_counter() - start,
+               "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024})
+
+
+def streaming(path, queue):
+    start = time.perf_counter()
+    report = profiler.profile_file(path, schemas.DIABETES)
+    queue.put({"elapsed": time.perf_counter() - start, "report": report,
+               "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024})
+
+
+def run(target, *args):
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    worker = context.Process(target=target, args=(*args, queue))
+    worker.start()
+    result = queue.get()
+    worker.join()
+    return result
+
+
+def check(report, df):
+    for name, column in report["columns"].items():
+        values = df[name]
+        assert column["nulls"] == values.isnull().sum(), name
+        assert column["min"] == values.min() and column["max"] == values.max(), name
+        if column["mean"] is not None:
+            assert np.isclose(column["mean"], values.mean(), rtol=1e-9), name
+            assert np.isclose(column["variance"], values.var(), rtol=1e-9), name
+        distinct = values.nunique()
+        assert abs(column["distinct_estimate"] - distinct) <= max(1, 0.03 * distinct), (name, distinct)
+        counts = values.value_counts()
+        error = column["top_values_error"]
+        if error == 0:
+            assert all(counts[value] == count for value, count in column["top_values"]), name
+            assert [count for _, count in column["top_values"]] == counts.head(len(column["top_values"])).tolist()
+        else:
+            # a listed value is counted more than error times, and low by at most error
+            assert all(error < count <= counts[value] <= count + error for value, count in column["top_values"]), name
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "diabetes.csv")
+        size = run(write, path, args.rows)
+        print(f"{args.rows:,} rows, {size / 1024 / 1024:.0f} MB")
+        results = {"ad hoc prints": run(ad_hoc, path), "profiler": run(streaming, path)}
+        for label, result in results.items():
+            print(f"{label:<14} {result['elapsed']:>8.2f}s {args.rows / result['elapsed']:>12,.0f} rows/s "
+                  f"{result['peak_rss_mb']:>8.1f} MB peak RSS")
+        check(results["profiler"]["report"], schemas.read_csv(path, schemas.DIABETES))
+        print("report matches pandas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Parse cost of the schema registry's CSV reader vs the hand-coded parsing it replaced.
+
+    python bench_schemas.py --rows 1000000
+
+For the books export, the raw 2023 Forbes list and the diabetes records, a
+synthetic CSV of ``--rows`` rows is written to a scratch directory and read
+into typed columns twice: with schemas.read_csv, and the way the loader did
+before (pandas.read_csv plus per-column conversion for books and Forbes,
+csv.DictReader with int(float(value)) per row for diabetes). Both results are
+checked to hold the same values, then the rows per second are printed.
+"""
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import schemas
+
+RATINGS = [1, 2, 3, 4, 5]
+CITIES = [' Mumbai', 'New Delhi ', 'Bangalore', 'Chennai', 'Pune']
+GENDERS = ['Female', 'Male', 'Other']
+SMOKING = ['never', 'No Info', 'current', 'former', 'ever', 'not current']
+
+
+def write_books(path, rows, rng):
+    pd.DataFrame({
+        'title': pd.Series(np.arange(rows)).map('Book {}'.format),
+        'price': np.round(rng.uniform(10, 60, rows), 2),
+        'availability': rng.choice(['In stock', 'Out of stock'], rows, p=[0.9, 0.1]),
+        'rating': rng.choice(RATINGS, rows),
+    }).to_csv(path, index=False)
+
+
+def write_forbes_2023(path, rows, rng):
+    crore = pd.Series(rng.integers(-5_000, 9_00_000, rows)).map('{:,}'.format).str.replace('-', '−')
+    pd.DataFrame({
+        'Rank': np.arange(1, rows + 1), 'Name': pd.Series(np.arange(rows)).map('Company {}'.format),
+        'Industry': rng.choice(['Banking ', 'Oil and gas', ' Infotech'], rows), 'Revenue(in  ₹ Crore)': crore,
+        'Revenue growth': pd.Series(np.round(rng.normal(10, 20, rows), 1)).astype(str) + '%',
+        'Profits(in  ₹ Crore)': crore, 'Headquarters': rng.choice(CITIES, rows),
+        'State Controlled': np.where(rng.random(rows) < 0.2, 'Yes', ''),
+    }).to_csv(path, index=False)
+
+
+def write_diabetes(path, rows, rng):
+    pd.DataFrame({
+        'gender': rng.choice(GENDERS, rows), 'age': np.round(rng.uniform(0.1, 80, rows), 1),
+        'hypertension': (rng.random(rows) < 0.07).astype(int), 'heart_disease': (rng.random(rows) < 0.04).astype(int),
+        'smoking_history': rng.choice(SMOKING, rows), 'bmi': np.round(rng.normal(27.3, 6.6, rows).clip(10, 95), 2),
+        'HbA1c_level': rng.choice([3.5, 4.0, 5.7, 6.6, 9.0], rows),
+        'blood_glucose_level': rng.choice([80, 100, 126, 140, 200], rows),
+        'diabetes': (rng.random(rows) < 0.085).astype(int),
+    }).to_csv(path, index=False)
+
+
+def books_by_hand(path):
+    # data_Cleaning.py before the registry
+    df = pd.read_csv(path)
+    df['availability'] = df['availability'].map({'In stock': 1, 'Out of stock': 0})
+    df['price'] = pd.to_numeric(df['price'], errors='coerce')
+    return df
+
+
+def forbes_by_hand(path):
+    # clean.py before the registry
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                    'Phase 2 Data Cleaning and Preparation', 'Pandas'))
+    from converters import _clean_crore_text, _to_float, clean_percentage_series
+
+    df = pd.read_csv(path)
+    for column in ('Revenue(in  ₹ Crore)', 'Profits(in  ₹ Crore)'):
+        df[column] = _to_float(df[column], _clean_crore_text)
+    df['Revenue growth'] = clean_percentage_series(df['Revenue growth'])
+    df['Headquarters'] = df['Headquarters'].str.strip()
+    df['Industry'] = df['Industry'].str.strip()
+    df['State Controlled'] = df['State Controlled'].fillna('No').map({'Yes': True, 'No': False})
+    return df
+
+
+def diabetes_by_hand(path):
+    # create_database.py's row-by-row loader before the registry
+    with open(path, 'r', encoding='utf-8') as file:
+        rows = [(row['gender'], int(float(row['age'])), int(row['hypertension']), int(row['heart_disease']),
+                 row['smoking_history'], float(row['bmi']), float(row['HbA1c_level']),
+                 int(float(row['blood_glucose_level'])), int(row['diabetes'])) for row in csv.DictReader(file)]
+    return pd.DataFrame(rows, columns=schemas.column_names(schemas.DIABETES))
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    datasets = [
+        ('books', write_books, books_by_hand, schemas.BOOKS),
+        ('forbes_2023', write_forbes_2023, forbes_by_hand, schemas.FORBES_2023),
+        ('diabetes', write_diabetes, diabetes_by_hand, schemas.DIABETES),
+    ]
+    print(f'{args.rows:,} rows per file')
+    print(f'{"file":<14}{"by hand":>22}{"schemas.read_csv":>22}{"speedup":>10}')
+    with tempfile.TemporaryDirectory() as directory:
+        for name, write, by_hand, schema in datasets:
+            path = os.path.join(directory, f'{name}.csv')
+            write(path, args.rows, rng)
+            expected, slow = timed(by_hand, path)
+            actual, fast = timed(schemas.read_csv, path, schema)
+            pd.testing.assert_frame_equal(expected.astype(object), actual.astype(object), check_dtype=False)
+            print(f'{name:<14}{args.rows / slow:>16,.0f} rows/s{args.rows / fast:>16,.0f} rows/s{slow / fast:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
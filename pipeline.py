@@ -0,0 +1,249 @@
+import hashlib
+import importlib
+import json
+import os
+import sys
+import time
+from collections import namedtuple
+
+# Runs the phases as one pipeline: scrape and clean the books, clean both Forbes years, give them
+# company IDs, load them into SQLite and export the summaries that the Power BI report reads.
+#
+# A stage calls function(**params). inputs and outputs are the files it reads and writes; a stage
+# runs after the stages whose outputs it reads, and stages that do not depend on each other run
+# in parallel processes. code lists the source files the stage runs. A stage is skipped when the
+# content of its inputs and code and its params are the same as at its last run and its outputs
+# are still the files that run wrote.
+Stage = namedtuple('Stage', ['name', 'function', 'params', 'inputs', 'outputs', 'code'])
+
+# The phase modules import the shared schemas.py and profiler.py of the repository root. Importing
+# them leaves sys.path alone: the stages here get the root from _phase_module, and a phase module
+# or bench script run on its own (python clean.py from its directory) adds it in its
+# ``if __name__ == '__main__'`` block before those imports.
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SCRAPY_DIRECTORY = os.path.join(ROOT, 'Phase 1 Web Scraping', 'Scrapy')
+BOOKS_DIRECTORY = os.path.join(SCRAPY_DIRECTORY, 'books_scraper')
+PANDAS_DIRECTORY = os.path.join(ROOT, 'Phase 2 Data Cleaning and Preparation', 'Pandas')
+SQLITE_DIRECTORY = os.path.join(ROOT, 'Phase 3 SQL Database Integration', 'SQLite')
+
+# run state of each stage, kept in the work directory
+STATE_FILE = '.pipeline_state.json'
+
+def _phase_module(name, directory):
+    # phase modules are imported in the stage processes only, so importing this module stays cheap
+    for path in (ROOT, directory):
+        if path not in sys.path:
+            sys.path.append(path)
+    return importlib.import_module(name)
+
+def scrape_books(books):
+    """Crawl books.toscrape.com into ``books`` with the Scrapy project."""
+    import subprocess
+
+    env = dict(os.environ, SCRAPY_SETTINGS_MODULE='books_scraper.settings',
+               PYTHONPATH=os.pathsep.join(filter(None, [SCRAPY_DIRECTORY, os.environ.get('PYTHONPATH')])))
+    subprocess.run([sys.executable, '-m', 'scrapy', 'crawl', 'books', '-s', f'EXPORT_PATH={books}'],
+                   cwd=SCRAPY_DIRECTORY, env=env, check=True)
+
+def clean_books(books, cleaned_books):
+    data_cleaning = _phase_module('data_Cleaning', BOOKS_DIRECTORY)
+    data_cleaning.write_books(data_cleaning.clean_books(data_cleaning.load_books(books)), cleaned_books)
+
+def clean_year(year, raw, cleaned, usd_inr):
+    # one year of the Forbes list, cleaned but without company IDs, as Parquet for link_companies
+    clean = _phase_module('clean', PANDAS_DIRECTORY)
+    clean.read_and_clean(year, raw, usd_inr).to_parquet(cleaned, index=False)
+
+def link_companies(cleaned_2024, cleaned_2023, output_2024, output_2023, output_combined):
+    import pandas as pd
+
+    clean = _phase_module('clean', PANDAS_DIRECTORY)
+    clean.write_cleaned(pd.read_parquet(cleaned_2024), pd.read_parquet(cleaned_2023),
+                        output_2024, output_2023, output_combined)
+
+def load_database(db_path, cleaned_2024, cleaned_2023, bulk, materialized):
+    database = _phase_module('database', SQLITE_DIRECTORY)
+    database.build_database(db_path, cleaned_2024, cleaned_2023, bulk=bulk, materialized=materialized)
+
+def export_summaries(db_path, industry_summary, yoy_comparison):
+    database = _phase_module('database', SQLITE_DIRECTORY)
+    database.export_summaries(db_path, industry_summary, yoy_comparison)
+
+def default_stages(workdir, forbes_directory='.', books=None, scrape=False, usd_inr=83, bulk=True,
+                   materialized=True):
+    """The stages of the whole pipeline, writing everything into ``workdir``.
+
+    The raw Forbes lists are read from ``forbes_directory``; the books export
+    from ``books`` (default: the one in the Scrapy project), or it is crawled
+    into ``workdir`` first with ``scrape``.
+    """
+    def work(name):
+        return os.path.join(workdir, name)
+
+    def phase(directory, *names):
+        return [os.path.join(directory, name) for name in names]
+
+    schemas = [os.path.join(ROOT, 'schemas.py')]
+    clean_code = phase(PANDAS_DIRECTORY, 'clean.py', 'converters.py', 'company_names.py') + schemas
+    database_code = phase(SQLITE_DIRECTORY, 'database.py') + schemas
+    raw = {2024: os.path.join(forbes_directory, 'Largest Companies in India 2024 Forbes.csv'),
+           2023: os.path.join(forbes_directory, 'Largest Companies in India 2023 Forbes.csv')}
+    cleaned = {year: work(f'cleaned_india_companies_{year}.csv') for year in raw}
+    combined = work('combined_india_companies_2023_2024.csv')
+    db_path = work('india_companies.db')
+
+    stages = []
+    if scrape:
+        books = work('books.csv')
+        stages.append(Stage('scrape_books', scrape_books, {'books': books}, [], [books],
+                            phase(BOOKS_DIRECTORY, os.path.join('spiders', 'books_spider.py'), 'extraction.py',
+                                  'items.py', 'pipelines.py', 'dedup.py', 'httpcache.py', 'archive.py',
+                                  'settings.py')))
+    books = books or os.path.join(BOOKS_DIRECTORY, 'books.csv')
+    stages.append(Stage('clean_books', clean_books, {'books': books, 'cleaned_books': work('cleaned_data.csv')},
+                        [books], [work('cleaned_data.csv'), work('cleaned_data.parquet')],
+                        phase(BOOKS_DIRECTORY, 'data_Cleaning.py') + schemas))
+    for year in raw:
+        stages.append(Stage(f'clean_{year}', clean_year,
+                            {'year': year, 'raw': raw[year], 'cleaned': work(f'clean_{year}.parquet'),
+                             'usd_inr': usd_inr},
+                            [raw[year]], [work(f'clean_{year}.parquet')], clean_code))
+    outputs = [cleaned[2024], cleaned[2023], combined]
+    stages.append(Stage('link_companies', link_companies,
+                        {'cleaned_2024': work('clean_2024.parquet'), 'cleaned_2023': work('clean_2023.parquet'),
+                         'output_2024': cleaned[2024], 'output_2023': cleaned[2023], 'output_combined': combined},
+                        [work('clean_2024.parquet'), work('clean_2023.parquet')],
+                        outputs + [os.path.splitext(path)[0] + '.parquet' for path in outputs], clean_code))
+    cleaned_files = [path for year in raw
+                     for path in (cleaned[year], os.path.splitext(cleaned[year])[0] + '.parquet')]
+    stages.append(Stage('load_database', load_database,
+                        {'db_path': db_path, 'cleaned_2024': cleaned[2024], 'cleaned_2023': cleaned[2023],
+                         'bulk': bulk, 'materialized': materialized},
+                        cleaned_files, [db_path], database_code))
+    stages.append(Stage('export_summaries', export_summaries,
+                        {'db_path': db_path, 'industry_summary': work('industry_summary.csv'),
+                         'yoy_comparison': work('yoy_comparison.csv')},
+                        [db_path], [work('industry_summary.csv'), work('yoy_comparison.csv')], database_code))
+    return stages
+
+def file_hash(path, known=None):
+    """SHA-256 of a file's content; ``known`` maps paths to [size, mtime_ns, hash] seen before."""
+    stat = os.stat(path)
+    if known is not None and known.get(path, [None, None])[:2] == [stat.st_size, stat.st_mtime_ns]:
+        return known[path][2]
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    if known is not None:
+        known[path] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+    return digest.hexdigest()
+
+def stage_key(stage, known=None):
+    """Hash of everything a stage's outputs depend on: its params and the content of its inputs and code."""
+    digest = hashlib.sha256(json.dumps([stage.name, stage.function.__name__, stage.params],
+                                       sort_keys=True, default=str).encode('utf-8'))
+    for path in list(stage.inputs) + list(stage.code):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f'{stage.name} needs {path}, which does not exist')
+        digest.update(f'\0{path}\0{file_hash(path, known)}'.encode('utf-8'))
+    return digest.hexdigest()
+
+def _dependencies(stages):
+    # stage name -> names of the stages that write its inputs
+    writers = {path: stage.name for stage in stages for path in stage.outputs}
+    return {stage.name: {writers[path] for path in stage.inputs if path in writers} for stage in stages}
+
+def _up_to_date(stage, key, state, known):
+    recorded = state.get(stage.name)
+    if not recorded or recorded['key'] != key:
+        return False
+    return all(os.path.exists(path) and file_hash(path, known) == recorded['outputs'].get(path)
+               for path in stage.outputs)
+
+def run(stages, workdir, workers=None, force=(), log=print):
+    """Run the stages in dependency order, skipping the ones whose outputs are still valid.
+
+    Stages in ``force`` run anyway. Independent stages run in parallel, in up
+    to ``workers`` processes. Returns {stage name: 'ran' or 'skipped'}.
+    """
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+    import multiprocessing
+
+    os.makedirs(workdir, exist_ok=True)
+    state_path = os.path.join(workdir, STATE_FILE)
+    state = {}
+    if os.path.exists(state_path):
+        with open(state_path, 'r', encoding='utf-8') as file:
+            state = json.load(file)
+    known = state.setdefault('_files', {})
+    dependencies = _dependencies(stages)
+    by_name = {stage.name: stage for stage in stages}
+    results = {}
+    running = {}
+
+    def save():
+        with open(state_path, 'w', encoding='utf-8') as file:
+            json.dump(state, file, indent=1, sort_keys=True)
+
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        try:
+            while len(results) < len(stages):
+                started = {name for name, _, _ in running.values()}
+                ready = [stage for stage in stages if stage.name not in results and stage.name not in started
+                         and dependencies[stage.name] <= results.keys()]
+                for stage in ready:
+                    key = stage_key(stage, known)
+                    if stage.name not in force and _up_to_date(stage, key, state, known):
+                        results[stage.name] = 'skipped'
+                        log(f'{stage.name:<18} up to date')
+                        continue
+                    log(f'{stage.name:<18} running')
+                    running[pool.submit(stage.function, **stage.params)] = (stage.name, key, time.perf_counter())
+                if len(results) == len(stages):
+                    break
+                if not running:
+                    if ready:
+                        continue
+                    raise ValueError('stages wait for each other: ' + ', '.join(
+                        stage.name for stage in stages if stage.name not in results))
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, key, start = running.pop(future)
+                    future.result()
+                    state[name] = {'key': key, 'outputs': {path: file_hash(path, known)
+                                                           for path in by_name[name].outputs}}
+                    save()
+                    results[name] = 'ran'
+                    log(f'{name:<18} ran in {time.perf_counter() - start:.1f}s')
+        except BaseException:
+            for future in running:
+                future.cancel()
+            raise
+    save()
+    return results
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Run the scrape, clean, load and export stages, skipping '
+                                                 'the ones that are up to date')
+    parser.add_argument('--workdir', default='pipeline_output', help='where every stage writes its outputs')
+    parser.add_argument('--forbes-dir', default='.', help='directory of the two raw Forbes CSV files')
+    parser.add_argument('--books', help='books export to clean (default: the one in the Scrapy project)')
+    parser.add_argument('--scrape', action='store_true', help='crawl the books into the work directory first')
+    parser.add_argument('--usd-inr', type=float, default=83, help='rupees per dollar for the 2023 list')
+    parser.add_argument('--workers', type=int, default=2, help='stages run at the same time')
+    parser.add_argument('--force', nargs='+', default=[], metavar='STAGE', help='run these stages anyway')
+    args = parser.parse_args()
+
+    stages = default_stages(os.path.abspath(args.workdir), os.path.abspath(args.forbes_dir),
+                            args.books and os.path.abspath(args.books), args.scrape, args.usd_inr)
+    unknown = set(args.force) - {stage.name for stage in stages}
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+    start = time.perf_counter()
+    results = run(stages, os.path.abspath(args.workdir), args.workers, set(args.force))
+    ran = sum(result == 'ran' for result in results.values())
+    print(f'{ran} of {len(results)} stages ran in {time.perf_counter() - start:.1f}s')
@@ -0,0 +1,255 @@
+import json
+import math
+
+import numpy as np
+
+# Single-pass data-quality profile of a dataset read batch by batch (pyarrow tables or
+# record batches, pandas DataFrames). Per column: rows, null count (NaN counts as null,
+# as in pandas.isnull), min and max, mean and variance of numeric and bool columns,
+# an estimate of the number of distinct values (HyperLogLog) and the most frequent
+# values (a mergeable Misra-Gries summary). Every statistic is merged from batch
+# statistics, so memory depends on the number of columns, not rows: each column keeps
+# 2 ** HLL_PRECISION one-byte registers and at most TOP_CAPACITY value counters.
+#
+#     python profiler.py books.csv --schema books --output books_profile.json
+
+# 16384 registers per column, about 0.8% standard error on the distinct count (11 to 18)
+HLL_PRECISION = 14
+# values listed under top_values
+TOP_K = 10
+# value counters kept per column; a count in top_values is low by at most top_values_error,
+# so only values counted more often than that are listed
+TOP_CAPACITY = 1000
+# rows per batch when profiling a DataFrame or a file without a schema
+BATCH_SIZE = 50_000
+
+def _prune(counts, capacity):
+    # Misra-Gries: keep the ``capacity`` largest counts, lowered by the next largest one
+    if len(counts) <= capacity:
+        return counts, 0
+    threshold = sorted(counts.values(), reverse=True)[capacity]
+    return {value: count - threshold for value, count in counts.items() if count > threshold}, threshold
+
+class ColumnProfile:
+    """Statistics of one column, updated with one pyarrow array per batch."""
+
+    def __init__(self, name, top_k=TOP_K, capacity=TOP_CAPACITY, precision=HLL_PRECISION):
+        self.name = name
+        self.top_k = top_k
+        self.capacity = capacity
+        self.precision = precision
+        self.type = None
+        self.rows = 0
+        self.nulls = 0
+        self.min = self.max = None
+        # values, mean and sum of squared deviations of the numeric values so far
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+        self.counts = {}
+        self.error = 0
+
+    def update(self, array):
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        if isinstance(array, pa.ChunkedArray):
+            array = array.combine_chunks()
+        if pa.types.is_dictionary(array.type):
+            array = array.dictionary_decode()
+        if self.type is None:
+            self.type = str(array.type)
+        self.rows += len(array)
+        valid = array.drop_null()
+        if pa.types.is_floating(array.type):
+            valid = valid.filter(pc.invert(pc.is_nan(valid)))
+        self.nulls += len(array) - len(valid)
+        if not len(valid):
+            return
+
+        low, high = pc.min_max(valid).values()
+        self.min = low.as_py() if self.min is None else min(self.min, low.as_py())
+        self.max = high.as_py() if self.max is None else max(self.max, high.as_py())
+        if pa.types.is_integer(valid.type) or pa.types.is_floating(valid.type) or pa.types.is_boolean(valid.type):
+            # through numpy, as large integers (such as hashed IDs) have no exact float64
+            self._add_moments(valid.to_numpy(zero_copy_only=False).astype(np.float64))
+        # both sketches only need each distinct value of the batch once, with its count
+        value_counts = pc.value_counts(valid)
+        values, counts = value_counts.field('values'), value_counts.field('counts').to_numpy()
+        self._add_hashes(values)
+        self._add_counts(values, counts)
+
+    def _add_moments(self, values):
+        # Chan et al.: combine the batch's count, mean and squared deviations with the running ones
+        count = len(values)
+        mean = values.mean()
+        m2 = ((values - mean) ** 2).sum()
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+
+    def _add_hashes(self, values):
+        import pandas as pd
+
+        hashes = pd.util.hash_array(values.to_numpy(zero_copy_only=False))
+        # the first ``precision`` bits pick the register; the rank is the position of the first
+        # set bit in the other 64 - precision bits, which float64 holds exactly (frexp gives the
+        # bit length, 0 for 0)
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.intp)
+        rest = hashes & np.uint64((1 << (64 - self.precision)) - 1)
+        rank = 65 - self.precision - np.frexp(rest.astype(np.float64))[1]
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    def _add_counts(self, values, counts):
+        if len(counts) > self.capacity:
+            threshold = np.partition(counts, len(counts) - self.capacity - 1)[len(counts) - self.capacity - 1]
+            keep = np.flatnonzero(counts > threshold)
+            values, counts = values.take(keep), counts[keep] - threshold
+            self.error += int(threshold)
+        for value, count in zip(values.to_pylist(), counts.tolist()):
+            self.counts[value] = self.counts.get(value, 0) + count
+        self.counts, threshold = _prune(self.counts, self.capacity)
+        self.error += threshold
+
+    def distinct_estimate(self):
+        m = len(self.registers)
+        if self.rows == self.nulls:
+            return 0
+        estimate = 0.7213 / (1 + 1.079 / m) * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # small cardinalities: linear counting of the empty registers
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def report(self):
+        numeric = self.count > 0
+        # a value counted error times or fewer may be no more frequent than any other one
+        reliable = [(value, count) for value, count in self.counts.items() if count > self.error]
+        top = sorted(reliable, key=lambda item: (-item[1], str(item[0])))[:self.top_k]
+        return {
+            'type': self.type,
+            'rows': self.rows,
+            'nulls': self.nulls,
+            'null_fraction': self.nulls / self.rows if self.rows else 0.0,
+            'min': self.min,
+            'max': self.max,
+            'mean': float(self.mean) if numeric else None,
+            'variance': float(self.m2 / (self.count - 1)) if self.count > 1 else None,
+            'distinct_estimate': self.distinct_estimate(),
+            'top_values': [[value, count] for value, count in top],
+            'top_values_error': self.error,
+        }
+
+class Profiler:
+    """Profile of a dataset fed one batch at a time with update()."""
+
+    def __init__(self, name=None, top_k=TOP_K, capacity=TOP_CAPACITY, precision=HLL_PRECISION):
+        self.name = name
+        self.options = dict(top_k=top_k, capacity=capacity, precision=precision)
+        self.columns = {}
+        self.rows = 0
+        self.batches = 0
+
+    def update(self, batch):
+        """Add a pyarrow Table / RecordBatch or a pandas DataFrame."""
+        import pyarrow as pa
+
+        if not isinstance(batch, (pa.Table, pa.RecordBatch)):
+            batch = pa.Table.from_pandas(batch, preserve_index=False)
+        for name, column in zip(batch.schema.names, batch.columns):
+            if name not in self.columns:
+                self.columns[name] = ColumnProfile(name, **self.options)
+            self.columns[name].update(column)
+        self.rows += batch.num_rows
+        self.batches += 1
+        return self
+
+    def report(self):
+        columns = {name: column.report() for name, column in self.columns.items()}
+        return {
+            'dataset': self.name,
+            'rows': self.rows,
+            'batches': self.batches,
+            'missing_values': sum(column['nulls'] for column in columns.values()),
+            'columns': columns,
+        }
+
+def profile_batches(batches, name=None, **options):
+    """Report of a dataset given as an iterable of batches (see Profiler.update)."""
+    profiler = Profiler(name, **options)
+    for batch in batches:
+        profiler.update(batch)
+    return profiler.report()
+
+def profile_frame(df, name=None, batch_size=BATCH_SIZE, **options):
+    """Report of an in-memory DataFrame, read in batches of ``batch_size`` rows."""
+    import pyarrow as pa
+
+    return profile_batches(pa.Table.from_pandas(df, preserve_index=False).to_batches(batch_size), name, **options)
+
+def profile_file(path, schema=None, batch_size=BATCH_SIZE, **options):
+    """Report of a CSV or Parquet file, streamed batch by batch.
+
+    A CSV is typed by ``schema`` (a schemas.Schema) if given, otherwise with
+    the types pyarrow infers from its first block.
+    """
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        batches = pq.ParquetFile(path, memory_map=True).iter_batches(batch_size)
+    elif schema is not None:
+        from schemas import stream_csv
+
+        batches = stream_csv(path, schema, batch_size=batch_size)
+    else:
+        import pyarrow.csv as pv
+
+        batches = pv.open_csv(path, read_options=pv.ReadOptions(block_size=max(1 << 20, batch_size * 64)))
+    return profile_batches(batches, path, **options)
+
+def write_report(report, path):
+    with open(path, 'w', encoding='utf-8') as file:
+        # values without a JSON type (dates, decimals) are written as text
+        json.dump(report, file, indent=2, default=str, ensure_ascii=False)
+    return path
+
+def format_report(report):
+    """The report as a short text table, one line per column."""
+    lines = [f"{report['dataset'] or 'dataset'}: {report['rows']:,} rows, {len(report['columns'])} columns, "
+             f"{report['missing_values']:,} missing values",
+             f"{'column':<24}{'type':<14}{'nulls':>9}{'min':>14}{'max':>14}{'mean':>14}{'distinct':>10}  top value"]
+
+    def cell(value):
+        if isinstance(value, float):
+            return f'{value:.4g}'
+        return '' if value is None else str(value)[:13]
+
+    for name, column in report['columns'].items():
+        top = column['top_values'][0] if column['top_values'] else None
+        line = (f"{name[:23]:<24}{column['type'][:13]:<14}{column['nulls']:>9,}{cell(column['min']):>14}"
+                f"{cell(column['max']):>14}{cell(column['mean']):>14}{column['distinct_estimate']:>10,}")
+        lines.append(line + (f"  {str(top[0])[:20]} ({top[1]:,})" if top else ''))
+    return '\n'.join(lines)
+
+if __name__ == '__main__':
+    import argparse
+
+    from schemas import SCHEMAS
+
+    parser = argparse.ArgumentParser(description='Profile a CSV or Parquet file in one pass')
+    parser.add_argument('path')
+    parser.add_argument('--schema', choices=sorted(SCHEMAS), help='type the CSV with this schema of schemas.py')
+    parser.add_argument('--output', help='JSON report (default: <path without extension>_profile.json)')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--top-k', type=int, default=TOP_K)
+    args = parser.parse_args()
+
+    report = profile_file(args.path, args.schema and SCHEMAS[args.schema], args.batch_size, top_k=args.top_k)
+    output = args.output or args.path.rsplit('.', 1)[0] + '_profile.json'
+    write_report(report, output)
+    print(format_report(report))
+    print(f'Report written to {output}')
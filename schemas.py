@@ -0,0 +1,317 @@
+import csv
+from collections import namedtuple
+
+import numpy as np
+
+# Schema registry for the CSV files the phases read: the raw books export, the raw and
+# cleaned Forbes lists, and the diabetes records. Every loader reads its CSV through
+# stream_csv / read_csv below, so the text is parsed and typed once, by pyarrow, in batches.
+#
+# Column types: 'string', 'category' (dictionary-encoded string), 'int64', 'float64', 'bool'.
+# transforms: names from TEXT_TRANSFORMS (applied to the text before parsing) and
+# NUMBER_TRANSFORMS (applied to the parsed numbers). values maps text to values of the
+# column type; default replaces missing text; limits and max_length bound the values.
+# A value that cannot be parsed or is out of bounds is null in a nullable column and
+# rejects its row otherwise.
+Column = namedtuple('Column', ['name', 'type', 'nullable', 'transforms', 'values', 'default', 'limits',
+                               'max_length'],
+                    defaults=[True, (), None, None, None, None])
+
+# null_values: text read as missing (None: the same list as pandas.read_csv, (): nothing)
+Schema = namedtuple('Schema', ['name', 'columns', 'null_values'], defaults=[None])
+
+# what pandas.read_csv reads as NaN by default
+PANDAS_NULLS = ['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+                '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null']
+
+# Text accepted by float() (after trimming whitespace), and whole numbers of at most 19 digits
+FLOAT_TEXT = r'^\s*[+-]?((\d+\.?\d*|\.\d+)([eE][+-]?\d+)?|(?i:inf|infinity|nan))\s*$'
+WHOLE_NUMBER_TEXT = r'^\s*[+-]?0*\d{1,19}\s*$'
+INT64_MAX_TEXT = str(2 ** 63 - 1)
+
+# Text of bool columns without their own values, as pandas.read_csv reads it
+BOOL_TEXT = {'True': True, 'False': False, 'TRUE': True, 'FALSE': False, 'true': True, 'false': False}
+
+INT_RANGE = (-2 ** 31, 2 ** 31 - 1)
+TINYINT_RANGE = (-128, 127)
+
+# Rows per batch yielded by stream_csv
+BATCH_SIZE = 50_000
+
+def _strip(text):
+    import pyarrow.compute as pc
+    return pc.utf8_trim_whitespace(text)
+
+def _crore(text):
+    # '−1,234' as printed in the Wikipedia tables
+    import pyarrow.compute as pc
+    return pc.replace_substring(pc.replace_substring(text, '−', '-'), ',', '')
+
+def _percent(text):
+    import pyarrow.compute as pc
+    return pc.utf8_trim(text, '%')
+
+TEXT_TRANSFORMS = {'strip': _strip, 'crore': _crore, 'percent': _percent}
+
+NUMBER_TRANSFORMS = {
+    # int(float(value))
+    'truncate': np.trunc,
+    # DECIMAL(p,2)
+    'round2': lambda values: np.round(values, 2),
+}
+
+BOOKS = Schema('books', [
+    Column('title', 'string'),
+    Column('price', 'float64'),
+    Column('availability', 'int64', values={'In stock': 1, 'Out of stock': 0}),
+    Column('rating', 'int64'),
+])
+
+FORBES_2024 = Schema('forbes_2024', [
+    Column('Rank', 'int64'),
+    Column('Forbes 2000 rank', 'int64'),
+    Column('Name', 'string'),
+    Column('Headquarters', 'string', transforms=('strip',)),
+    Column('Revenue(billions US$)', 'float64'),
+    Column('Profit(billions US$)', 'float64'),
+    Column('Assets(billions US$)', 'float64'),
+    Column('Value(billions US$)', 'float64'),
+    Column('Industry', 'string', transforms=('strip',)),
+])
+
+FORBES_2023 = Schema('forbes_2023', [
+    Column('Rank', 'int64'),
+    Column('Name', 'string'),
+    Column('Industry', 'string', transforms=('strip',)),
+    Column('Revenue(in  ₹ Crore)', 'float64', transforms=('crore',)),
+    Column('Revenue growth', 'float64', transforms=('percent',)),
+    Column('Profits(in  ₹ Crore)', 'float64', transforms=('crore',)),
+    Column('Headquarters', 'string', transforms=('strip',)),
+    Column('State Controlled', 'bool', values={'Yes': True, 'No': False}, default=False),
+])
+
+# The files clean.py writes (and Phase 3 reads)
+FORBES_CLEANED_2024 = Schema('forbes_cleaned_2024', [
+    Column('Company_ID', 'int64'),
+    Column('Rank', 'int64'),
+    Column('Forbes_Rank', 'int64'),
+    Column('Name', 'string'),
+    Column('Headquarters', 'category'),
+    Column('Revenue', 'float64'),
+    Column('Profit', 'float64'),
+    Column('Assets', 'float64'),
+    Column('Value', 'float64'),
+    Column('Industry', 'category'),
+    Column('Year', 'int64'),
+])
+
+FORBES_CLEANED_2023 = Schema('forbes_cleaned_2023', [
+    Column('Company_ID', 'int64'),
+    Column('Rank', 'int64'),
+    Column('Name', 'string'),
+    Column('Industry', 'category'),
+    Column('Revenue', 'float64'),
+    Column('Profit', 'float64'),
+    Column('Revenue_Growth', 'float64'),
+    Column('Headquarters', 'category'),
+    Column('State_Controlled', 'bool'),
+    Column('Year', 'int64'),
+])
+
+# The diabetes_data table: VARCHAR lengths, TINYINT flags, INT columns read as int(float(value)),
+# DECIMAL(5,2) and DECIMAL(4,2) columns. Every column is required and no text counts as missing.
+DIABETES = Schema('diabetes', [
+    Column('gender', 'string', nullable=False, max_length=10),
+    Column('age', 'int64', nullable=False, transforms=('truncate',), limits=INT_RANGE),
+    Column('hypertension', 'int64', nullable=False, limits=TINYINT_RANGE),
+    Column('heart_disease', 'int64', nullable=False, limits=TINYINT_RANGE),
+    Column('smoking_history', 'string', nullable=False, max_length=20),
+    Column('bmi', 'float64', nullable=False, transforms=('round2',), limits=(-999.99, 999.99)),
+    Column('HbA1c_level', 'float64', nullable=False, transforms=('round2',), limits=(-99.99, 99.99)),
+    Column('blood_glucose_level', 'int64', nullable=False, transforms=('truncate',), limits=INT_RANGE),
+    Column('diabetes', 'int64', nullable=False, limits=TINYINT_RANGE),
+], null_values=())
+
+SCHEMAS = {schema.name: schema for schema in (BOOKS, FORBES_2024, FORBES_2023, FORBES_CLEANED_2024,
+                                              FORBES_CLEANED_2023, DIABETES)}
+
+def column_names(schema):
+    return [column.name for column in schema.columns]
+
+def column_types(schema):
+    return {column.name: column.type for column in schema.columns}
+
+def arrow_type(kind):
+    import pyarrow as pa
+
+    return {
+        'int64': pa.int64(), 'float64': pa.float64(), 'string': pa.string(), 'bool': pa.bool_(),
+        'category': pa.dictionary(pa.int32(), pa.string()),
+    }[kind]
+
+def missing_columns(path, schema, columns=None):
+    """Columns of ``schema`` (or just ``columns``) that are not in the header of the CSV at ``path``."""
+    with open(path, 'r', newline='', encoding='utf-8-sig') as file:
+        header = next(csv.reader(file), [])
+    return [name for name in columns or column_names(schema) if name not in header]
+
+def _selected(schema, columns):
+    # names of the columns to read: all of the schema, or those of ``columns`` it has, in that order
+    names = column_names(schema)
+    return names if columns is None else [name for name in columns if name in names]
+
+def _parse(column, text):
+    # (typed values, rows whose text is invalid) for one column of CSV text
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    for name in column.transforms:
+        if name in TEXT_TRANSFORMS:
+            text = TEXT_TRANSFORMS[name](text)
+    present = pc.is_valid(text)
+    mapping = BOOL_TEXT if column.values is None and column.type == 'bool' else column.values
+    if mapping is not None:
+        index = pc.index_in(text, value_set=pa.array(list(mapping)))
+        values = pc.take(pa.array(list(mapping.values()), arrow_type(column.type)), index)
+        invalid = pc.and_(present, pc.is_null(index))
+    elif column.type in ('string', 'category'):
+        values = text
+        invalid = pa.array(np.zeros(len(text), dtype=bool))
+        if column.max_length is not None:
+            invalid = pc.fill_null(pc.greater(pc.utf8_length(text), column.max_length), False)
+    else:
+        numbers = [name for name in column.transforms if name in NUMBER_TRANSFORMS]
+        whole = column.type == 'int64' and not numbers
+        valid = pc.fill_null(pc.match_substring_regex(text, WHOLE_NUMBER_TEXT if whole else FLOAT_TEXT), False)
+        text = pc.if_else(valid, pc.utf8_trim_whitespace(text), None)
+        if whole:
+            # 19 digits can overflow an int64 (its smallest value is rejected too)
+            digits = pc.replace_substring_regex(text, r'^[+-]?0*', '')
+            overflow = pc.and_(pc.equal(pc.utf8_length(digits), 19), pc.greater(digits, INT64_MAX_TEXT))
+            valid = pc.and_(valid, pc.invert(pc.fill_null(overflow, False)))
+            text = pc.if_else(valid, text, None)
+        invalid = pc.and_(present, pc.invert(valid))
+        if whole:
+            values = pc.cast(pc.replace_substring_regex(text, r'^\+', ''), pa.int64())
+            floats = values.to_numpy(zero_copy_only=False).astype(float)
+        else:
+            floats = pc.cast(text, pa.float64()).to_numpy(zero_copy_only=False)
+            for name in numbers:
+                floats = NUMBER_TRANSFORMS[name](floats)
+            if column.type == 'int64':
+                with np.errstate(invalid='ignore'):
+                    out_of_range = ~(np.abs(floats) < 2 ** 63) & ~np.isnan(floats)
+                invalid = pc.or_(invalid, pa.array(out_of_range))
+                floats = np.where(out_of_range, np.nan, floats)
+            values = pa.array(floats, mask=np.isnan(floats) if column.type == 'int64' else None).cast(
+                arrow_type(column.type))
+        if column.limits is not None:
+            with np.errstate(invalid='ignore'):
+                outside = (floats < column.limits[0]) | (floats > column.limits[1])
+            invalid = pc.or_(invalid, pa.array(outside))
+    if column.default is not None:
+        values = pc.fill_null(values, pa.scalar(column.default, values.type))
+    if column.nullable:
+        values = pc.if_else(invalid, pa.scalar(None, values.type), values)
+        bad = np.zeros(len(values), dtype=bool)
+    else:
+        bad = pc.fill_null(pc.or_(invalid, pc.is_null(values, nan_is_null=True)), True).to_numpy(zero_copy_only=False)
+    if column.type == 'category':
+        values = pc.dictionary_encode(values)
+    return values, bad
+
+def _convert(batch, schema, names):
+    # (typed table of all rows, index in names of the first bad column of each row, len(names) if none)
+    import pyarrow as pa
+
+    first_error = np.full(batch.num_rows, len(names))
+    arrays = []
+    columns = {column.name: column for column in schema.columns}
+    for number, column in enumerate(columns[name] for name in names):
+        values, bad = _parse(column, batch.column(column.name))
+        arrays.append(values)
+        first_error = np.where(bad & (first_error == len(names)), number, first_error)
+    return pa.table(arrays, names=names), first_error
+
+def convert(batch, schema, columns=None):
+    """Type a pyarrow batch of CSV text (all columns str) with ``schema``, column by column.
+
+    Returns (table, rejects): a pyarrow table of the rows that fit the
+    schema, and a list of (error, CSV line) for the rows that do not, the
+    error naming the first bad column.
+    """
+    import pyarrow as pa
+
+    names = _selected(schema, columns)
+    table, first_error = _convert(batch, schema, names)
+    valid = first_error == len(names)
+    if valid.all():
+        return table, []
+    lines = batch.filter(pa.array(~valid)).to_pandas().to_csv(header=False, index=False,
+                                                             lineterminator='\n').splitlines()
+    return (table.filter(pa.array(valid)),
+            [(f'invalid {names[number]}', line) for number, line in zip(first_error[~valid], lines)])
+
+def stream_csv(path, schema, columns=None, batch_size=BATCH_SIZE, on_reject=None):
+    """Read a CSV as typed pyarrow tables of at most ``batch_size`` rows.
+
+    Only the columns of ``schema`` are read (or those of ``columns`` it has,
+    in that order); a missing one raises ValueError. Rows that do not fit
+    the schema and lines with the wrong number of fields are passed to
+    ``on_reject`` as a list of (error, line) once per batch; without
+    ``on_reject`` the first one raises ValueError.
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pv
+
+    names = _selected(schema, columns)
+    missing = missing_columns(path, schema, names)
+    if missing:
+        raise ValueError(f"{path} is missing columns: {', '.join(missing)}")
+
+    malformed = []
+
+    def invalid_row(row):
+        if on_reject is None:
+            return 'error'
+        malformed.append((f'expected {row.expected_columns} fields, got {row.actual_columns}', row.text))
+        return 'skip'
+
+    null_values = PANDAS_NULLS if schema.null_values is None else list(schema.null_values)
+    reader = pv.open_csv(
+        path,
+        read_options=pv.ReadOptions(block_size=max(1 << 20, batch_size * 64)),
+        parse_options=pv.ParseOptions(invalid_row_handler=invalid_row),
+        convert_options=pv.ConvertOptions(include_columns=names, column_types=dict.fromkeys(names, pa.string()),
+                                          null_values=null_values, strings_can_be_null=bool(null_values)),
+    )
+    rows = 0
+    for record_batch in reader:
+        for start in range(0, record_batch.num_rows, batch_size):
+            batch = record_batch.slice(start, batch_size)
+            if on_reject is None:
+                table, first_error = _convert(batch, schema, names)
+                bad = np.flatnonzero(first_error < len(names))
+                if len(bad):
+                    row = batch.slice(bad[0], 1).to_pylist()[0]
+                    raise ValueError(f'{path}: invalid {names[first_error[bad[0]]]} in row {rows + bad[0] + 1}: {row}')
+            else:
+                table, rejects = convert(batch, schema, names)
+                rejects.extend(malformed)
+                malformed.clear()
+                if rejects:
+                    on_reject(rejects)
+            rows += batch.num_rows
+            yield table
+    if malformed:
+        on_reject(malformed)
+
+def read_csv(path, schema, columns=None, on_reject=None):
+    """The whole CSV as a pandas DataFrame typed by ``schema`` (see stream_csv)."""
+    import pyarrow as pa
+
+    tables = list(stream_csv(path, schema, columns, on_reject=on_reject))
+    if not tables:
+        names = _selected(schema, columns)
+        return pa.schema([(name, arrow_type(column_types(schema)[name])) for name in names]).empty_table().to_pandas()
+    return pa.concat_tables(tables).to_pandas()